@@ -1,6 +1,142 @@
-def main():
-    print("Hello from daejeon-kospi-index!")
+import argparse
+import os
+import sys
+
+# 각 단계 스크립트는 scripts 폴더의 모듈을 서로 import합니다.
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
+
+# --- 설정 변수 ---
+# pandas·matplotlib·pykrx 등 무거운 라이브러리는 필요한 하위 명령 안에서만 import합니다.
+DEAJEON_INDEX_DIR = './data/deajeon_index'
+PIPELINE_STATE_FILE = './data/pipeline_state.json'
+IMPORT_BUDGET_MS = 100.0                                  # `main.py check` 시작까지의 import 시간 상한 (-X importtime 누적)
+PASSTHROUGH_COMMANDS = ('run', 'fetch', 'index', 'viz', 'regions', 'bench')  # 나머지 인자를 단계 스크립트에 그대로 넘기는 하위 명령
+HEAVY_MODULES = ('pandas', 'numpy', 'matplotlib', 'pykrx', 'tqdm', 'holidayskr')  # 시작할 때 불러오면 안 되는 모듈
+
+
+def _run_script(name, args):
+    """scripts 폴더의 단계 스크립트를 현재 프로세스에서 __main__으로 실행합니다. (인터프리터를 새로 띄우지 않음)"""
+    import runpy
+
+    path = os.path.join(SCRIPTS_DIR, name)
+    sys.argv = [path, *args]
+    runpy.run_path(path, run_name='__main__')
+    return 0
+
+def measure_import_time(argv=('check', '--no-budget')):
+    """
+    `python -X importtime main.py <argv>`를 실행해 import 시간을 잽니다.
+    - 반환값: (최상위 import 누적 시간 ms, [(모듈, 누적 ms), ...] 큰 순서, 불러온 무거운 모듈 목록)
+    """
+    import subprocess
+
+    result = subprocess.run([sys.executable, '-X', 'importtime', os.path.abspath(__file__), *argv],
+                            capture_output=True, text=True, encoding='utf-8', errors='replace')
+    total_us, top, heavy = 0, [], set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|', 2)
+        if not cumulative.strip().isdigit():
+            continue   # 머리글 줄
+        module = name.strip()
+        if module.split('.')[0] in HEAVY_MODULES:
+            heavy.add(module.split('.')[0])
+        # 들여쓰기가 없는 줄이 최상위 import (하위 import는 누적 시간에 이미 포함)
+        if len(name) - len(name.lstrip()) == 1:
+            total_us += int(cumulative)
+            top.append((module, int(cumulative) / 1000))
+    return total_us / 1000, sorted(top, key=lambda item: -item[1]), sorted(heavy)
+
+def _latest(directory, prefix, ext='csv'):
+    """prefix_YYYYMMDD.ext 중 파일명 날짜가 가장 최근인 파일 이름 (pandas 없이)"""
+    import re
+
+    names = [name for name in os.listdir(directory) if re.fullmatch(rf'{prefix}_\d{{8}}\.{ext}', name)] \
+        if os.path.isdir(directory) else []
+    return max(names) if names else None
+
+def cmd_check(args):
+    """
+    저장된 결과의 상태를 빠르게 보여주고, import 시간 예산을 확인합니다.
+    - 예산을 넘거나 시작할 때 무거운 모듈을 불러오면 1을 반환합니다. (cron·CI에서 실패로 처리)
+    """
+    import json
+
+    latest = _latest(DEAJEON_INDEX_DIR, 'deajeon_index')
+    print(f"최신 인덱스 파일: {latest or '없음'}")
+    state_path = os.path.join(DEAJEON_INDEX_DIR, 'index_state.json')
+    if os.path.exists(state_path):
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        print(f"마지막 유효일: {state.get('last_valid_date')}, 인덱스 {state.get('last_index')}, 티커 {len(state.get('tickers', []))}개")
+    if os.path.exists(PIPELINE_STATE_FILE):
+        with open(PIPELINE_STATE_FILE, 'r', encoding='utf-8') as f:
+            stages = json.load(f).get('stages', {})
+        for name, info in stages.items():
+            print(f" - {name}: {info.get('finished_at')} ({info.get('seconds')}초)")
+    metrics_file = _latest(DEAJEON_INDEX_DIR, 'metrics', 'json')
+    if metrics_file:
+        with open(os.path.join(DEAJEON_INDEX_DIR, metrics_file), 'r', encoding='utf-8') as f:
+            runs = json.load(f).get('runs', {})
+        print(f"실행 지표: {metrics_file}")
+        for name, run in runs.items():
+            stages = ', '.join(f"{stage} {info['wall_seconds']:.1f}초" for stage, info in run.get('stages', {}).items())
+            peak = run.get('peak_rss_bytes')
+            print(f" - {name} [{run.get('status')}]: {run.get('wall_seconds', 0):.1f}초"
+                  + (f", 최대 RSS {peak / 1024 / 1024:.0f}MB" if peak else '') + (f" ({stages})" if stages else ''))
+    if args.no_budget:
+        return 0
+
+    total_ms, top, heavy = measure_import_time()
+    print(f"import 시간: {total_ms:.1f}ms (예산 {args.budget_ms:.0f}ms) - 상위: "
+          + ', '.join(f'{module} {ms:.1f}ms' for module, ms in top[:5]))
+    failed = False
+    if heavy:
+        print(f"에러: 시작할 때 무거운 모듈을 불러옵니다: {', '.join(heavy)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"에러: import 시간이 예산을 넘었습니다. ({total_ms:.1f}ms > {args.budget_ms:.0f}ms)")
+        failed = True
+    if not failed:
+        print("✅ import 시간 예산 이내")
+    return 1 if failed else 0
+
+def cmd_run(args):
+    import pipeline
+    return pipeline.main(args.rest)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='deajeon_index 명령줄 도구 (하위 명령 없이 실행하면 run)')
+    sub = parser.add_subparsers(dest='command')
+    for name, help_text in (('run', '01 → 02 → 03 파이프라인 (입력이 바뀐 단계만, --help로 옵션 확인)'),
+                            ('fetch', '구성 종목 데이터 수집 (01_save_data.py)'),
+                            ('index', '인덱스 계산 (02_calculate_index.py, 예: index --incremental)'),
+                            ('viz', '코스닥 비교 그래프 (03_viz.py)'),
+                            ('regions', '지역 인덱스 (universe.py, 예: regions list)'),
+                            ('bench', '합성 데이터 단계별 성능 측정 (benchmark.py, 예: bench --tickers 53 500)')):
+        sub.add_parser(name, help=help_text, add_help=False)
+    check = sub.add_parser('check', help='결과 상태와 import 시간 예산 확인')
+    check.add_argument('--budget-ms', type=float, default=IMPORT_BUDGET_MS)
+    check.add_argument('--no-budget', action='store_true', help='상태만 보여주고 import 시간은 재지 않습니다.')
+    args, rest = parser.parse_known_args(argv)
+    if rest and args.command not in PASSTHROUGH_COMMANDS:
+        parser.error(f"알 수 없는 인자입니다: {' '.join(rest)}")
+    args.rest = rest
+
+    commands = {
+        'run': cmd_run, 'check': cmd_check,
+        'fetch': lambda args: _run_script('01_save_data.py', args.rest),
+        'index': lambda args: _run_script('02_calculate_index.py', args.rest),
+        'viz': lambda args: _run_script('03_viz.py', args.rest),
+        'regions': lambda args: _run_script('universe.py', args.rest),
+        'bench': lambda args: _run_script('benchmark.py', args.rest),
+    }
+    if args.command is None:
+        args.command = 'run'
+    return commands[args.command](args) or 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,51 +1,104 @@
 import os
 import time
 from datetime import datetime, timedelta
-from tqdm import tqdm
-from pykrx import stock
-from pykrx import bond
-
-from ticker import tickers
-
-OHLCV_DIR = './data/ohlcv'
-MARCAP_DIR = './data/marcap'
-os.makedirs(OHLCV_DIR, exist_ok=True)
-os.makedirs(MARCAP_DIR, exist_ok=True)
-
-today = datetime.now()
-today_yyyymmdd = today.strftime("%Y%m%d")
-two_years_ago = today.replace(year=today.year - 2)
-two_years_later_yyyymmdd = two_years_ago.strftime("%Y%m%d")
-two_years_later_yyyymmdd = "20200101"
-
-print(f"오늘 날짜 (yyyymmdd): {today_yyyymmdd}")
-print(f"2년전 날짜 (yyyymmdd): {two_years_later_yyyymmdd}")
-
-
-for ticker in tqdm(tickers):
-    # get ticker name
-    company_name = stock.get_market_ticker_name(ticker)
-
-    # get OHLCV
-    ohlcv_filename = f"ohlcv_{ticker}_{company_name}_{today_yyyymmdd}.csv"
-    ohlcv_filepath = os.path.join(OHLCV_DIR, ohlcv_filename)
-    df_ohlcv = stock.get_market_ohlcv(two_years_later_yyyymmdd, today_yyyymmdd, ticker)
-    # save OHLCV
-    if not os.path.exists(ohlcv_filepath):
-        df_ohlcv.to_csv(ohlcv_filepath, mode='w')
-    else:
-        df_ohlcv.to_csv(ohlcv_filepath, mode='a', header=False)
 
-    time.sleep(1)
+import fetcher
+import metrics
+import store
+from fetch_scheduler import FetchScheduler, RateLimitedSource, TokenBucket
+from krx_cache import CachedSource
+from universe import load_registry, union_tickers
+
+# --- 설정 변수 ---
+MAX_WORKERS = 4             # 동시에 실행할 수집 작업자 수
+REQUESTS_PER_SECOND = 2.0   # 전체 pykrx 호출 속도 제한 (초당)
+MAX_RETRIES = 3             # 실패 시 재시도 횟수 (지수 백오프)
+FETCH_STRATEGY = 'auto'     # 'ticker': 티커별 기간 조회, 'date': 거래일별 전 종목 스냅샷, 'auto': 요청 수가 적은 쪽
+USE_CACHE = True            # pykrx 응답 디스크 캐시 사용 (krx_cache.CACHE_DIR)
+
+
+def save_data(source, tickers, start_yyyymmdd, now):
+    """
+    티커·데이터셋별 누락 구간을 작업자 풀에서 동시에 받아 저장소에 기록합니다.
+    - source: pykrx.stock 또는 같은 함수를 가진 객체 (예: fake_krx.FakeStock)
+    - 모든 호출은 전역 토큰 버킷(REQUESTS_PER_SECOND)을 거칩니다.
+    - USE_CACHE이면 캐시에 있는 응답은 토큰 버킷을 거치지 않고 바로 돌려줍니다.
+    - 실제 pykrx 호출의 횟수·지연 시간(대기 제외)과 속도 제한 대기는 실행 지표(metrics)에 기록합니다.
+    """
+    bucket = TokenBucket(rate=REQUESTS_PER_SECOND)
+    limited = RateLimitedSource(metrics.InstrumentedSource(source), bucket)
+    if USE_CACHE:
+        limited = CachedSource(limited, now=now)
+
+    with metrics.stage('metadata'):
+        # 종목명은 저장소에 없는 티커만 조회
+        names = store.load_names()
+        for ticker in tickers:
+            if ticker not in names:
+                store.save_names({ticker: limited.get_market_ticker_name(ticker)})
+
+        # 시장 구분(KOSPI/KOSDAQ)은 모르는 티커가 있을 때만 시장별로 한 번씩 조회
+        markets = store.load_markets()
+        if any(ticker not in markets for ticker in tickers):
+            store.save_markets(fetcher.fetch_markets(limited, fetcher.closed_until(now), tickers))
 
-    # get MARCAP
-    marcap_filename = f'marcap_{ticker}_{company_name}_{today_yyyymmdd}.csv'
-    marcap_filepath = os.path.join(MARCAP_DIR, marcap_filename)
-    df_marcap = stock.get_market_cap(two_years_later_yyyymmdd, today_yyyymmdd, ticker)
-    # save MARCAP
-    if not os.path.exists(marcap_filepath):
-        df_marcap.to_csv(marcap_filepath, mode='w')
+    # 저장소에 없는 거래일만 요청 (티커별 기간 조회 또는 거래일별 스냅샷 중 요청 수가 적은 쪽)
+    with metrics.stage('plan') as info:
+        plan = fetcher.plan_requests(tickers, start_yyyymmdd, now, now=now, strategy=FETCH_STRATEGY)
+        info['strategy'] = plan['strategy']
+    requests = plan['requests']
+    print(f"수집 방식: {plan['strategy']} (예상 요청 수 - 티커별: {plan['ticker_cost']}, 거래일별: {plan['date_cost']})")
+
+    groups = {}
+    if plan['strategy'] == 'ticker':
+        # 같은 티커의 요청은 한 작업자가 순서대로 처리 (같은 파티션 동시 쓰기 방지, 조회 완료 기록은 티커마다 한 번)
+        groups = fetcher.ticker_groups(limited, requests, now=now)
     else:
-        df_marcap.to_csv(marcap_filepath, mode='a', header=False)
+        for date in requests:
+            groups[date.strftime('%Y%m%d')] = [lambda d=date: (d, fetcher.fetch_snapshot(limited, d, tickers))]
+
+    scheduler = FetchScheduler(max_workers=MAX_WORKERS, max_retries=MAX_RETRIES)
+    with metrics.stage('fetch') as info:
+        results, errors = scheduler.run(groups)
+        failed_tasks = sum(len(failures) for failures in errors.values())
+        info.update(requests=len(requests), failed_groups=len(errors), failed_tasks=failed_tasks)
+    with metrics.stage('store'):
+        if plan['strategy'] == 'ticker':
+            added = sum(sum(counts) for counts in results.values())
+        else:
+            # 스냅샷은 티커 단위로 모아 한 번씩 기록
+            snapshots = dict(result[0] for result in results.values())
+            added = fetcher.store_snapshots(snapshots, tickers, now=now)
+    metrics.set_value('rows_added', int(added))
+    metrics.set_value('rate_limit_wait_seconds', round(bucket.total_wait, 3))
+    metrics.set_value('rate_limit_waits', bucket.waits)
+    print(f"수집 완료: {added}개 날짜 추가, 실패 작업 {failed_tasks}개 ({len(errors)}개 그룹), 속도 제한 대기 {bucket.total_wait:.1f}초")
+    if USE_CACHE:
+        metrics.set_value('cache_hits', limited.hits)
+        metrics.set_value('cache_misses', limited.misses)
+        print(limited.summary())
+    return results, errors
+
+if __name__ == '__main__':
+    from pykrx import stock
+
+    today = datetime.now()
+    today_yyyymmdd = today.strftime("%Y%m%d")
+    two_years_ago = today.replace(year=today.year - 2)
+    two_years_later_yyyymmdd = two_years_ago.strftime("%Y%m%d")
+    two_years_later_yyyymmdd = "20200101"
+
+    print(f"오늘 날짜 (yyyymmdd): {today_yyyymmdd}")
+    print(f"2년전 날짜 (yyyymmdd): {two_years_later_yyyymmdd}")
+
+    # 모든 지역 바스켓 종목의 합집합을 한 번만 수집합니다. (universe.py)
+    tickers = union_tickers(load_registry())
+    print(f"수집 대상: {len(tickers)}종목 (모든 지역 합집합)")
 
-    time.sleep(1)
\ No newline at end of file
+    metrics.start_run('fetch')
+    status = 'error'
+    try:
+        save_data(stock, tickers, two_years_later_yyyymmdd, today)
+        status = 'ok'
+    finally:
+        metrics.finish_run(status)
@@ -1,7 +1,22 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
-import matplotlib.font_manager as fm
-from datetime import datetime, timedelta
+
+import metrics
+import trading_calendar
+from analytics import latest_index_csv, latest_kosdaq_csv
+from fonts import setup_korean_font
+
+# --- 설정 변수 ---
+RENDER_WORKERS = min(4, os.cpu_count() or 1)  # 그래프를 동시에 그릴 프로세스 수 (1이면 순서대로)
+DOWNSAMPLE_POINTS = None    # 시계열당 최대 점 개수 (LTTB 다운샘플링, None이면 원본 그대로)
+DPI = 300
 
 def read_korean_csv(file_path):
     """
@@ -19,19 +34,77 @@ def read_korean_csv(file_path):
     print(f"❌ '{file_path}' 파일 읽기에 실패했습니다. 경로를 확인해주세요.")
     return None
 
-def visualize_normalized(deajeon_df, kosdaq_df, start_date, end_date, output_path):
+def lttb(x, y, n_out):
     """
-    그래프 1: 두 지수를 정규화하여 상대적 성과를 비교하는 그래프를 생성합니다.
+    Largest-Triangle-Three-Buckets 다운샘플링으로 남길 점의 위치(index 배열)를 반환합니다.
+    - 첫 점과 마지막 점은 항상 남기고, 나머지 구간을 n_out - 2개 버킷으로 나눠
+      이전에 고른 점·다음 버킷 평균과 만드는 삼각형 넓이가 가장 큰 점을 버킷마다 하나씩 고릅니다.
+    - 급등락 같은 모양은 유지하면서 점 개수를 n_out 이하로 줄입니다.
+    """
+    n = len(y)
+    if n_out is None or n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean() if next_end > next_start else x[-1]
+        avg_y = y[next_start:next_end].mean() if next_end > next_start else y[-1]
+        area = np.abs((x[prev] - avg_x) * (y[start:end] - y[prev]) - (x[prev] - x[start:end]) * (avg_y - y[prev]))
+        prev = start + int(area.argmax())
+        selected[i + 1] = prev
+    return selected
+
+def _series(dates, values, downsample):
+    """(날짜 배열, 값 배열) 한 쌍을 필요하면 LTTB로 줄여 반환합니다."""
+    dates = np.asarray(dates, dtype='datetime64[ns]')
+    values = np.asarray(values, dtype=float)
+    keep = lttb(dates.astype(np.int64), values, downsample)
+    return dates[keep], values[keep]
+
+def build_plot_arrays(deajeon_df, kosdaq_df, downsample=None):
     """
-    deajeon_base = deajeon_df.iloc[0]['deajeon_index']
-    deajeon_df['정규화_인덱스'] = (deajeon_df['deajeon_index'] / deajeon_base) * 100
+    네 그래프가 함께 쓰는 시계열 배열을 한 번에 만듭니다. (그래프마다 DataFrame을 복사하지 않음)
+    - 정규화 값·억 원 단위 변환·이중 축 범위는 다운샘플링 전 원본 데이터로 계산합니다.
+    - 반환값: {'series': {이름: (날짜, 값)}, 'limits': {이름: (최소, 최대)}}
+    """
+    d_dates, d_index, d_cap = deajeon_df['날짜'], deajeon_df['deajeon_index'].to_numpy(float), deajeon_df['시가총액'].to_numpy(float)
+    k_dates, k_close, k_cap = kosdaq_df['날짜'], kosdaq_df['종가'].to_numpy(float), kosdaq_df['상장시가총액'].to_numpy(float)
+
+    def aligned_limits(values):
+        # 시작점을 가운데에 두고 최대 변동폭의 1.1배만큼 위아래 범위를 잡습니다.
+        max_dev = np.abs(values - values[0]).max() * 1.1
+        return values[0] - max_dev, values[0] + max_dev
 
-    kosdaq_base = kosdaq_df.iloc[0]['종가']
-    kosdaq_df['정규화_인덱스'] = (kosdaq_df['종가'] / kosdaq_base) * 100
+    return {
+        'series': {
+            'deajeon_index': _series(d_dates, d_index, downsample),
+            'deajeon_norm': _series(d_dates, d_index / d_index[0] * 100, downsample),
+            'deajeon_cap': _series(d_dates, d_cap / 100000000, downsample),
+            'kosdaq_close': _series(k_dates, k_close, downsample),
+            'kosdaq_norm': _series(k_dates, k_close / k_close[0] * 100, downsample),
+            'kosdaq_cap': _series(k_dates, k_cap / 100000000, downsample),
+        },
+        'limits': {
+            'deajeon_index': aligned_limits(d_index),
+            'kosdaq_close': aligned_limits(k_close),
+        },
+    }
+
+def visualize_normalized(arrays, start_date, end_date, output_path):
+    """
+    그래프 1: 두 지수를 정규화하여 상대적 성과를 비교하는 그래프를 생성합니다.
+    """
+    series = arrays['series']
 
     plt.figure(figsize=(15, 8))
-    plt.plot(deajeon_df['날짜'], deajeon_df['정규화_인덱스'], label='대전 인덱스 (정규화)', color='royalblue', linewidth=2)
-    plt.plot(kosdaq_df['날짜'], kosdaq_df['정규화_인덱스'], label='코스닥 지수 (정규화)', color='crimson', linewidth=2, alpha=0.8)
+    plt.plot(*series['deajeon_norm'], label='대전 인덱스 (정규화)', color='royalblue', linewidth=2)
+    plt.plot(*series['kosdaq_norm'], label='코스닥 지수 (정규화)', color='crimson', linewidth=2, alpha=0.8)
 
     plt.xlabel('날짜', fontsize=12)
     plt.ylabel(f"지수 (기준일: {start_date.strftime('%Y-%m-%d')} = 100)", fontsize=12)
@@ -42,33 +115,29 @@ def visualize_normalized(deajeon_df, kosdaq_df, start_date, end_date, output_pat
     plt.gcf().autofmt_xdate()
     
     plt.tight_layout()
-    plt.savefig(output_path, dpi=300)
+    plt.savefig(output_path, dpi=DPI)
     print(f"✅ [그래프 1] 정규화 비교 그래프가 '{output_path}'에 저장되었습니다.")
     plt.close()
 
-def visualize_dual_axis_aligned(deajeon_df, kosdaq_df, start_date, end_date, output_path):
+def visualize_dual_axis_aligned(arrays, start_date, end_date, output_path):
     """
     그래프 2: 이중 축의 시작점을 시각적으로 정렬하여 각 지수의 변화 추이를 비교합니다.
     """
+    series, limits = arrays['series'], arrays['limits']
     fig, ax1 = plt.subplots(figsize=(15, 8))
     
-    ax1.plot(deajeon_df['날짜'], deajeon_df['deajeon_index'], label='대전 인덱스', color='royalblue')
+    ax1.plot(*series['deajeon_index'], label='대전 인덱스', color='royalblue')
     ax1.set_xlabel('날짜', fontsize=12)
     ax1.set_ylabel('대전 인덱스', color='royalblue', fontsize=12)
     ax1.tick_params(axis='y', labelcolor='royalblue')
     
     ax2 = ax1.twinx()
-    ax2.plot(kosdaq_df['날짜'], kosdaq_df['종가'], label='코스닥 지수', color='crimson', alpha=0.8)
+    ax2.plot(*series['kosdaq_close'], label='코스닥 지수', color='crimson', alpha=0.8)
     ax2.set_ylabel('코스닥 지수', color='crimson', fontsize=12)
     ax2.tick_params(axis='y', labelcolor='crimson')
 
-    deajeon_initial = deajeon_df.iloc[0]['deajeon_index']
-    deajeon_max_dev = max(abs(deajeon_df['deajeon_index'] - deajeon_initial)) * 1.1
-    ax1.set_ylim(deajeon_initial - deajeon_max_dev, deajeon_initial + deajeon_max_dev)
-
-    kosdaq_initial = kosdaq_df.iloc[0]['종가']
-    kosdaq_max_dev = max(abs(kosdaq_df['종가'] - kosdaq_initial)) * 1.1
-    ax2.set_ylim(kosdaq_initial - kosdaq_max_dev, kosdaq_initial + kosdaq_max_dev)
+    ax1.set_ylim(*limits['deajeon_index'])
+    ax2.set_ylim(*limits['kosdaq_close'])
 
     plt.title('대전 인덱스 vs 코스닥 지수 추이 (이중 축, 시작점 정렬)', fontsize=18)
     fig.legend(loc='upper center', bbox_to_anchor=(0.5, 0.95), ncol=2, fontsize=11)
@@ -76,18 +145,19 @@ def visualize_dual_axis_aligned(deajeon_df, kosdaq_df, start_date, end_date, out
     fig.autofmt_xdate()
     
     plt.tight_layout(rect=[0, 0, 1, 0.9])
-    plt.savefig(output_path, dpi=300)
+    plt.savefig(output_path, dpi=DPI)
     print(f"✅ [그래프 2] 이중 축(시작점 정렬) 비교 그래프가 '{output_path}'에 저장되었습니다.")
     plt.close()
 
-def visualize_raw_single_axis(deajeon_df, kosdaq_df, start_date, end_date, output_path):
+def visualize_raw_single_axis(arrays, start_date, end_date, output_path):
     """
     그래프 3: 정규화 없이 단일 축에 두 지수를 그려 절대적인 규모 차이를 보여줍니다.
     """
+    series = arrays['series']
     plt.figure(figsize=(15, 8))
     
-    plt.plot(deajeon_df['날짜'], deajeon_df['deajeon_index'], label='대전 인덱스', color='royalblue', linewidth=2)
-    plt.plot(kosdaq_df['날짜'], kosdaq_df['종가'], label='코스닥 지수', color='crimson', linewidth=2, alpha=0.8)
+    plt.plot(*series['deajeon_index'], label='대전 인덱스', color='royalblue', linewidth=2)
+    plt.plot(*series['kosdaq_close'], label='코스닥 지수', color='crimson', linewidth=2, alpha=0.8)
 
     plt.xlabel('날짜', fontsize=12)
     plt.ylabel("지수 (원본 값)", fontsize=12)
@@ -98,23 +168,20 @@ def visualize_raw_single_axis(deajeon_df, kosdaq_df, start_date, end_date, outpu
     plt.gcf().autofmt_xdate()
     
     plt.tight_layout()
-    plt.savefig(output_path, dpi=300)
+    plt.savefig(output_path, dpi=DPI)
     print(f"✅ [그래프 3] 단일 축(원본 값) 비교 그래프가 '{output_path}'에 저장되었습니다.")
     plt.close()
 
-def visualize_market_cap(deajeon_df, kosdaq_df, start_date, end_date, output_path):
+def visualize_market_cap(arrays, start_date, end_date, output_path):
     """
     그래프 4: 두 주체의 시가총액을 '억 원' 단위로 비교하는 그래프를 생성합니다. (신규 추가)
+    - 억 원 단위 변환은 build_plot_arrays에서 미리 해 둡니다.
     """
-    # --- 데이터 단위 변환 (원 -> 억 원) ---
-    deajeon_df['시가총액_억원'] = deajeon_df['시가총액'] / 100000000
-    kosdaq_df['상장시가총액_억원'] = kosdaq_df['상장시가총액'] / 100000000
-    
-    # --- 시각화 ---
+    series = arrays['series']
     plt.figure(figsize=(15, 8))
     
-    plt.plot(deajeon_df['날짜'], deajeon_df['시가총액_억원'], label='대전 인덱스 시가총액', color='royalblue', linewidth=2)
-    plt.plot(kosdaq_df['날짜'], kosdaq_df['상장시가총액_억원'], label='코스닥 전체 시가총액', color='green', linewidth=2, alpha=0.8)
+    plt.plot(*series['deajeon_cap'], label='대전 인덱스 시가총액', color='royalblue', linewidth=2)
+    plt.plot(*series['kosdaq_cap'], label='코스닥 전체 시가총액', color='green', linewidth=2, alpha=0.8)
 
     plt.xlabel('날짜', fontsize=12)
     plt.ylabel("시가총액 (억 원)", fontsize=12)
@@ -130,30 +197,40 @@ def visualize_market_cap(deajeon_df, kosdaq_df, start_date, end_date, output_pat
     plt.gcf().autofmt_xdate()
     
     plt.tight_layout()
-    plt.savefig(output_path, dpi=300)
+    plt.savefig(output_path, dpi=DPI)
     print(f"✅ [그래프 4] 시가총액 비교 그래프가 '{output_path}'에 저장되었습니다.")
     plt.close()
 
+def _render(job):
+    visualize, arrays, start_date, end_date, output_path = job
+    visualize(arrays, start_date, end_date, output_path)
+    return output_path
+
+def render_all(arrays, start_date, end_date, outputs, workers=RENDER_WORKERS):
+    """
+    outputs: [(visualize_* 함수, 저장 경로), ...]
+    - 그래프는 서로 독립적이므로 프로세스 풀에서 동시에 그립니다. (workers <= 1이면 순서대로)
+    - 저장된 경로 목록을 outputs 순서대로 반환합니다.
+    """
+    jobs = [(visualize, arrays, start_date, end_date, output_path) for visualize, output_path in outputs]
+    if workers <= 1 or len(jobs) <= 1:
+        setup_korean_font()
+        return [_render(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=setup_korean_font) as executor:
+        return list(executor.map(_render, jobs))
 
-if __name__ == '__main__':
-    # --- 한글 폰트 설정 ---
-    try:
-        font_name = fm.FontProperties(fname="c:/Windows/Fonts/malgun.ttf").get_name()
-        plt.rc('font', family=font_name)
-    except FileNotFoundError:
-        try:
-            plt.rc('font', family='AppleGothic')
-        except:
-            print("경고: 한글 폰트를 찾을 수 없습니다.")
-    plt.rcParams['axes.unicode_minus'] = False
 
-    # --- 데이터 경로 설정 ---
-    kosdaq_filepath = r'data\kosdaq\data_3607_20250620.csv'
-    deajeon_index_filepath = r'data\deajeon_index\deajeon_index_20250620.csv'
+def main():
+    # --- 데이터 경로 설정 (파일명 날짜가 가장 최근인 파일) ---
+    kosdaq_filepath = latest_kosdaq_csv()
+    deajeon_index_filepath = latest_index_csv()
+    print(f"코스닥 지수: {kosdaq_filepath}, deajeon_index: {deajeon_index_filepath}")
 
     # --- 데이터 로드 ---
-    df_kosdaq = read_korean_csv(kosdaq_filepath)
-    df_deajeon_index = read_korean_csv(deajeon_index_filepath)
+    with metrics.stage('load') as info:
+        df_kosdaq = read_korean_csv(kosdaq_filepath) if kosdaq_filepath else None
+        df_deajeon_index = read_korean_csv(deajeon_index_filepath) if deajeon_index_filepath else None
+        info['rows'] = sum(len(df) for df in (df_kosdaq, df_deajeon_index) if df is not None)
 
     if df_kosdaq is not None and df_deajeon_index is not None:
         # --- 데이터 전처리 ---
@@ -163,6 +240,8 @@ if __name__ == '__main__':
         deajeon_df_processed = df_deajeon_index.copy()
         deajeon_df_processed['날짜'] = pd.to_datetime(deajeon_df_processed['날짜'])
         deajeon_df_processed = deajeon_df_processed[(deajeon_df_processed['날짜'] >= start_date) & (deajeon_df_processed['날짜'] <= end_date)].sort_values('날짜').dropna(subset=['deajeon_index', '시가총액'])
+        # 주말·휴장일에 이전 값으로 채워진 행은 빼고 거래일만 그립니다. (코스닥 지수와 같은 x축)
+        deajeon_df_processed = deajeon_df_processed[trading_calendar.is_trading_day(deajeon_df_processed['날짜'])]
         
         if '일자' in df_kosdaq.columns:
              df_kosdaq.rename(columns={'일자': '날짜'}, inplace=True)
@@ -176,19 +255,23 @@ if __name__ == '__main__':
         else:
             # --- 시각화 함수 호출 ---
             today_str = datetime.now().strftime("%Y%m%d")
-            
-            # 그래프 1
-            output_normalized = f'./comparison_normalized_{today_str}.png'
-            visualize_normalized(deajeon_df_processed.copy(), kosdaq_df_processed.copy(), start_date, end_date, output_normalized)
+            arrays = build_plot_arrays(deajeon_df_processed, kosdaq_df_processed, downsample=DOWNSAMPLE_POINTS)
 
-            # 그래프 2
-            output_dual_axis = f'./comparison_dual_axis_aligned_{today_str}.png'
-            visualize_dual_axis_aligned(deajeon_df_processed.copy(), kosdaq_df_processed.copy(), start_date, end_date, output_dual_axis)
+            with metrics.stage('render') as info:
+                paths = render_all(arrays, start_date, end_date, [
+                    (visualize_normalized, f'./comparison_normalized_{today_str}.png'),                 # 그래프 1
+                    (visualize_dual_axis_aligned, f'./comparison_dual_axis_aligned_{today_str}.png'),   # 그래프 2
+                    (visualize_raw_single_axis, f'./comparison_raw_single_axis_{today_str}.png'),       # 그래프 3
+                    (visualize_market_cap, f'./comparison_market_cap_{today_str}.png'),                 # 그래프 4
+                ])
+                info['files_written'] = len(paths)
 
-            # 그래프 3
-            output_raw_single_axis = f'./comparison_raw_single_axis_{today_str}.png'
-            visualize_raw_single_axis(deajeon_df_processed.copy(), kosdaq_df_processed.copy(), start_date, end_date, output_raw_single_axis)
-            
-            # 그래프 4
-            output_market_cap = f'./comparison_market_cap_{today_str}.png'
-            visualize_market_cap(deajeon_df_processed.copy(), kosdaq_df_processed.copy(), start_date, end_date, output_market_cap)
\ No newline at end of file
+
+if __name__ == '__main__':
+    metrics.start_run('viz')
+    status = 'error'
+    try:
+        main()
+        status = 'ok'
+    finally:
+        metrics.finish_run(status)
@@ -0,0 +1,186 @@
+import argparse
+import glob
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+import trading_calendar
+
+# --- 설정 변수 ---
+DEAJEON_INDEX_DIR = './data/deajeon_index'
+KOSDAQ_DIR = './data/kosdaq'
+WINDOWS = (20, 60, 120, 250)        # 롤링 창 길이 (거래일)
+TRADING_DAYS_PER_YEAR = 252         # 변동성 연율화 기준
+ENCODINGS = ['utf-8-sig', 'cp949', 'euc-kr', 'utf-8']
+
+
+def _read_csv(path):
+    """인코딩을 차례로 시도해 CSV를 읽습니다. (KRX 내려받기 파일은 cp949)"""
+    for enc in ENCODINGS:
+        try:
+            return pd.read_csv(path, encoding=enc)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"'{path}' 파일의 인코딩을 알 수 없습니다.")
+
+def latest_index_csv(directory=DEAJEON_INDEX_DIR):
+    """파일명 날짜가 가장 최근인 deajeon_index_YYYYMMDD.csv 경로를 반환합니다. (없으면 None)"""
+    paths = [path for path in glob.glob(os.path.join(directory, 'deajeon_index_*.csv'))
+             if re.fullmatch(r'deajeon_index_\d{8}\.csv', os.path.basename(path))]
+    return max(paths, key=os.path.basename) if paths else None
+
+def latest_kosdaq_csv(directory=KOSDAQ_DIR):
+    """
+    코스닥 지수 CSV 중 파일명 날짜가 가장 최근인 경로를 반환합니다. (없으면 None)
+    - kosdaq.py가 저장한 ohlcv_*_YYYYMMDD.csv와 KRX에서 내려받은 data_*_YYYYMMDD.csv를 모두 찾습니다.
+    """
+    paths = [path for path in glob.glob(os.path.join(directory, '*.csv'))
+             if re.search(r'_\d{8}\.csv$', os.path.basename(path))]
+    return max(paths, key=lambda path: (os.path.basename(path)[-12:-4], os.path.basename(path))) if paths else None
+
+def load_deajeon(path):
+    """deajeon_index CSV를 읽어 ('날짜', 'deajeon_index')로 반환합니다."""
+    df = _read_csv(path)
+    df['날짜'] = pd.to_datetime(df['날짜'])
+    return df[['날짜', 'deajeon_index']].dropna()
+
+def load_kosdaq(path):
+    """
+    코스닥 지수 CSV를 읽어 ('날짜', 'kosdaq')로 반환합니다.
+    - KRX 파일의 '일자'(YYYY/MM/DD)와 pykrx 파일의 '날짜' 컬럼을 모두 받습니다.
+    - kosdaq.py는 파일을 통째로 새로 쓰지만, 이전 버전이 같은 행을 한 번 더 이어 쓴 파일이 남아 있을 수 있으므로
+      날짜가 겹치면 마지막 값을 씁니다.
+    """
+    df = _read_csv(path)
+    df = df.rename(columns={'일자': '날짜', 'Unnamed: 0': '날짜'})
+    df['날짜'] = pd.to_datetime(df['날짜'].astype(str).str.replace('/', '-'))
+    df = df[['날짜', '종가']].dropna().rename(columns={'종가': 'kosdaq'})
+    return df.drop_duplicates('날짜', keep='last')
+
+def align(deajeon_df, kosdaq_df):
+    """
+    두 시계열을 거래일 기준으로 맞춥니다.
+    - deajeon_index의 주말·휴장일 행(직전 값 채움)은 빼고, 두 시계열에 모두 있는 거래일만 남깁니다.
+    """
+    deajeon_df = deajeon_df[trading_calendar.is_trading_day(deajeon_df['날짜'])]
+    merged = pd.merge(deajeon_df, kosdaq_df, on='날짜', how='inner')
+    return merged.sort_values('날짜').reset_index(drop=True)
+
+def _window_sums(values, window):
+    """
+    길이 window 창의 합을 누적합 차이로 구합니다. (창 길이와 무관하게 O(n))
+    - 결과의 t번째 값은 values[t - window + 1 .. t]의 합이고, 창이 다 차지 않은 앞부분은 NaN입니다.
+    """
+    out = np.full(len(values), np.nan)
+    if window <= len(values):
+        cum = np.concatenate([[0.0], np.cumsum(values)])
+        out[window - 1:] = cum[window:] - cum[:-window]
+    return out
+
+def rolling_max(values, window):
+    """
+    길이 window 창의 최댓값을 구합니다. (블록별 앞·뒤 누적 최댓값을 쓰는 van Herk/Gil-Werman 방식, O(n))
+    - 결과의 t번째 값은 values[t - window + 1 .. t]의 최댓값이고, 앞부분은 NaN입니다.
+    """
+    n = len(values)
+    out = np.full(n, np.nan)
+    if window > n:
+        return out
+    padded = np.concatenate([values, np.full((-n) % window, -np.inf)]).reshape(-1, window)
+    prefix = np.maximum.accumulate(padded, axis=1).ravel()
+    suffix = np.maximum.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+    # 창 [s, s + window - 1]은 s가 속한 블록의 뒷부분과 다음 블록의 앞부분으로 나뉩니다.
+    out[window - 1:] = np.maximum(suffix[:n - window + 1], prefix[window - 1:n])
+    return out
+
+def compute_analytics(aligned, windows=WINDOWS):
+    """
+    정렬된 두 시계열('날짜', 'deajeon_index', 'kosdaq')로 창 길이별 지표를 한 번에 계산합니다.
+    - 수익률_w: w거래일 누적 수익률 / 변동성_w: 일간 로그수익률 표준편차(연율화)
+    - 베타_w, 상관계수_w: 코스닥 대비 deajeon_index의 일간 로그수익률 기준
+    - 낙폭_w: 최근 w거래일 최고가 대비 하락률 / 낙폭·최대낙폭: 전체 기간 최고가 대비 현재·최대 하락률
+    - 누적합(합, 제곱합, 곱의 합)은 한 번만 구하고, 창마다 차이만 계산합니다.
+    - 창 길이는 2 이상이어야 합니다. (표본 분산의 분모 w - 1)
+    """
+    if any(w < 2 for w in windows):
+        raise ValueError(f"롤링 창 길이는 2 이상이어야 합니다: {list(windows)}")
+    prices = {'deajeon': aligned['deajeon_index'].to_numpy(dtype=float), 'kosdaq': aligned['kosdaq'].to_numpy(dtype=float)}
+    result = {'날짜': aligned['날짜'].to_numpy(), 'deajeon_index': prices['deajeon'], 'kosdaq': prices['kosdaq']}
+
+    # 일간 로그수익률 (첫날 없음). 제곱합의 자릿수 손실을 줄이도록 전체 평균을 빼고 누적합을 구합니다.
+    returns = {name: np.diff(np.log(values)) for name, values in prices.items()}
+    centered = {name: r - r.mean() if len(r) else r for name, r in returns.items()}
+    x, y = centered['deajeon'], centered['kosdaq']
+    products = {'xx': x * x, 'yy': y * y, 'xy': x * y, 'x': x, 'y': y}
+
+    for name, values in prices.items():
+        peak = np.maximum.accumulate(values)
+        result[f'{name}_낙폭'] = values / peak - 1
+        result[f'{name}_최대낙폭'] = np.minimum.accumulate(result[f'{name}_낙폭'])
+
+    pad = lambda values: np.concatenate([[np.nan], values])
+    for w in windows:
+        sums = {key: pad(_window_sums(values, w)) for key, values in products.items()}
+        var_x = np.maximum(sums['xx'] - sums['x'] ** 2 / w, 0) / (w - 1)
+        var_y = np.maximum(sums['yy'] - sums['y'] ** 2 / w, 0) / (w - 1)
+        cov = (sums['xy'] - sums['x'] * sums['y'] / w) / (w - 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result[f'베타_{w}'] = cov / var_y
+            result[f'상관계수_{w}'] = cov / np.sqrt(var_x * var_y)
+        for name, variance in (('deajeon', var_x), ('kosdaq', var_y)):
+            values = prices[name]
+            change = np.full(len(values), np.nan)
+            change[w:] = values[w:] / values[:-w] - 1
+            result[f'{name}_수익률_{w}'] = change
+            result[f'{name}_변동성_{w}'] = np.sqrt(variance * TRADING_DAYS_PER_YEAR)
+            result[f'{name}_낙폭_{w}'] = values / rolling_max(values, w) - 1
+    return pd.DataFrame(result)
+
+def run(index_path=None, kosdaq_path=None, windows=WINDOWS):
+    """
+    최신 deajeon_index·코스닥 CSV로 지표를 계산해 인덱스 CSV와 같은 폴더에 analytics_YYYYMMDD.csv로 저장합니다.
+    - 반환값: 결과 DataFrame (입력이 없으면 None)
+    """
+    index_path = index_path or latest_index_csv()
+    kosdaq_path = kosdaq_path or latest_kosdaq_csv()
+    if index_path is None or kosdaq_path is None:
+        print("에러: deajeon_index 또는 코스닥 지수 CSV를 찾을 수 없습니다. (02_calculate_index.py, kosdaq.py 실행 필요)")
+        return None
+
+    aligned = align(load_deajeon(index_path), load_kosdaq(kosdaq_path))
+    if len(aligned) < 2:
+        print("에러: 두 시계열이 겹치는 거래일이 부족합니다.")
+        return None
+    analytics = compute_analytics(aligned, windows)
+
+    date_str = re.search(r'(\d{8})\.csv$', os.path.basename(index_path)).group(1)
+    output_path = os.path.join(os.path.dirname(index_path), f'analytics_{date_str}.csv')
+    analytics.to_csv(output_path, index=False, encoding='utf-8-sig')
+
+    last = analytics.iloc[-1]
+    print(f"분석 완료: {aligned['날짜'].iloc[0]:%Y-%m-%d} ~ {aligned['날짜'].iloc[-1]:%Y-%m-%d} ({len(aligned)}거래일)")
+    for w in windows:
+        print(f" - {w}일: 수익률 {last[f'deajeon_수익률_{w}']:.2%} (코스닥 {last[f'kosdaq_수익률_{w}']:.2%}), "
+              f"변동성 {last[f'deajeon_변동성_{w}']:.2%}, 베타 {last[f'베타_{w}']:.2f}, 상관계수 {last[f'상관계수_{w}']:.2f}")
+    print(f" - 최대낙폭: {last['deajeon_최대낙폭']:.2%} (코스닥 {last['kosdaq_최대낙폭']:.2%})")
+    print(f"결과 파일: '{output_path}'")
+    return analytics
+
+
+def _window(value):
+    """--windows 인자: 2 이상의 정수"""
+    w = int(value)
+    if w < 2:
+        raise argparse.ArgumentTypeError(f"롤링 창 길이는 2 이상이어야 합니다: {value}")
+    return w
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='deajeon_index와 코스닥 지수의 롤링 지표 계산')
+    parser.add_argument('--index', help='deajeon_index CSV 경로 (생략하면 최신 파일)')
+    parser.add_argument('--kosdaq', help='코스닥 지수 CSV 경로 (생략하면 최신 파일)')
+    parser.add_argument('--windows', type=_window, nargs='+', default=list(WINDOWS), help='롤링 창 길이 (거래일)')
+    args = parser.parse_args()
+    run(args.index, args.kosdaq, args.windows)
@@ -0,0 +1,327 @@
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import fetcher
+import index_engine
+import loader
+import trading_calendar
+from fake_krx import FakeStock
+from fetch_scheduler import FetchScheduler
+
+# --- 설정 변수 ---
+BENCH_DIR = './data/bench'                  # 합성 데이터와 결과를 둘 폴더 (데이터는 실행마다 새로 만듭니다)
+RESULTS_DIR = './data/bench/results'        # JSON 결과 파일 폴더
+END_DATE = '2025-06-20'                     # 합성 데이터 마지막 날 (결과가 실행 날짜와 무관하도록 고정)
+LOOP_ENGINE_MAX_CELLS = 200_000             # 날짜 × 티커가 이 이하일 때만 기존 반복 엔진도 잽니다. (느림)
+FETCH_WORKERS = 4
+STAGES = ('generate', 'fetch', 'load_store', 'load_csv', 'compute_vectorized', 'compute_loop', 'render')
+
+
+class SyntheticMarket:
+    """
+    결정적(seed 고정) 합성 시장 데이터입니다.
+    - 티커 i의 시계열은 (seed, i)로만 정해지므로, 티커 수를 바꿔도 같은 티커는 같은 값입니다.
+    - 가격은 로그정규 랜덤워크, 상장주식수는 가끔 유상증자로 늘어나고, 일부 티커는 기간 중에 상장합니다.
+    - gap_rate: 상장 후 (티커, 날짜) 행이 빠지는 비율 (거래정지·누락)
+    - holiday_density: 평일 중 합성 공휴일(전 종목 데이터 없음) 비율
+    - calendar: 주말과 합성 공휴일로 만든 거래일 달력. 실제 공휴일(holidayskr)은 내려받아야 하므로 쓰지 않고,
+      run_scenario가 실행 중에 trading_calendar의 달력으로 바꿔 끼웁니다. (오프라인)
+    """
+
+    def __init__(self, n_tickers=53, years=2, gap_rate=0.01, holiday_density=0.01, seed=0, end_date=END_DATE):
+        self.n_tickers, self.years, self.gap_rate, self.holiday_density, self.seed = n_tickers, years, gap_rate, holiday_density, seed
+        self.end_date = pd.Timestamp(end_date)
+        self.start_date = self.end_date - pd.DateOffset(years=years)
+        self.calendar = self._calendar()
+        self.days = self.calendar.trading_days(self.start_date, self.end_date)
+        self.tickers = [f'{i:06d}' for i in range(1, n_tickers + 1)]
+        self._index = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+    def _calendar(self):
+        """시작 연도 1월 1일부터 하루씩 난수를 뽑아 합성 공휴일을 정합니다. (달력 끝 연도와 무관하게 같은 날은 같은 결과)"""
+        # 빈 날짜 배열 조회는 올해 달력을 찾으므로 올해까지 포함합니다.
+        first_year, last_year = self.start_date.year, max(self.end_date.year, pd.Timestamp.now().year)
+        days = pd.date_range(f'{first_year}-01-01', f'{last_year}-12-31')
+        flags = np.where(days.dayofweek >= 5, trading_calendar.WEEKEND, 0).astype(np.uint8)
+        holidays = (flags == 0) & (np.random.default_rng([self.seed, 0]).random(len(days)) < self.holiday_density)
+        flags[holidays] |= trading_calendar.HOLIDAY
+        return trading_calendar.TradingCalendar(first_year, last_year, flags)
+
+    def params(self):
+        return {'n_tickers': self.n_tickers, 'years': self.years, 'gap_rate': self.gap_rate,
+                'holiday_density': self.holiday_density, 'seed': self.seed, 'end_date': f'{self.end_date:%Y-%m-%d}',
+                'trading_days': len(self.days)}
+
+    @lru_cache(maxsize=None)
+    def frames(self, ticker):
+        """티커 하나의 (OHLCV DataFrame, 시가총액 DataFrame)을 pykrx와 같은 형태(인덱스 '날짜')로 만듭니다."""
+        rng = np.random.default_rng([self.seed, 1, self._index[ticker]])
+        n = len(self.days)
+        listed = int(rng.integers(n // 4, n)) if rng.random() < 0.2 else 0
+        close = np.maximum(np.rint(rng.lognormal(np.log(10_000), 1.0) * np.exp(np.cumsum(rng.normal(0.0002, 0.025, n)))), 1)
+        prev = np.concatenate([[close[0]], close[:-1]])
+        open_ = np.maximum(np.rint(prev * (1 + rng.normal(0, 0.005, n))), 1)
+        high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, n)))
+        low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, n)))
+        issuance = np.where(rng.random(n) < 0.002, 1 + rng.uniform(0.01, 0.1, n), 1.0)
+        shares = np.rint(rng.integers(5_000_000, 200_000_000) * np.cumprod(issuance)).astype(np.int64)
+        volume = rng.lognormal(12, 1, n).astype(np.int64)
+        keep = (np.arange(n) >= listed) & (rng.random(n) >= self.gap_rate)
+
+        index = pd.DatetimeIndex(self.days[keep], name='날짜')
+        close, shares, volume = close[keep].astype(np.int64), shares[keep], volume[keep]
+        ohlcv = pd.DataFrame({
+            '시가': open_[keep].astype(np.int64), '고가': np.rint(high[keep]).astype(np.int64),
+            '저가': np.maximum(np.rint(low[keep]), 1).astype(np.int64), '종가': close, '거래량': volume,
+            '등락률': np.round((close / prev[keep] - 1) * 100, 2),
+        }, index=index)
+        marcap = pd.DataFrame({'시가총액': close * shares, '거래량': volume, '거래대금': close * volume, '상장주식수': shares},
+                              index=index)
+        return ohlcv, marcap
+
+    def write_csv_tree(self, root):
+        """기존 01_save_data.py 형식의 per-ticker CSV(ohlcv_/marcap_{ticker}_{name}_{YYYYMMDD}.csv)를 씁니다."""
+        date_str = f'{self.end_date:%Y%m%d}'
+        for dataset in ('ohlcv', 'marcap'):
+            os.makedirs(os.path.join(root, dataset), exist_ok=True)
+        for ticker in self.tickers:
+            ohlcv, marcap = self.frames(ticker)
+            ohlcv.to_csv(os.path.join(root, 'ohlcv', f'ohlcv_{ticker}_SYN{ticker}_{date_str}.csv'))
+            marcap.to_csv(os.path.join(root, 'marcap', f'marcap_{ticker}_SYN{ticker}_{date_str}.csv'))
+
+    def kosdaq(self, all_stock_data):
+        """렌더링용 가짜 코스닥 지수: 전체 합성 종목의 시가총액 합으로 만든 '종가'·'상장시가총액'"""
+        caps = all_stock_data.groupby('날짜', observed=True)['시가총액'].sum()
+        return pd.DataFrame({'날짜': caps.index, '종가': caps.to_numpy() / caps.iloc[0] * 800, '상장시가총액': caps.to_numpy()})
+
+
+class SyntheticStock(FakeStock):
+    """합성 시장 데이터를 pykrx 응답 형태로 돌려주는 오프라인 소스입니다. (지연·오류 없음)"""
+
+    def __init__(self, market):
+        super().__init__(market_tickers=market.tickers)
+        self.market = market
+
+    def _slice(self, frame, fromdate, todate):
+        return frame.loc[pd.Timestamp(fromdate):pd.Timestamp(todate)]
+
+    def _ohlcv_frame(self, fromdate, todate, ticker):
+        return self._slice(self.market.frames(ticker)[0], fromdate, todate)
+
+    def _cap_frame(self, fromdate, todate, ticker):
+        return self._slice(self.market.frames(ticker)[1], fromdate, todate)
+
+    @lru_cache(maxsize=None)
+    def _by_date(self, kind):
+        """전 종목 스냅샷용으로 {날짜: 티커 인덱스 DataFrame}을 한 번만 만듭니다. (날짜마다 티커를 훑지 않도록)"""
+        frames = {ticker: self.market.frames(ticker)[kind] for ticker in self.market.tickers}
+        panel = pd.concat(frames, names=['티커', '날짜'])
+        return {date: group.droplevel('날짜') for date, group in panel.groupby(level='날짜')}
+
+    def _snapshot(self, date, columns_fn):
+        kind = 0 if columns_fn == self._ohlcv_frame else 1
+        empty = self.market.frames(self.market.tickers[0])[kind].iloc[:0].rename_axis('티커')
+        return self._by_date(kind).get(pd.Timestamp(date), empty)
+
+
+def _quiet(fn):
+    """fn()을 출력(진행 표시줄 포함) 없이 실행합니다."""
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+        return fn()
+
+def _measure(fn, memory):
+    """fn()을 실행해 (결과, 걸린 초, 최대 메모리 바이트 또는 None)을 반환합니다. (출력은 버림)"""
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+        started = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - started
+        peak = None
+        if memory:
+            # 시간 측정과 따로 한 번 더 실행합니다. (tracemalloc은 실행을 느리게 합니다)
+            _, peak = loader.measure_peak_memory(fn)
+    return result, seconds, peak
+
+def _fetch(market, store_dir):
+    """합성 소스로 01_save_data.py와 같은 계획·동시 수집을 빈 저장소에 실행합니다. 반환값: 요청 수"""
+    shutil.rmtree(store_dir, ignore_errors=True)
+    source = SyntheticStock(market)
+    now = market.end_date + pd.Timedelta(hours=20)
+    plan = fetcher.plan_requests(market.tickers, market.start_date, market.end_date, now=now, store_dir=store_dir)
+    if plan['strategy'] == 'ticker':
+        FetchScheduler(max_workers=FETCH_WORKERS).run(fetcher.ticker_groups(source, plan['requests'], now, store_dir))
+    else:
+        groups = {}
+        for date in plan['requests']:
+            groups[f'{date:%Y%m%d}'] = [lambda d=date: (d, fetcher.fetch_snapshot(source, d, market.tickers))]
+        results, _ = FetchScheduler(max_workers=FETCH_WORKERS).run(groups)
+        fetcher.store_snapshots(dict(result[0] for result in results.values()), market.tickers, now, store_dir)
+    return len(plan['requests'])
+
+def _load_csv(market, csv_root):
+    """기존 CSV 로더를 합성 CSV 폴더로 실행합니다."""
+    saved = loader.OHLCV_DIR, loader.MARCAP_DIR
+    loader.OHLCV_DIR, loader.MARCAP_DIR = os.path.join(csv_root, 'ohlcv'), os.path.join(csv_root, 'marcap')
+    try:
+        return loader.load_all_data_csv(market.start_date, market.end_date, market.tickers, columns=index_engine.REQUIRED_COLUMNS)
+    finally:
+        loader.OHLCV_DIR, loader.MARCAP_DIR = saved
+
+def _compute(all_stock_data, end_date, engine):
+    first_data_date = all_stock_data['날짜'].min()
+    base_index, base_market_cap = index_engine.calculate_initial_index(all_stock_data[all_stock_data['날짜'] == first_data_date])
+    return index_engine.compute_index(all_stock_data, first_data_date, end_date, base_index, base_market_cap, engine=engine)
+
+def _render(market, df_result, all_stock_data, output_dir):
+    """03_viz.py의 네 그래프를 합성 인덱스·가짜 코스닥 지수로 그립니다."""
+    viz = importlib.import_module('03_viz')
+    os.makedirs(output_dir, exist_ok=True)
+    deajeon_df = df_result[trading_calendar.is_trading_day(df_result['날짜'])].dropna(subset=['deajeon_index', '시가총액'])
+    arrays = viz.build_plot_arrays(deajeon_df, market.kosdaq(all_stock_data), downsample=viz.DOWNSAMPLE_POINTS)
+    outputs = [(getattr(viz, name), os.path.join(output_dir, f'{name}.png')) for name in
+               ('visualize_normalized', 'visualize_dual_axis_aligned', 'visualize_raw_single_axis', 'visualize_market_cap')]
+    return viz.render_all(arrays, market.start_date, market.end_date, outputs)
+
+@contextlib.contextmanager
+def _synthetic_calendar(market):
+    """실행하는 동안 trading_calendar의 모든 조회가 합성 시장 달력을 쓰게 합니다. (끝나면 원래 달력 캐시로 되돌림)"""
+    saved = dict(trading_calendar._cache)
+    trading_calendar._cache[trading_calendar.CALENDAR_DIR] = market.calendar
+    try:
+        yield
+    finally:
+        trading_calendar._cache.clear()
+        trading_calendar._cache.update(saved)
+
+def run_scenario(market, stages=STAGES, memory=True, work_dir=BENCH_DIR):
+    """
+    합성 시장 하나로 단계별 시간·최대 메모리를 잽니다. (거래일 달력은 합성 시장 달력)
+    - 반환값: {'params', 'stages': {단계: {'seconds', 'peak_bytes', ...}}}
+    """
+    with _synthetic_calendar(market):
+        return _run_scenario(market, stages, memory, work_dir)
+
+def _run_scenario(market, stages, memory, work_dir):
+    root = os.path.join(work_dir, f'synthetic_{market.n_tickers}x{market.years}y_s{market.seed}')
+    csv_root, store_dir = os.path.join(root, 'csv'), os.path.join(root, 'store')
+    shutil.rmtree(root, ignore_errors=True)
+    results = {}
+
+    def record(name, fn, **extra):
+        if name not in stages:
+            return None
+        print(f"  - {name} ...", end=' ', flush=True)
+        value, seconds, peak = _measure(fn, memory)
+        results[name] = {'seconds': round(seconds, 4), 'peak_bytes': peak, **{k: v(value) for k, v in extra.items()}}
+        print(f"{seconds:.2f}초" + (f", 최대 메모리 {peak / 1024 / 1024:.1f}MB" if peak is not None else ''))
+        return value
+
+    # 이후 단계는 앞 단계 결과가 필요하므로, 건너뛴 단계도 결과는 만들어 둡니다.
+    record('generate', lambda: market.write_csv_tree(csv_root))
+    if not os.path.isdir(csv_root):
+        _quiet(lambda: market.write_csv_tree(csv_root))
+    record('fetch', lambda: _fetch(market, store_dir), requests=lambda n: n)
+    if not os.path.isdir(store_dir):
+        _quiet(lambda: _fetch(market, store_dir))
+    data = record('load_store', lambda: loader.load_all_data(
+        market.start_date, market.end_date, market.tickers, columns=index_engine.REQUIRED_COLUMNS, store_dir=store_dir),
+        rows=len)
+    record('load_csv', lambda: _load_csv(market, csv_root), rows=len)
+    if data is None:
+        data = _quiet(lambda: loader.load_all_data(market.start_date, market.end_date, market.tickers,
+                                                   columns=index_engine.REQUIRED_COLUMNS, store_dir=store_dir))
+    df_result = record('compute_vectorized', lambda: _compute(data, market.end_date, 'vectorized'), rows=len)
+    if len(market.days) * market.n_tickers <= LOOP_ENGINE_MAX_CELLS:
+        record('compute_loop', lambda: _compute(data, market.end_date, 'loop'), rows=len)
+    if df_result is None:
+        df_result = _quiet(lambda: _compute(data, market.end_date, 'vectorized'))
+    record('render', lambda: _render(market, df_result, data, os.path.join(root, 'render')))
+    return {'params': market.params(), 'stages': results}
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def _max_rss_bytes():
+    try:
+        import resource
+    except ImportError:
+        return None   # Windows
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+def run(ticker_counts=(53,), years=2, gap_rate=0.01, holiday_density=0.01, seed=0, stages=STAGES, memory=True,
+        results_dir=RESULTS_DIR):
+    """티커 수별 시나리오를 차례로 실행하고 결과를 JSON으로 저장합니다. 반환값: (결과 dict, 파일 경로)"""
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'), 'commit': _git_commit(),
+        'python': platform.python_version(), 'platform': platform.platform(), 'cpu_count': os.cpu_count(),
+        'pandas': pd.__version__, 'numpy': np.__version__, 'scenarios': [],
+    }
+    for n_tickers in ticker_counts:
+        market = SyntheticMarket(n_tickers, years, gap_rate, holiday_density, seed)
+        print(f"시나리오: 티커 {n_tickers}개 × {years}년 (거래일 {len(market.days)}일, 누락 {gap_rate:.1%}, 합성 공휴일 {holiday_density:.1%})")
+        report['scenarios'].append(run_scenario(market, stages, memory))
+    report['max_rss_bytes'] = _max_rss_bytes()
+
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, f"bench_{datetime.now():%Y%m%d_%H%M%S}_{report['commit'] or 'nogit'}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"결과 파일: '{path}'")
+    return report, path
+
+def compare(old_path, new_path):
+    """두 결과 파일의 같은 시나리오·단계 시간을 비교해 출력합니다. (비율 < 1이면 빨라짐)"""
+    with open(old_path, 'r', encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_path, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+    key = lambda scenario: tuple(sorted((k, v) for k, v in scenario['params'].items()))
+    old_scenarios = {key(scenario): scenario for scenario in old['scenarios']}
+    print(f"비교: {old.get('commit')} → {new.get('commit')}")
+    for scenario in new['scenarios']:
+        before = old_scenarios.get(key(scenario))
+        if before is None:
+            continue
+        print(f"티커 {scenario['params']['n_tickers']}개 × {scenario['params']['years']}년")
+        for stage, result in scenario['stages'].items():
+            if stage in before['stages']:
+                previous = before['stages'][stage]['seconds']
+                ratio = result['seconds'] / previous if previous else float('nan')
+                print(f"  - {stage}: {previous:.3f}초 → {result['seconds']:.3f}초 (×{ratio:.2f})")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='합성 데이터로 수집·로드·계산·렌더링 단계 성능 측정 (오프라인)')
+    parser.add_argument('--tickers', type=int, nargs='+', default=[53], help='티커 수 (여러 개면 각각 실행)')
+    parser.add_argument('--years', type=int, default=2)
+    parser.add_argument('--gap-rate', type=float, default=0.01)
+    parser.add_argument('--holiday-density', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--no-memory', action='store_true', help='최대 메모리 측정(단계를 한 번 더 실행)을 건너뜁니다.')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='두 결과 파일을 비교합니다.')
+    args = parser.parse_args()
+    if args.compare:
+        compare(*args.compare)
+    else:
+        run(args.tickers, args.years, args.gap_rate, args.holiday_density, args.seed, args.stages, not args.no_memory)
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+import trading_calendar
+
+# --- 설정 변수 ---
+# 점검 항목과 심각도 ('error'는 DQ_POLICY='fail'일 때 인덱스 계산을 중단시킵니다)
+ISSUE_MISSING = '상장후 누락'
+ISSUE_CLOSED_DAY = '휴장일 데이터'
+ISSUE_DUPLICATE = '중복 날짜'
+ISSUE_BAD_CAP = '시가총액 0 이하'
+ISSUE_SEVERITY = {
+    ISSUE_MISSING: 'warning',
+    ISSUE_CLOSED_DAY: 'warning',
+    ISSUE_DUPLICATE: 'error',
+    ISSUE_BAD_CAP: 'error',
+}
+REPORT_COLUMNS = ['날짜', 'ticker', '유형', '심각도', '값']
+# 점검에 필요한 컬럼 ('날짜', 'ticker' 외)
+REQUIRED_COLUMNS = ['시가총액']
+
+
+class DataQualityError(Exception):
+    """DQ_POLICY='fail'에서 error 수준의 문제가 발견되었을 때 발생합니다."""
+
+
+def build_presence(all_stock_data, dates, tickers=None):
+    """
+    날짜 × 티커 행 수(count) 행렬을 한 번에 만듭니다.
+    - counts > 0 이 존재 비트맵, counts > 1 이 중복 날짜입니다.
+    - tickers가 주어지면 데이터에 없는 티커도 빈 열로 포함합니다.
+    """
+    ticker_labels = pd.Index(sorted(set(all_stock_data['ticker']) | set(tickers or [])))
+    ticker_codes = ticker_labels.get_indexer(all_stock_data['ticker'])
+    date_pos = dates.get_indexer(pd.DatetimeIndex(all_stock_data['날짜']).normalize())
+    valid = date_pos >= 0
+    counts = np.zeros((len(dates), len(ticker_labels)), dtype=np.int32)
+    np.add.at(counts, (date_pos[valid], ticker_codes[valid]), 1)
+    return counts, ticker_labels.to_numpy()
+
+def _issues(mask, dates, ticker_labels, issue, values):
+    rows, cols = np.nonzero(mask)
+    return pd.DataFrame({
+        '날짜': dates[rows],
+        'ticker': ticker_labels[cols],
+        '유형': issue,
+        '심각도': ISSUE_SEVERITY[issue],
+        '값': values[rows, cols] if values is not None else np.nan,
+    })
+
+def check_data_quality(all_stock_data, start_date, end_date, first_appearance=None):
+    """
+    존재 비트맵을 한 번 만든 뒤 한 번의 벡터 연산으로 다음 문제를 찾아 표(DataFrame)로 반환합니다.
+    - 상장후 누락: 첫 등장일 이후 거래일에 행이 없음
+    - 휴장일 데이터: 주말·공휴일·KRX 휴장일에 행이 있음
+    - 중복 날짜: 같은 (날짜, 티커) 행이 2개 이상 (값: 행 수)
+    - 시가총액 0 이하: 시가총액이 0 또는 음수인 행 (값: 시가총액)
+    - first_appearance: {티커: 첫 등장일} (증분 계산처럼 기간 이전 기록이 있을 때 사용)
+    """
+    dates = pd.date_range(pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize())
+    first_appearance = dict(first_appearance or {})
+    counts, ticker_labels = build_presence(all_stock_data, dates, tickers=list(first_appearance))
+    present = counts > 0
+    trading = trading_calendar.is_trading_day(dates)
+
+    # 티커별 첫 등장 위치 (저장된 상태가 있으면 그 날짜 기준)
+    first_pos = np.where(present.any(axis=0), present.argmax(axis=0), len(dates))
+    for col, ticker in enumerate(ticker_labels):
+        if ticker in first_appearance:
+            first_pos[col] = dates.searchsorted(pd.Timestamp(first_appearance[ticker]))
+    listed = np.arange(len(dates))[:, None] >= first_pos[None, :]
+
+    parts = [
+        _issues(listed & ~present & trading[:, None], dates, ticker_labels, ISSUE_MISSING, None),
+        _issues(present & ~trading[:, None], dates, ticker_labels, ISSUE_CLOSED_DAY, counts),
+        _issues(counts > 1, dates, ticker_labels, ISSUE_DUPLICATE, counts),
+    ]
+    bad_caps = all_stock_data[all_stock_data['시가총액'] <= 0]
+    parts.append(pd.DataFrame({
+        '날짜': bad_caps['날짜'].to_numpy(),
+        'ticker': bad_caps['ticker'].to_numpy(),
+        '유형': ISSUE_BAD_CAP,
+        '심각도': ISSUE_SEVERITY[ISSUE_BAD_CAP],
+        '값': bad_caps['시가총액'].to_numpy(dtype=float),
+    }))
+    report = pd.concat([part for part in parts if not part.empty], ignore_index=True) \
+        if any(not part.empty for part in parts) else pd.DataFrame(columns=REPORT_COLUMNS)
+    return report.sort_values(['날짜', 'ticker', '유형'], ignore_index=True)[REPORT_COLUMNS]
+
+def summarize(report):
+    """유형별 건수와 관련 티커 수를 요약한 표를 반환합니다."""
+    if report.empty:
+        return pd.DataFrame(columns=['유형', '심각도', '건수', '티커 수'])
+    return report.groupby(['유형', '심각도']).agg(건수=('ticker', 'size'), **{'티커 수': ('ticker', 'nunique')}).reset_index()
+
+def enforce(report, policy='warn'):
+    """
+    점검 결과에 정책을 적용합니다.
+    - 'warn': 요약만 출력하고 계속 진행
+    - 'fail': error 수준 문제가 있으면 DataQualityError 발생 (인덱스 계산 중단)
+    """
+    summary = summarize(report)
+    if summary.empty:
+        print("데이터 품질 점검: 문제 없음")
+        return
+    print("데이터 품질 점검 결과:")
+    print(summary.to_string(index=False))
+    errors = report[report['심각도'] == 'error']
+    if policy == 'fail' and not errors.empty:
+        raise DataQualityError(f"error 수준의 데이터 품질 문제 {len(errors)}건이 발견되었습니다.")
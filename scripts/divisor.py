@@ -0,0 +1,329 @@
+import argparse
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import trading_calendar
+from loader import load_all_data
+
+# --- 설정 변수 ---
+DEAJEON_INDEX_DIR = './data/deajeon_index'
+DIVISOR_STATE_FILE = 'divisor_state.json'
+DIVISOR_START = '2025-01-01'
+BASE_INDEX = 100.0
+# 계산에 필요한 컬럼 ('날짜', 'ticker' 외) - 등락률은 분할 비율(전일 실제 가격 / 당일 기준가)을 구하는 데만 씁니다.
+# (저장된 종가는 수집 시점의 수정주가이고 지난 기록은 다시 수정되지 않으므로 분할 판단에 쓰지 않습니다.)
+REQUIRED_COLUMNS = ['시가총액', '상장주식수', '등락률']
+# 분할 비율이 1에서 이만큼 이상 벗어난 날만 분할·병합으로 보고, 주식수 비율과 이만큼 안이면 주식수 비율을 그대로 씁니다. (등락률 반올림 잡음 제외)
+ADJUSTMENT_TOLERANCE = 0.01
+EVENT_ADD = '편입'
+EVENT_REMOVE = '제외'
+EVENT_SHARES = '주식수 변경'
+
+# 제수(divisor) 방식 인덱스
+# - 인덱스 = 구성 종목 시가총액 합 / 제수. 첫날 제수 = 시가총액 합 / BASE_INDEX
+# - 편입·제외·신규 상장·주식수 변경이 있는 날(t)에는 전일 종가 기준으로 인덱스가 이어지도록 제수를 조정합니다.
+#     제수_t = 제수_t-1 × 조정 시가총액_t / 시가총액 합_t-1
+#     조정 시가총액_t = Σ(t일 구성 종목) 전일 실제 가격 / 분할 비율 × t일 주식수
+#   이벤트가 없는 날은 조정 시가총액_t = 시가총액 합_t-1 (정수로 정확히 같음)이므로 제수가 바뀌지 않습니다.
+# - 신규 상장 종목은 첫 거래일 종가로 다음 거래일부터 편입되고, 거래정지로 빈 날은 직전 값으로 채웁니다.
+# - 시가총액 합과 조정 시가총액은 정수로 유지하므로, 바스켓 변경을 증분 반영한 결과와 전체 재계산 결과가 정확히 같습니다.
+
+
+def _grid(all_stock_data, start_date, end_date):
+    """기간 안 거래일 중 데이터가 있는 마지막 날까지를 계산 날짜로 씁니다. (바스켓 구성과 무관)"""
+    days = trading_calendar.trading_days(start_date, end_date)
+    if all_stock_data.empty:
+        return days[:0]
+    return days[days <= all_stock_data['날짜'].max()]
+
+def _panels(all_stock_data, days, ticker_labels):
+    """
+    날짜 × 티커 시가총액·상장주식수·등락률 행렬을 만듭니다.
+    - 첫 데이터일 ~ 마지막 데이터일 사이의 빈 날(거래정지)은 직전 값으로 채웁니다.
+    - alive: 그 기간 안인지 여부 (기간 밖은 모두 0)
+    - 데이터가 없으면(load_all_data가 빈 DataFrame을 반환) 모든 날이 기간 밖입니다.
+    """
+    if all_stock_data.empty:
+        all_stock_data = pd.DataFrame(columns=['날짜', 'ticker'] + REQUIRED_COLUMNS)
+    shape = (len(days), len(ticker_labels))
+    rows = days.get_indexer(pd.DatetimeIndex(all_stock_data['날짜']))
+    cols = ticker_labels.get_indexer(all_stock_data['ticker'])
+    valid = (rows >= 0) & (cols >= 0)
+    rows, cols = rows[valid], cols[valid]
+
+    present = np.zeros(shape, dtype=bool)
+    present[rows, cols] = True
+    panels = {}
+    for column, dtype in (('시가총액', np.int64), ('상장주식수', np.int64), ('등락률', np.float64)):
+        values = np.zeros(shape, dtype=dtype)
+        values[rows, cols] = all_stock_data[column].to_numpy(dtype=dtype)[valid]
+        panels[column] = values
+
+    row_ids = np.arange(shape[0])[:, None]
+    last_seen = np.maximum.accumulate(np.where(present, row_ids, -1), axis=0)
+    last_row = np.where(present.any(axis=0), shape[0] - 1 - present[::-1].argmax(axis=0), -1)
+    alive = (last_seen >= 0) & (row_ids <= last_row[None, :])
+    col_ids = np.broadcast_to(np.arange(shape[1]), shape)
+    for column, values in panels.items():
+        panels[column] = np.where(alive, values[np.maximum(last_seen, 0), col_ids], 0)
+    panels['alive'] = alive
+    return panels
+
+def _terms(panels):
+    """
+    종목별 전일 시가총액과 조정 시가총액(전일 실제 가격 / 분할 비율 × 당일 주식수)을 구합니다.
+    - 분할 비율 k = 전일 실제 가격 / 당일 기준가. 실제 가격 = 시가총액 / 상장주식수, 기준가 = 당일 실제 가격 / (1 + 등락률 / 100)
+      (모두 그날 기준으로 맞는 값이라 나중에 수정되지 않은 지난 기록에서도 같은 결과가 나옵니다.)
+    - 액면분할·병합이면 k ≈ 당일 주식수 / 전일 주식수이므로 주식수 비율을 그대로 써 시가총액이 그대로 이어지고,
+      k ≈ 1(유상증자 등)이면 전일 가격 그대로 늘어난 주식수만큼 조정합니다.
+    - 주식수가 바뀐 날만 조정하므로 다른 날의 조정 시가총액은 전일 시가총액과 정확히 같습니다.
+    """
+    caps, shares, change_pct, alive = panels['시가총액'], panels['상장주식수'], panels['등락률'], panels['alive']
+    shift = lambda values, fill: np.vstack([np.full((1, values.shape[1]), fill, dtype=values.dtype), values[:-1]])
+    prev_caps, prev_shares = shift(caps, 0), shift(shares, 0)
+    has_prev = alive & shift(alive, False)
+
+    changed = has_prev & (shares != prev_shares) & (prev_shares > 0) & (shares > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        base_price = caps / shares / (1 + change_pct / 100)
+        k = prev_caps / prev_shares / base_price
+        ratio = shares / prev_shares
+    k = np.where(np.abs(k / ratio - 1) <= ADJUSTMENT_TOLERANCE, ratio, k)
+    k = np.where(changed & np.isfinite(k) & (k > 0) & (np.abs(k - 1) > ADJUSTMENT_TOLERANCE), k, 1.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        adjusted = np.rint(prev_caps / k * (shares / np.where(prev_shares > 0, prev_shares, 1)))
+    nums = np.where(changed, adjusted, prev_caps).astype(np.int64)
+    return {'caps': caps, 'prev_caps': prev_caps, 'nums': nums, 'has_prev': has_prev, 'alive': alive, 'changed': changed}
+
+def _membership(days, ticker, tickers, changes):
+    """초기 구성 종목 목록과 바스켓 변경 기록으로 티커의 날짜별 구성 종목 여부를 만듭니다. (변경일부터 적용)"""
+    member = np.full(len(days), ticker in tickers)
+    for change in sorted(changes, key=lambda change: change['날짜']):
+        if change['ticker'] == ticker:
+            member[days.searchsorted(pd.Timestamp(change['날짜'])):] = change['구분'] == EVENT_ADD
+    return member
+
+def _first_row(member, alive):
+    """
+    구성 종목 중 하나라도 데이터가 있는 첫 날짜 위치 (인덱스 시작일, 없으면 0)
+    - member가 (바스켓, 날짜, 티커)이면 바스켓별 위치 배열을 반환합니다.
+    """
+    started = (member & alive).any(axis=-1)
+    return np.where(started.any(axis=-1), started.argmax(axis=-1), 0)
+
+def _starts(member, terms, ticker_labels):
+    """
+    티커별 [구성 종목이면서 데이터가 있는 첫 날짜 위치, 그날 전일 가격이 없으면 그날 시가총액(있으면 0)]을 만듭니다.
+    - 인덱스 시작일은 이 위치의 최솟값이고, 시작일에만 들어가는 종목(전일 가격 없음)의 시가총액을 알 수 있어
+      apply_change가 다른 종목의 데이터 없이 시작일이 바뀐 경우를 반영할 수 있습니다.
+    """
+    active = member & terms['alive']
+    if not len(active):
+        return {}
+    rows, cols = active.argmax(axis=0), np.arange(len(ticker_labels))
+    caps = np.where(terms['has_prev'][rows, cols], 0, terms['caps'][rows, cols])
+    return {label: [int(row), int(cap)] for label, started, row, cap in zip(ticker_labels, active.any(axis=0), rows, caps)
+            if started}
+
+def _start_row(starts):
+    """_starts로 구한 인덱스 시작일 위치 (_first_row와 같음, 없으면 0)"""
+    return min((row for row, _ in starts.values()), default=0)
+
+def _included(member, terms, first=0):
+    """
+    구성 종목이면서 전일 가격이 있는(시작일 제외) 날 True. 신규 상장 종목은 둘째 거래일부터 들어갑니다.
+    - first: 인덱스 시작일 위치 (그날은 전일 가격 없이도 들어감, member가 (바스켓, 날짜, 티커)이면 바스켓별 위치)
+    """
+    first_day = (np.arange(len(terms['alive'])) == np.asarray(first)[..., None])[..., None]
+    return member & terms['alive'] & (terms['has_prev'] | first_day)
+
+def _divisor_path(caps_sum, nums, base_index):
+    """
+    이벤트가 있는 날(조정 시가총액 ≠ 전일 시가총액 합)에만 제수를 고치며 날짜별 제수를 만듭니다. (O(이벤트 수))
+    - nums: {날짜 위치: 조정 시가총액 합}
+    - 첫 제수는 시가총액 합이 처음 0보다 큰 날 기준입니다. (그 전 날짜는 시가총액 합이 0)
+    """
+    divisor = np.empty(len(caps_sum))
+    started = np.flatnonzero(caps_sum)
+    current = caps_sum[started[0]] / base_index if len(started) else 1.0
+    last = 0
+    for t in sorted(nums):
+        divisor[last:t] = current
+        if caps_sum[t - 1]:
+            current = current * (nums[t] / caps_sum[t - 1])
+        last = t
+    divisor[last:] = current
+    return divisor
+
+def index_terms(all_stock_data, days, ticker_labels):
+    """(날짜, ticker) 행 데이터로 제수 계산에 쓰는 날짜 × 티커 값(시가총액, 조정 시가총액 등)을 한 번에 구합니다."""
+    return _terms(_panels(all_stock_data, days, ticker_labels))
+
+def divisor_indices(terms, members, base_index=BASE_INDEX):
+    """
+    바스켓 × 날짜 × 티커 구성 여부(members)로 여러 제수 방식 인덱스의 시가총액 합과 제수를 한 번에 구합니다. (인덱스 = 시가총액 합 / 제수)
+    - rebuild와 multi_index의 시가총액 바스켓이 같은 규칙(신규 상장·거래정지·분할·주식수 변경)을 쓰도록 한 곳에 둡니다.
+    - 편입 여부와 합은 모든 바스켓을 함께 계산하고, 제수만 바스켓마다 이벤트일을 돕니다. (O(이벤트 수))
+    - 반환값: (바스켓 × 날짜 시가총액 합, 바스켓 × 날짜 제수, 바스켓별 이벤트일 조정 시가총액 [{날짜 위치: 정수}],
+              바스켓 × 날짜 × 티커 편입 여부)
+    """
+    included = _included(members, terms, _first_row(members, terms['alive']))
+    caps_sum = np.where(included, terms['caps'], 0).sum(axis=-1)
+    num_sum = np.where(included, terms['nums'], 0).sum(axis=-1)
+    nums = [{int(t): int(row_nums[t]) for t in np.flatnonzero(row_nums[1:] != row_caps[:-1]) + 1}
+            for row_caps, row_nums in zip(caps_sum, num_sum)]
+    divisors = np.array([_divisor_path(row_caps, row_nums, base_index) for row_caps, row_nums in zip(caps_sum, nums)])
+    return caps_sum, divisors.reshape(caps_sum.shape), nums, included
+
+def divisor_index(terms, member, base_index=BASE_INDEX):
+    """날짜 × 티커 구성 여부(member) 하나로 divisor_indices를 계산합니다. 반환값: (시가총액 합, 제수, 이벤트일 조정 시가총액, 편입 여부)"""
+    caps_sum, divisors, nums, included = divisor_indices(terms, member[None], base_index)
+    return caps_sum[0], divisors[0], nums[0], included[0]
+
+def _series_frame(days, caps_sum, divisor):
+    return pd.DataFrame({'날짜': days, 'deajeon_index': caps_sum / divisor, '시가총액': caps_sum, '제수': divisor})
+
+def rebuild(all_stock_data, tickers, changes, start_date, end_date, base_index=BASE_INDEX):
+    """
+    전체 데이터로 제수 방식 인덱스를 처음부터 계산합니다.
+    - changes: [{'날짜', 'ticker', '구분': '편입'|'제외'}, ...] 바스켓 변경 기록
+    - 반환값: (시계열 DataFrame, 이벤트일 조정 시가총액 {날짜 위치: 정수}, 이벤트 기록 DataFrame, 티커별 시작 정보 (_starts))
+    """
+    days = _grid(all_stock_data, start_date, end_date)
+    ticker_labels = pd.Index(sorted(set(tickers) | {change['ticker'] for change in changes}))
+    terms = index_terms(all_stock_data, days, ticker_labels)
+    member = np.column_stack([_membership(days, ticker, tickers, changes) for ticker in ticker_labels]) \
+        if len(ticker_labels) else np.zeros((len(days), 0), dtype=bool)
+    caps_sum, divisor, nums, included = divisor_index(terms, member, base_index)
+    return (_series_frame(days, caps_sum, divisor), nums, _event_log(days, ticker_labels, included, terms, divisor),
+            _starts(member, terms, ticker_labels))
+
+def _event_log(days, ticker_labels, included, terms, divisor):
+    """편입·제외·주식수 변경이 일어난 (날짜, 티커)와 조정 후 제수를 표로 만듭니다."""
+    prev_included = np.vstack([np.zeros((1, included.shape[1]), dtype=bool), included[:-1]])
+    kinds = np.select(
+        [included & ~prev_included, ~included & prev_included, included & prev_included & terms['changed']],
+        [EVENT_ADD, EVENT_REMOVE, EVENT_SHARES], default='')
+    kinds[0] = ''
+    rows, cols = np.nonzero(kinds != '')
+    return pd.DataFrame({
+        '날짜': days[rows], 'ticker': ticker_labels[cols], '구분': kinds[rows, cols],
+        '전일 시가총액': terms['prev_caps'][rows, cols], '조정 시가총액': terms['nums'][rows, cols], '제수': divisor[rows],
+    })
+
+def apply_change(state, series, ticker_data, change):
+    """
+    저장된 시계열에 바스켓 변경 하나를 증분 반영합니다. (전체 재계산 없이 바뀐 티커의 데이터만 사용)
+    - 시가총액 합과 이벤트일 조정 시가총액에서 그 티커의 기여분만 빼고 더한 뒤, 이벤트일만 돌며 제수를 다시 만듭니다.
+    - 인덱스 시작일은 rebuild와 같이 바뀐 구성 종목 전체의 첫 데이터일입니다. (state['starts']의 최솟값)
+      시작일이 바뀌면 다른 종목 중 전일 가격 없이 시작일이라서 들어가던 종목의 시가총액(state['starts'])을 옮깁니다.
+    - 반환값: (새 시계열 DataFrame, 새 이벤트일 조정 시가총액 {날짜 위치: 정수}, 새 티커별 시작 정보)
+    """
+    days = pd.DatetimeIndex(series['날짜'])
+    ticker = change['ticker']
+    terms = index_terms(ticker_data, days, pd.Index([ticker]))
+    old_member = _membership(days, ticker, state['tickers'], state['changes'])[:, None]
+    new_member = _membership(days, ticker, state['tickers'], state['changes'] + [change])[:, None]
+    starts = {label: start for label, start in state['starts'].items() if label != ticker}
+    old_first = _start_row(state['starts'])
+    starts.update(_starts(new_member, terms, pd.Index([ticker])))
+    first = _start_row(starts)
+    old = _included(old_member, terms, old_first)[:, 0]
+    new = _included(new_member, terms, first)[:, 0]
+    delta = new.astype(np.int64) - old.astype(np.int64)
+
+    old_caps_sum = series['시가총액'].to_numpy(dtype=np.int64)
+    caps_sum = old_caps_sum + delta * terms['caps'][:, 0]
+    if first != old_first:
+        # 다른 종목 중 전일 가격 없이 시작일에만 들어가던 종목은 옛 시작일에서 빠지고 새 시작일에 들어갑니다. (조정 시가총액은 0이라 그대로)
+        for label, (row, cap) in starts.items():
+            if label != ticker and row in (old_first, first):
+                caps_sum[row] += cap if row == first else -cap
+    # 이벤트가 없던 날의 조정 시가총액은 전일 시가총액 합과 같습니다.
+    num_sum = np.concatenate([[0], old_caps_sum[:-1]])
+    for t, value in state['nums'].items():
+        num_sum[int(t)] = value
+    num_sum = num_sum + delta * terms['nums'][:, 0]
+    nums = {int(t): int(num_sum[t]) for t in np.flatnonzero(num_sum[1:] != caps_sum[:-1]) + 1}
+    return _series_frame(days, caps_sum, _divisor_path(caps_sum, nums, state['base_index'])), nums, starts
+
+def save_state(state, series, events=None, output_dir=DEAJEON_INDEX_DIR):
+    """시계열 CSV(와 이벤트 기록)를 저장하고 상태 파일에 경로와 이벤트일 조정 시가총액을 기록합니다."""
+    os.makedirs(output_dir, exist_ok=True)
+    end_str = pd.Timestamp(state['end_date']).strftime('%Y%m%d')
+    state['series_path'] = os.path.join(output_dir, f'deajeon_index_divisor_{end_str}.csv')
+    series.to_csv(state['series_path'], index=False, encoding='utf-8-sig')
+    if events is not None:
+        events.to_csv(os.path.join(output_dir, f'divisor_events_{end_str}.csv'), index=False, encoding='utf-8-sig')
+    with open(os.path.join(output_dir, DIVISOR_STATE_FILE), 'w', encoding='utf-8') as f:
+        json.dump({**state, 'nums': {str(t): v for t, v in state['nums'].items()}}, f, ensure_ascii=False, indent=2)
+
+def load_state(output_dir=DEAJEON_INDEX_DIR):
+    """상태 파일과 시계열을 불러옵니다. 없으면 (None, None)"""
+    path = os.path.join(output_dir, DIVISOR_STATE_FILE)
+    if not os.path.exists(path):
+        return None, None
+    with open(path, encoding='utf-8') as f:
+        state = json.load(f)
+    state['nums'] = {int(t): v for t, v in state['nums'].items()}
+    series = pd.read_csv(state['series_path'], encoding='utf-8-sig', parse_dates=['날짜'], float_precision='round_trip')
+    return state, series
+
+def run_rebuild(tickers, changes, start_date, end_date):
+    all_stock_data = load_all_data(start_date, end_date, sorted(set(tickers) | {c['ticker'] for c in changes}),
+                                   columns=REQUIRED_COLUMNS)
+    series, nums, events, starts = rebuild(all_stock_data, tickers, changes, start_date, end_date)
+    state = {'base_index': BASE_INDEX, 'tickers': list(tickers), 'changes': list(changes),
+             'start_date': str(pd.Timestamp(start_date).date()), 'end_date': str(pd.Timestamp(end_date).date()), 'nums': nums,
+             'starts': starts}
+    return state, series, events
+
+def check_against_rebuild(state, series):
+    """증분 반영한 시계열이 전체 재계산 결과와 정확히 같은지 확인합니다."""
+    _, rebuilt, _ = run_rebuild(state['tickers'], state['changes'], state['start_date'], state['end_date'])
+    identical = all(np.array_equal(series[column].to_numpy(), rebuilt[column].to_numpy())
+                    for column in ['deajeon_index', '시가총액', '제수'])
+    if identical:
+        print("전체 재계산 결과와 일치합니다.")
+    else:
+        diff = np.abs(series['deajeon_index'].to_numpy() - rebuilt['deajeon_index'].to_numpy()).max()
+        print(f"에러: 전체 재계산 결과와 다릅니다. (최대 차이 {diff})")
+    return identical
+
+
+if __name__ == '__main__':
+    from ticker import tickers
+
+    parser = argparse.ArgumentParser(description='제수 방식 deajeon_index 유지 관리')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('rebuild', help='ticker.py 구성으로 전체 재계산')
+    for name in ('add', 'remove'):
+        command = sub.add_parser(name, help=f'종목 {EVENT_ADD if name == "add" else EVENT_REMOVE} (증분 반영)')
+        command.add_argument('ticker')
+        command.add_argument('date', help='적용일 (YYYY-MM-DD)')
+        command.add_argument('--check', action='store_true', help='전체 재계산 결과와 비교합니다.')
+    args = parser.parse_args()
+
+    if args.command == 'rebuild':
+        state, series, events = run_rebuild(tickers, [], DIVISOR_START, datetime.now())
+        save_state(state, series, events)
+        print(f"제수 방식 인덱스 재계산 완료: 이벤트일 {len(state['nums'])}개, 결과 '{state['series_path']}'")
+    else:
+        state, series = load_state()
+        if state is None or 'starts' not in state:
+            print("에러: 상태 파일이 없거나 예전 형식입니다. 먼저 'python scripts/divisor.py rebuild'를 실행하세요.")
+        else:
+            change = {'날짜': args.date, 'ticker': args.ticker, '구분': EVENT_ADD if args.command == 'add' else EVENT_REMOVE}
+            ticker_data = load_all_data(state['start_date'], state['end_date'], [args.ticker], columns=REQUIRED_COLUMNS)
+            if ticker_data.empty:
+                print(f"경고: {args.ticker}의 저장된 데이터가 없어 데이터가 생길 때까지 인덱스에 기여하지 않습니다.")
+            series, state['nums'], state['starts'] = apply_change(state, series, ticker_data, change)
+            state['changes'].append(change)
+            save_state(state, series)
+            print(f"{args.ticker} {change['구분']} ({args.date}) 반영 완료: 이벤트일 {len(state['nums'])}개")
+            if args.check:
+                check_against_rebuild(state, series)
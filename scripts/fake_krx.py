@@ -0,0 +1,131 @@
+import random
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+
+class FakeStock:
+    """
+    pykrx.stock을 대신하는 오프라인 데이터 소스입니다. (수집기 테스트용)
+    - 티커별로 고정된 시드의 가짜 OHLCV·시가총액을 만들어 pykrx와 같은 형태로 돌려줍니다.
+    - latency: 호출마다 (최소, 최대) 초 사이의 지연을 넣습니다.
+    - error_rate: 이 확률로 ConnectionError를 발생시킵니다.
+    - listing_dates: {티커: 'YYYY-MM-DD'} 상장일 (그 이전 날짜는 빈 결과)
+    - market_tickers: 전 종목 스냅샷 조회 시 돌려줄 시장 전체 티커 목록
+    - calls, max_concurrency로 호출 기록과 최대 동시 호출 수를 확인할 수 있습니다.
+    """
+
+    def __init__(self, latency=(0.0, 0.0), error_rate=0.0, listing_dates=None, market_tickers=None, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.listing_dates = listing_dates or {}
+        self.market_tickers = market_tickers or [f'{i:06d}' for i in range(1, 501)]
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._active = 0
+        self.calls = []
+        self.max_concurrency = 0
+
+    def _enter(self, name, *args):
+        with self._lock:
+            self.calls.append((name,) + args)
+            self._active += 1
+            self.max_concurrency = max(self.max_concurrency, self._active)
+            delay = self._rng.uniform(*self.latency)
+            fail = self._rng.random() < self.error_rate
+        try:
+            time.sleep(delay)
+            if fail:
+                raise ConnectionError(f"가짜 네트워크 오류: {name}{args}")
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def _history(self, ticker, fromdate, todate):
+        """티커별 결정적(seed 고정) 가격·상장주식수 시계열을 만듭니다."""
+        start = max(pd.Timestamp(fromdate), pd.Timestamp(self.listing_dates.get(ticker, '1990-01-01')))
+        days = pd.bdate_range(start, pd.Timestamp(todate), name='날짜')
+        seed = zlib.crc32(ticker.encode())
+        # 날짜별 값이 조회 구간과 무관하게 같도록 날짜 자체로 난수를 만듭니다.
+        day_numbers = days.asi8 // 86_400_000_000_000
+        noise = np.sin(day_numbers * 0.37 + seed % 1000) + np.cos(day_numbers * 0.11 + seed % 97)
+        close = np.round(10_000 * (1 + 0.2 * noise) + seed % 5_000).astype(np.int64)
+        shares = np.full(len(days), 1_000_000 + seed % 50_000_000, dtype=np.int64)
+        volume = (100_000 + (day_numbers * 7919 + seed) % 900_000).astype(np.int64)
+        return days, close, shares, volume
+
+    def get_market_ticker_name(self, ticker):
+        self._enter('get_market_ticker_name', ticker)
+        return f"가짜종목{ticker}"
+
+    def get_market_ticker_list(self, date=None, market='KOSPI'):
+        self._enter('get_market_ticker_list', date, market)
+        if market == 'ALL':
+            return list(self.market_tickers)
+        # 티커 해시가 짝수이면 KOSPI, 홀수이면 KOSDAQ으로 나눕니다.
+        parity = 0 if market == 'KOSPI' else 1
+        return [ticker for ticker in self.market_tickers if zlib.crc32(ticker.encode()) % 2 == parity]
+
+    def get_market_ohlcv(self, fromdate, todate, ticker):
+        self._enter('get_market_ohlcv', fromdate, todate, ticker)
+        return self._ohlcv_frame(fromdate, todate, ticker)
+
+    def get_market_cap(self, fromdate, todate, ticker):
+        self._enter('get_market_cap', fromdate, todate, ticker)
+        return self._cap_frame(fromdate, todate, ticker)
+
+    def _ohlcv_frame(self, fromdate, todate, ticker):
+        days, close, _, volume = self._history(ticker, fromdate, todate)
+        prev = np.concatenate([[close[0]], close[:-1]]) if len(close) else close
+        return pd.DataFrame({
+            '시가': prev, '고가': np.maximum(prev, close) + 50, '저가': np.minimum(prev, close) - 50,
+            '종가': close, '거래량': volume, '등락률': (close - prev) / prev * 100 if len(close) else close,
+        }, index=days)
+
+    def _cap_frame(self, fromdate, todate, ticker):
+        days, close, shares, volume = self._history(ticker, fromdate, todate)
+        return pd.DataFrame({
+            '시가총액': close * shares, '거래량': volume, '거래대금': close * volume, '상장주식수': shares,
+        }, index=days)
+
+    def _snapshot(self, date, columns_fn):
+        rows = {}
+        for ticker in self.market_tickers:
+            frame = columns_fn(date, date, ticker)
+            if not frame.empty:
+                rows[ticker] = frame.iloc[0]
+        return pd.DataFrame.from_dict(rows, orient='index').rename_axis('티커')
+
+    def get_market_ohlcv_by_ticker(self, date, market='ALL'):
+        self._enter('get_market_ohlcv_by_ticker', date, market)
+        return self._snapshot(date, self._ohlcv_frame)
+
+    def get_market_cap_by_ticker(self, date, market='ALL'):
+        self._enter('get_market_cap_by_ticker', date, market)
+        return self._snapshot(date, self._cap_frame)
+
+
+if __name__ == '__main__':
+    # 오프라인 점검: 가짜 소스(지연·오류 주입)로 동시 수집기를 실행하고 결과를 확인합니다.
+    import tempfile
+
+    import fetcher
+    from fetch_scheduler import FetchScheduler, RateLimitedSource, TokenBucket
+
+    fake = FakeStock(latency=(0.05, 0.2), error_rate=0.2, listing_dates={'000003': '2024-03-04'}, seed=42)
+    tickers = [f'{i:06d}' for i in range(1, 11)]
+    now = pd.Timestamp('2024-06-28 20:00').to_pydatetime()
+    with tempfile.TemporaryDirectory() as store_dir:
+        bucket = TokenBucket(rate=20, capacity=4)
+        source = RateLimitedSource(fake, bucket)
+        requests = fetcher.plan_ticker_requests(tickers, '20240101', now, now=now, store_dir=store_dir)
+        groups = fetcher.ticker_groups(source, requests, now, store_dir)
+        started = time.monotonic()
+        results, errors = FetchScheduler(max_workers=4, max_retries=5, backoff_base=0.05).run(groups)
+        elapsed = time.monotonic() - started
+        remaining = fetcher.plan_ticker_requests(tickers, '20240101', now, now=now, store_dir=store_dir)
+        print(f"요청 {len(requests)}건, 실제 호출 {len(fake.calls)}건 (오류 재시도 포함), 최대 동시 호출 {fake.max_concurrency}")
+        print(f"소요 {elapsed:.2f}초, 속도 제한 대기 합계 {bucket.total_wait:.2f}초, 실패 작업 {sum(len(failures) for failures in errors.values())}개, 남은 요청 {len(remaining)}건")
@@ -0,0 +1,124 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from tqdm import tqdm
+
+
+class TokenBucket:
+    """
+    전역 초당 요청 수 제한기입니다.
+    - rate: 초당 토큰 보충 속도, capacity: 한 번에 몰아 쓸 수 있는 최대 토큰 수
+    - 여러 스레드에서 동시에 acquire()를 호출해도 전체 요청 속도가 rate를 넘지 않습니다.
+    """
+
+    def __init__(self, rate, capacity=1):
+        if rate <= 0:
+            raise ValueError("rate는 0보다 커야 합니다.")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.total_wait = 0.0
+        self.waits = 0         # 실제로 기다린 호출 수
+
+    def acquire(self):
+        """토큰 하나를 사용합니다. 토큰이 없으면 보충될 때까지 기다린 뒤 대기 시간(초)을 반환합니다."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # 토큰을 미리 차감(음수 허용)하여 대기 순서를 예약합니다.
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.total_wait += wait
+            self.waits += wait > 0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class RateLimitedSource:
+    """
+    데이터 소스(pykrx.stock 또는 같은 함수를 가진 객체)의 모든 함수 호출 앞에서 토큰을 받도록 감쌉니다.
+    """
+
+    def __init__(self, source, bucket):
+        self._source = source
+        self._bucket = bucket
+
+    def __getattr__(self, name):
+        attr = getattr(self._source, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self._bucket.acquire()
+            return attr(*args, **kwargs)
+        return call
+
+
+class FetchScheduler:
+    """
+    제한된 작업자 풀에서 수집 작업을 실행합니다.
+    - 같은 그룹(티커)의 작업은 한 작업자가 순서대로 실행하므로 같은 파티션에 동시에 쓰지 않습니다.
+    - 실패한 작업은 지수 백오프(+지터)로 max_retries번까지 다시 시도합니다.
+    - 재시도 후에도 실패한 작업이 있어도 같은 그룹의 나머지 작업은 계속 실행하고, 실패한 작업은 모두 보고합니다.
+    - 그룹이 끝날 때마다 진행 상황을 출력합니다.
+    """
+
+    def __init__(self, max_workers=4, max_retries=3, backoff_base=1.0, backoff_max=30.0, show_progress=True):
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.show_progress = show_progress
+
+    def _call_with_retry(self, key, task):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return task()
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+                tqdm.write(f"경고: {key} 작업 실패 ({e}) - {delay:.1f}초 후 재시도 ({attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+
+    def _run_group(self, key, tasks):
+        """그룹의 작업을 순서대로 실행하고 (성공한 결과 목록, [(작업 위치, 예외), ...])를 반환합니다."""
+        results, failures = [], []
+        for position, task in enumerate(tasks):
+            try:
+                results.append(self._call_with_retry(key, task))
+            except Exception as e:
+                failures.append((position, e))
+                tqdm.write(f"에러: {key} 작업 {position + 1}/{len(tasks)}이 재시도 후에도 실패했습니다 - {e}")
+        return results, failures
+
+    def run(self, groups):
+        """
+        groups: {그룹 키: [인자 없는 함수, ...]}
+        - 반환값: (results, errors) — results는 {키: [성공한 작업 결과, ...]} (성공한 작업이 있는 그룹만),
+          errors는 {키: [(작업 위치, 예외), ...]} (실패한 작업이 있는 그룹만)
+        """
+        results, errors = {}, {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._run_group, key, tasks): key for key, tasks in groups.items()}
+            with tqdm(total=len(futures), disable=not self.show_progress) as progress:
+                for future in as_completed(futures):
+                    key = futures[future]
+                    try:
+                        done, failures = future.result()
+                    except Exception as e:
+                        done, failures = [], [(None, e)]   # 작업 밖(스케줄러)의 예외
+                        tqdm.write(f"에러: {key} 그룹 실행 중 오류 발생 - {e}")
+                    if done:
+                        results[key] = done
+                    if failures:
+                        errors[key] = failures
+                    progress.set_postfix_str(f"{key} {'일부 실패' if failures else '완료'}")
+                    progress.update(1)
+        return results, errors
@@ -0,0 +1,200 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import store
+import trading_calendar
+
+# --- 설정 변수 ---
+# 데이터셋별 pykrx 조회 함수 이름
+DATASET_FETCHERS = {
+    'ohlcv': 'get_market_ohlcv',
+    'marcap': 'get_market_cap',
+}
+# 데이터셋별 pykrx 전 종목 스냅샷(하루치) 조회 함수 이름
+DATASET_SNAPSHOT_FETCHERS = {
+    'ohlcv': 'get_market_ohlcv_by_ticker',
+    'marcap': 'get_market_cap_by_ticker',
+}
+# 시장 구분 조회 대상 (pykrx get_market_ticker_list의 market 인자)
+MARKETS = ('KOSPI', 'KOSDAQ')
+# 이 시각(시) 이전에는 오늘 데이터가 확정되지 않은 것으로 보고 다음 실행에서 다시 받습니다.
+MARKET_CLOSE_HOUR = 18
+# 누락 구간 사이 간격이 이 거래일 수 이하이면 한 번의 요청으로 합칩니다.
+MAX_MERGE_GAP_DAYS = 20
+
+
+def expected_trading_days(start_date, end_date):
+    """기간 내 거래일(주말·공휴일·KRX 휴장일 제외) 목록을 DatetimeIndex로 반환합니다."""
+    return trading_calendar.trading_days(start_date, end_date)
+
+def closed_until(now=None):
+    """데이터가 확정된 마지막 날짜를 반환합니다. (장 마감 집계 전이면 어제)"""
+    now = now or datetime.now()
+    today = pd.Timestamp(now).normalize()
+    return today if now.hour >= MARKET_CLOSE_HOUR else today - timedelta(days=1)
+
+def _missing_mask(dataset, ticker, days, now=None, store_dir=store.STORE_DIR, coverage=None):
+    """
+    기대 거래일(days) 중 다시 받아야 하는 날짜를 boolean 배열로 반환합니다.
+    - coverage: 미리 읽어 둔 조회 완료 기간 (없으면 저장소에서 읽음)
+    """
+    confirmed = days <= closed_until(now)
+    if coverage is None:
+        coverage = store.load_coverage(dataset, ticker, store_dir)
+    done = days.isin(store.stored_dates(dataset, ticker, store_dir))
+    if coverage:
+        # 마지막 조회 완료일 이후에 저장된 날짜는 장중에 받은 값일 수 있으므로 다시 받습니다.
+        done &= days <= coverage[-1][1]
+    for covered_start, covered_end in coverage:
+        done |= (days >= covered_start) & (days <= covered_end)
+    return ~(done & confirmed)
+
+def _to_ranges(days, missing, max_gap=MAX_MERGE_GAP_DAYS):
+    """누락 거래일을 사이 간격 max_gap(거래일) 이하끼리 묶어 [(시작일, 종료일), ...]로 반환합니다."""
+    positions = np.flatnonzero(missing)
+    if len(positions) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(positions) > max_gap + 1)
+    run_starts = np.concatenate([[positions[0]], positions[breaks + 1]])
+    run_ends = np.concatenate([positions[breaks], [positions[-1]]])
+    return [(days[s], days[e]) for s, e in zip(run_starts, run_ends)]
+
+def missing_ranges(dataset, ticker, start_date, end_date, now=None, store_dir=store.STORE_DIR):
+    """
+    티커·데이터셋별로 아직 받지 않은 거래일 구간을 [(시작일, 종료일), ...]로 반환합니다.
+    - 저장된 날짜와 이미 조회를 마친 기간(상장 전·거래정지로 비어 있던 날 포함)은 제외합니다.
+    - 확정되지 않은 날(오늘 장중 등)과 확정 전에 받아 둔 날은 저장되어 있어도 다시 받습니다.
+    - 가까운 누락 구간은 MAX_MERGE_GAP_DAYS 기준으로 한 요청으로 합칩니다.
+    """
+    days = expected_trading_days(start_date, end_date)
+    return _to_ranges(days, _missing_mask(dataset, ticker, days, now, store_dir))
+
+def plan_ticker_requests(tickers, start_date, end_date, now=None, store_dir=store.STORE_DIR):
+    """전체 티커에 대해 필요한 (dataset, ticker, 시작일, 종료일) 요청 목록을 만듭니다."""
+    return plan_requests(tickers, start_date, end_date, now, strategy='ticker', store_dir=store_dir)['requests']
+
+def plan_requests(tickers, start_date, end_date, now=None, strategy='auto', store_dir=store.STORE_DIR):
+    """
+    누락 데이터를 받을 요청 계획을 세웁니다.
+    - 'ticker': 티커·데이터셋별 기간 조회 (티커가 적고 기간이 길 때 유리)
+    - 'date': 거래일별 전 종목 스냅샷 조회 후 유니버스만 필터링 (티커가 많고 기간이 짧을 때 유리)
+    - 'auto': 두 방식의 요청 수를 비교해 적은 쪽을 선택합니다. (같으면 'ticker')
+    - 반환값: {'strategy', 'requests', 'ticker_cost', 'date_cost'}
+      requests는 'ticker'이면 [(dataset, ticker, 시작일, 종료일), ...], 'date'이면 [거래일, ...]
+    """
+    days = expected_trading_days(start_date, end_date)
+    ticker_requests = []
+    missing_any = np.zeros(len(days), dtype=bool)
+    coverage = {dataset: store.load_all_coverage(dataset, store_dir) for dataset in DATASET_FETCHERS}
+    for ticker in tickers:
+        for dataset in DATASET_FETCHERS:
+            missing = _missing_mask(dataset, ticker, days, now, store_dir, coverage[dataset].get(ticker, []))
+            missing_any |= missing
+            for range_start, range_end in _to_ranges(days, missing):
+                ticker_requests.append((dataset, ticker, range_start, range_end))
+    date_requests = list(days[missing_any])
+
+    ticker_cost = len(ticker_requests)
+    date_cost = len(date_requests) * len(DATASET_SNAPSHOT_FETCHERS)
+    if strategy == 'auto':
+        strategy = 'date' if date_cost < ticker_cost else 'ticker'
+    if strategy not in ('ticker', 'date'):
+        raise ValueError(f"알 수 없는 수집 방식입니다: {strategy}")
+    return {
+        'strategy': strategy,
+        'requests': ticker_requests if strategy == 'ticker' else date_requests,
+        'ticker_cost': ticker_cost,
+        'date_cost': date_cost,
+    }
+
+def fetch_markets(source, date, tickers):
+    """
+    기준일의 시장별 티커 목록을 받아 유니버스 티커의 시장 구분을 {티커: 'KOSPI'|'KOSDAQ'}로 반환합니다.
+    - 시장마다 한 번씩만 호출하므로 티커 수와 관계없이 요청 수가 일정합니다.
+    """
+    universe = set(tickers)
+    markets = {}
+    for market in MARKETS:
+        for ticker in source.get_market_ticker_list(date.strftime('%Y%m%d'), market=market):
+            if ticker in universe:
+                markets[ticker] = market
+    return markets
+
+def fetch_range(source, dataset, ticker, start_date, end_date, now=None, store_dir=store.STORE_DIR, covered=None):
+    """
+    pykrx(source)로 한 구간을 받아 저장소에 기록하고, 확정된 날짜까지 조회 완료로 표시합니다.
+    - covered: 주어지면 조회 완료 기간을 바로 기록하지 않고 {dataset: [(시작일, 종료일), ...]}에 모읍니다. (ticker_groups)
+    - 새로 추가된 날짜 수를 반환합니다.
+    """
+    fetch = getattr(source, DATASET_FETCHERS[dataset])
+    df = fetch(start_date.strftime('%Y%m%d'), end_date.strftime('%Y%m%d'), ticker)
+    added = store.append(dataset, ticker, df, store_dir)
+    confirmed = (start_date, min(end_date, closed_until(now)))
+    if covered is None:
+        store.mark_covered(dataset, ticker, *confirmed, store_dir)
+    else:
+        covered.setdefault(dataset, []).append(confirmed)
+    return added
+
+def ticker_groups(source, requests, now=None, store_dir=store.STORE_DIR):
+    """
+    티커별 기간 조회 요청을 FetchScheduler 그룹 {티커: [작업, ...]}으로 만듭니다.
+    - 같은 티커의 요청은 한 그룹에서 순서대로 처리합니다. (같은 파티션 동시 쓰기 방지)
+    - 조회 완료 기간은 그룹의 마지막 작업에서 데이터셋마다 한 번에 기록합니다. (구간마다 coverage.json을 다시 쓰지 않음)
+      재시도 후에도 실패한 구간은 기록하지 않으므로 다음 실행에서 다시 요청합니다.
+    - 각 작업은 새로 추가된 날짜 수를 반환합니다. (마지막 기록 작업은 0)
+    """
+    groups, covered = {}, {}
+    for dataset, ticker, start_date, end_date in requests:
+        pending = covered.setdefault(ticker, {})
+        groups.setdefault(ticker, []).append(
+            lambda d=dataset, t=ticker, s=start_date, e=end_date, c=pending: fetch_range(source, d, t, s, e, now, store_dir, c))
+
+    def mark(ticker, pending):
+        for dataset, ranges in pending.items():
+            store.mark_covered_many(dataset, [ticker], ranges, store_dir)
+        return 0
+
+    for ticker, tasks in groups.items():
+        tasks.append(lambda t=ticker: mark(t, covered[t]))
+    return groups
+
+def fetch_snapshot(source, date, tickers):
+    """
+    한 거래일의 전 종목 스냅샷(OHLCV·시가총액)을 받아 유니버스 티커만 남깁니다.
+    - 반환값: {dataset: '날짜' 컬럼이 추가된 티커 인덱스 DataFrame}
+    """
+    universe = set(tickers)
+    frames = {}
+    for dataset, fetch_name in DATASET_SNAPSHOT_FETCHERS.items():
+        df = getattr(source, fetch_name)(date.strftime('%Y%m%d'), market='ALL')
+        df = df[df.index.isin(universe)]
+        # 휴장일 등 값이 모두 0인 행은 저장하지 않습니다.
+        df = df[(df != 0).any(axis=1)].copy()
+        df['날짜'] = date
+        frames[dataset] = df
+    return frames
+
+def store_snapshots(snapshots, tickers, now=None, store_dir=store.STORE_DIR):
+    """
+    날짜별 스냅샷({날짜: {dataset: DataFrame}})을 티커 단위로 모아 저장소에 한 번씩 기록합니다.
+    - 티커별 기간 조회와 같은 파티션 구조로 저장되므로 load_all_data는 그대로 사용할 수 있습니다.
+    - 받은 날짜는 (데이터가 없던 티커 포함) 확정된 날까지 조회 완료로 표시합니다.
+    - 새로 추가된 날짜 수를 반환합니다.
+    """
+    added = 0
+    dates = sorted(snapshots)
+    for dataset in DATASET_SNAPSHOT_FETCHERS:
+        frames = [snapshots[date][dataset] for date in dates if not snapshots[date][dataset].empty]
+        combined = pd.concat(frames) if frames else pd.DataFrame()
+        for ticker, rows in (combined.groupby(level=0) if not combined.empty else []):
+            added += store.append(dataset, ticker, rows.reset_index(drop=True), store_dir)
+
+        confirmed = [date for date in dates if date <= closed_until(now)]
+        if confirmed:
+            all_days = expected_trading_days(confirmed[0], confirmed[-1])
+            ranges = _to_ranges(all_days, all_days.isin(confirmed), max_gap=0)
+            store.mark_covered_many(dataset, tickers, ranges, store_dir)
+    return added
@@ -0,0 +1,63 @@
+import json
+import os
+
+# --- 설정 변수 ---
+FONT_CACHE_FILE = './data/cache/font.json'
+# 먼저 확인할 폰트 파일 (Windows 맑은 고딕)과, 없으면 찾을 설치된 한글 폰트 이름 (앞에서부터)
+FONT_FILES = ['c:/Windows/Fonts/malgun.ttf']
+FONT_NAMES = ['Malgun Gothic', 'AppleGothic', 'NanumGothic', 'NanumBarunGothic', 'Noto Sans CJK KR', 'Noto Sans KR', 'UnDotum']
+
+_resolved = {}
+
+
+def _find_font():
+    """설치된 한글 폰트를 찾아 {'name', 'path'}로 반환합니다. (없으면 name이 None)"""
+    from matplotlib import font_manager as fm
+
+    for path in FONT_FILES:
+        if os.path.exists(path):
+            return {'name': fm.FontProperties(fname=path).get_name(), 'path': path}
+    installed = {font.name: font.fname for font in fm.fontManager.ttflist}
+    for name in FONT_NAMES:
+        if name in installed:
+            return {'name': name, 'path': installed[name]}
+    return {'name': None, 'path': None}
+
+def resolve_korean_font(cache_file=FONT_CACHE_FILE):
+    """
+    한글 폰트 이름과 파일 경로를 반환합니다.
+    - 프로세스 안에서는 메모리에, 프로세스 간에는 cache_file에 저장해 폰트 목록을 매번 훑지 않습니다.
+    - 캐시한 폰트 파일이 없어졌으면 다시 찾습니다. (못 찾은 결과도 저장하므로, 폰트를 새로 설치했다면 캐시 파일을 지우세요)
+    """
+    if cache_file in _resolved:
+        return _resolved[cache_file]
+    font = None
+    if os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                font = json.load(f)
+        except (OSError, ValueError):
+            font = None
+        if font and font.get('path') and not os.path.exists(font['path']):
+            font = None
+    if font is None:
+        font = _find_font()
+        os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump(font, f, ensure_ascii=False)
+    _resolved[cache_file] = font
+    return font
+
+def setup_korean_font():
+    """matplotlib 기본 폰트를 한글 폰트로 설정합니다. (그래프를 그리는 프로세스마다 한 번씩 호출)"""
+    import matplotlib.pyplot as plt
+    from matplotlib import font_manager as fm
+
+    font = resolve_korean_font()
+    if font['name']:
+        if font['path'] not in {entry.fname for entry in fm.fontManager.ttflist}:
+            fm.fontManager.addfont(font['path'])
+        plt.rc('font', family=font['name'])
+    else:
+        print("경고: 한글 폰트를 찾을 수 없습니다. 그래프의 한글이 깨질 수 있습니다.")
+    plt.rcParams['axes.unicode_minus'] = False # 마이너스 폰트 깨짐 방지
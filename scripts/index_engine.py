@@ -0,0 +1,320 @@
+import codecs
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+import trading_calendar
+
+# 인덱스 계산에 필요한 컬럼 ('날짜', 'ticker' 외) - loader는 이 컬럼만 읽습니다.
+REQUIRED_COLUMNS = ['시가총액']
+
+def calculate_initial_index(df_base):
+    """
+    최초 인덱스와 기준 시가총액을 계산합니다.
+    - 기준일의 모든 종목의 시가총액 합을 기준 시가총액으로 설정합니다.
+    - 최초 인덱스 값은 100으로 설정합니다.
+    """
+    base_market_cap = df_base['시가총액'].sum()
+    base_index = 100.0
+    return base_index, base_market_cap
+
+def calculate_deajeon_index(current_market_cap, base_market_cap, base_index=100.0):
+    """
+    현재 시가총액을 바탕으로 deajeon_index를 계산합니다.
+    공식: 현재 인덱스 = 기준 인덱스 * (현재 시가총액 합 / 기준 시가총액 합)
+    """
+    if base_market_cap == 0:
+        return base_index
+    return base_index * (current_market_cap / base_market_cap)
+
+def holiday_mask(dates):
+    """
+    날짜 배열(DatetimeIndex)의 공휴일 여부를 boolean 배열로 반환합니다.
+    - is_holiday()를 하루씩 부르는 대신 디스크에 캐시된 거래일 달력에서 한 번에 조회합니다.
+    """
+    return trading_calendar.holiday_mask(dates)
+
+def build_market_cap_matrix(all_stock_data, dates, tickers=None):
+    """
+    (날짜, ticker) 행 단위 데이터를 날짜 × 티커 행렬로 한 번에 변환합니다.
+    - caps: 날짜별·티커별 시가총액 합 (같은 날짜에 중복 행이 있으면 합산)
+    - present: 해당 날짜에 티커의 행이 하나라도 있는지 여부
+    - ticker_labels: 행렬의 열 순서 (티커 오름차순)
+    - tickers가 주어지면 데이터에 없는 티커도 빈 열로 포함합니다.
+    """
+    ticker_labels = pd.Index(sorted(set(all_stock_data['ticker']) | set(tickers or [])))
+    ticker_codes = ticker_labels.get_indexer(all_stock_data['ticker'])
+    date_pos = dates.get_indexer(all_stock_data['날짜'])
+    valid = date_pos >= 0
+
+    values = all_stock_data['시가총액'].to_numpy()
+    if values.dtype.kind == 'f':
+        values = np.nan_to_num(values)
+    else:
+        values = values.astype(np.int64)
+
+    caps = np.zeros((len(dates), len(ticker_labels)), dtype=values.dtype)
+    np.add.at(caps, (date_pos[valid], ticker_codes[valid]), values[valid])
+    present = np.zeros((len(dates), len(ticker_labels)), dtype=bool)
+    present[date_pos[valid], ticker_codes[valid]] = True
+    return caps, present, ticker_labels.to_numpy()
+
+def compute_index_loop(all_stock_data, first_data_date, end_date, base_index, base_market_cap):
+    """
+    기존 일자별 반복 방식으로 deajeon_index를 계산합니다.
+    - 매일 전체 데이터를 필터링하므로 O(일수 × 행수)입니다.
+    - 벡터화 엔진(compute_index_vectorized)의 회귀 검증 기준으로 남겨둔 구현입니다.
+    """
+    from holidayskr import is_holiday
+
+    date_range = pd.date_range(start=first_data_date, end=end_date)
+    deajeon_index_results = []
+
+    # 각 티커의 첫 거래일 기록
+    first_appearance = all_stock_data.groupby('ticker', observed=True)['날짜'].min().to_dict()
+
+    for current_date in tqdm(date_range):
+        log_message = []
+        is_hday = is_holiday(current_date.strftime('%Y-%m-%d'))
+
+        # 현재 날짜의 데이터 필터링
+        daily_data = all_stock_data[all_stock_data['날짜'] == current_date]
+
+        # --- 시가총액 저장을 위한 변수 초기화 ---
+        market_cap_for_day = None
+
+        # 공휴일 데이터 존재 여부 확인
+        if is_hday:
+            if not daily_data.empty:
+                tickers_on_holiday = ', '.join(daily_data['ticker'].unique())
+                log_message.append(f"공휴일에 다음 티커의 데이터가 존재: {tickers_on_holiday}")
+
+            # 결과 저장 및 다음 날짜로 이동
+            deajeon_index_results.append({
+                "날짜": current_date,
+                "deajeon_index": None,
+                "시가총액": None, # 공휴일은 시가총액도 None
+                "특이사항": ' '.join(log_message) if log_message else "공휴일"
+            })
+            continue
+
+        # deajeon_index 산출 (공휴일이 아닌 경우)
+        if not daily_data.empty:
+            current_market_cap = daily_data['시가총액'].sum()
+            market_cap_for_day = current_market_cap
+            index_value = calculate_deajeon_index(current_market_cap, base_market_cap, base_index)
+        else:
+            # 데이터가 없으면 이전 값 유지
+            if deajeon_index_results:
+                last_valid_index = next((res['deajeon_index'] for res in reversed(deajeon_index_results) if pd.notna(res['deajeon_index'])), None)
+                index_value = last_valid_index
+            else:
+                index_value = base_index
+
+        # 상장 이후 데이터 누락 확인
+        present_tickers = set(daily_data['ticker'])
+        for ticker, start_date in first_appearance.items():
+            if current_date >= start_date and ticker not in present_tickers:
+                log_message.append(f"데이터 누락: {ticker}")
+
+        deajeon_index_results.append({
+            "날짜": current_date,
+            "deajeon_index": index_value,
+            "시가총액": market_cap_for_day,
+            "특이사항": ' '.join(log_message)
+        })
+
+    df_result = pd.DataFrame(deajeon_index_results)
+
+    # deajeon_index와 시가총액 모두 이전 값으로 채우기
+    df_result['deajeon_index'] = df_result['deajeon_index'].ffill()
+    df_result['시가총액'] = df_result['시가총액'].ffill()
+    return df_result
+
+def compute_index_vectorized(all_stock_data, first_data_date, end_date, base_index, base_market_cap,
+                             first_appearance=None, last_index=None, last_market_cap=None):
+    """
+    날짜 × 티커 시가총액 행렬을 한 번만 만든 뒤 배열 연산으로 deajeon_index를 계산합니다.
+    - 결과(컬럼, 값, 특이사항 문자열, dtype)는 compute_index_loop와 동일합니다.
+    - first_appearance, last_index, last_market_cap은 이어서 계산할 때(증분 모드) 이전 상태를 넘겨받는 값입니다.
+    """
+    dates = pd.date_range(start=first_data_date, end=end_date)
+    first_appearance = dict(first_appearance or {})
+    caps, present, ticker_labels = build_market_cap_matrix(all_stock_data, dates, tickers=list(first_appearance))
+
+    is_hday = holiday_mask(dates)
+    has_data = present.any(axis=1)
+    trading = has_data & ~is_hday
+
+    # 1. 날짜별 시가총액 합과 인덱스 (공휴일·데이터 없는 날은 NaN 후 이전 값으로 채움)
+    day_caps = caps.sum(axis=1)
+    if base_market_cap == 0:
+        raw_index = np.full(len(dates), base_index)
+    else:
+        raw_index = base_index * (day_caps / base_market_cap)
+    index_values = np.where(trading, raw_index, np.nan)
+    if last_index is None and len(dates) and not is_hday[0] and not has_data[0]:
+        index_values[0] = base_index
+
+    if trading.all():
+        market_caps = pd.Series(day_caps)
+    else:
+        market_caps = pd.Series(np.where(trading, day_caps, np.nan))
+
+    # 2. 특이사항: 상장 이후 누락(평일) / 공휴일 데이터 존재(공휴일)
+    # 기간 안에 행이 하나도 없는 티커는 상장 전으로 봅니다. (누락으로 표시하지 않음)
+    first_pos = np.where(present.any(axis=0), present.argmax(axis=0), len(dates))
+    for col, ticker in enumerate(ticker_labels):
+        if ticker in first_appearance:
+            first_pos[col] = dates.searchsorted(pd.Timestamp(first_appearance[ticker]))
+    listed = np.arange(len(dates))[:, None] >= first_pos[None, :]
+    missing = listed & ~present & ~is_hday[:, None]
+    holiday_rows = present & is_hday[:, None]
+
+    notes = np.where(is_hday, "공휴일", "").astype(object)
+    missing_tokens = np.array([f"데이터 누락: {ticker}" for ticker in ticker_labels], dtype=object)
+    for row in np.flatnonzero(missing.any(axis=1)):
+        notes[row] = ' '.join(missing_tokens[missing[row]])
+    for row in np.flatnonzero(holiday_rows.any(axis=1)):
+        notes[row] = f"공휴일에 다음 티커의 데이터가 존재: {', '.join(ticker_labels[holiday_rows[row]])}"
+
+    df_result = pd.DataFrame({
+        "날짜": dates,
+        "deajeon_index": index_values,
+        "시가총액": market_caps,
+        "특이사항": notes.tolist(),
+    })
+    df_result['deajeon_index'] = df_result['deajeon_index'].ffill()
+    df_result['시가총액'] = df_result['시가총액'].ffill()
+    if last_index is not None:
+        df_result['deajeon_index'] = df_result['deajeon_index'].fillna(last_index)
+    if last_market_cap is not None:
+        df_result['시가총액'] = df_result['시가총액'].fillna(last_market_cap)
+    return df_result
+
+def compute_index(all_stock_data, first_data_date, end_date, base_index, base_market_cap, engine='vectorized'):
+    """
+    설정된 엔진으로 deajeon_index 시계열을 계산합니다.
+    - engine='vectorized': 행렬 기반 엔진 (기본값)
+    - engine='loop': 기존 일자별 반복 엔진 (회귀 검증용)
+    """
+    if engine == 'loop':
+        return compute_index_loop(all_stock_data, first_data_date, end_date, base_index, base_market_cap)
+    if engine == 'vectorized':
+        return compute_index_vectorized(all_stock_data, first_data_date, end_date, base_index, base_market_cap)
+    raise ValueError(f"알 수 없는 인덱스 엔진입니다: {engine}")
+
+def build_index_state(df_result, all_stock_data, base_index, base_market_cap, first_data_date, tickers, series_path,
+                      previous_state=None):
+    """
+    증분 계산에 필요한 최소 상태(체크포인트)를 만듭니다.
+    - 기준 시가총액·기준 인덱스, 마지막 유효 인덱스/시가총액과 그 날짜
+    - 티커별 최초 등장일, 마지막 처리일, 결과 CSV 경로 (CSV에서 마지막 유효 행까지의 크기는 save_series가 더함)
+    """
+    first_appearance = dict(previous_state['first_appearance']) if previous_state else {}
+    for ticker, first_date in all_stock_data.groupby('ticker', observed=True)['날짜'].min().items():
+        first_date = first_date.strftime('%Y-%m-%d')
+        first_appearance[ticker] = min(first_appearance.get(ticker, first_date), first_date)
+
+    # 시가총액이 실제로 계산된 마지막 날(공휴일·데이터 없는 날 제외)을 기준으로 삼습니다.
+    valid_dates = set(all_stock_data['날짜'])
+    is_hday = holiday_mask(pd.DatetimeIndex(df_result['날짜']))
+    valid_rows = df_result[df_result['날짜'].isin(valid_dates) & ~is_hday]
+    if not valid_rows.empty:
+        last_row = valid_rows.iloc[-1]
+        last_valid_date = last_row['날짜'].strftime('%Y-%m-%d')
+        last_index = float(last_row['deajeon_index'])
+        last_market_cap = float(last_row['시가총액'])
+    else:
+        last_valid_date = previous_state['last_valid_date']
+        last_index = previous_state['last_index']
+        last_market_cap = previous_state['last_market_cap']
+
+    return {
+        "tickers": sorted(tickers),
+        "first_data_date": pd.Timestamp(first_data_date).strftime('%Y-%m-%d'),
+        "base_index": float(base_index),
+        "base_market_cap": int(base_market_cap),
+        "first_appearance": first_appearance,
+        "last_valid_date": last_valid_date,
+        "last_index": last_index,
+        "last_market_cap": last_market_cap,
+        "last_processed_date": df_result['날짜'].iloc[-1].strftime('%Y-%m-%d') if len(df_result)
+                               else previous_state['last_processed_date'],
+        "series_path": series_path,
+    }
+
+def save_index_state(state, state_path):
+    """증분 계산 상태를 JSON 파일로 저장합니다."""
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, state_path)
+
+def load_index_state(state_path, tickers):
+    """
+    저장된 증분 계산 상태를 불러옵니다.
+    - 상태 파일이나 결과 CSV가 없거나, 티커 구성이 바뀌었거나, 결과 CSV가 상태와 맞지 않으면 None을 반환합니다. (전체 재계산 필요)
+    """
+    if not os.path.exists(state_path):
+        return None
+    with open(state_path, encoding='utf-8') as f:
+        state = json.load(f)
+    if state.get('tickers') != sorted(tickers):
+        print("경고: 티커 구성이 저장된 상태와 달라 전체 재계산이 필요합니다.")
+        return None
+    if not os.path.exists(state.get('series_path', '')):
+        print(f"경고: 이전 결과 파일({state.get('series_path')})을 찾을 수 없어 전체 재계산이 필요합니다.")
+        return None
+    if 'series_bytes' not in state or os.path.getsize(state['series_path']) < state['series_bytes']:
+        print(f"경고: 이전 결과 파일({state['series_path']})이 상태 파일과 맞지 않아 전체 재계산이 필요합니다.")
+        return None
+    return state
+
+def _csv_bytes(df, header=False):
+    return df.to_csv(index=False, header=header).encode('utf-8')
+
+def save_series(df_result, series_path, last_valid_date, previous_state=None):
+    """
+    시계열을 CSV(utf-8-sig)로 저장하고, 파일에서 마지막 유효일 행까지의 바이트 수를 반환합니다. (상태의 series_bytes)
+    - previous_state가 없으면 df_result 전체를 새로 씁니다.
+    - previous_state가 있으면(증분) 이전 결과 파일을 마지막 유효일 행 뒤에서 자르고 df_result(새 행)만 이어 쓴 뒤
+      series_path로 이름을 바꿉니다. 이전 시계열을 읽거나 다시 쓰지 않으므로 쓰는 양은 새 날짜 수에 비례합니다.
+    """
+    valid = (df_result['날짜'] <= pd.Timestamp(last_valid_date)).to_numpy()
+    if previous_state is None:
+        f = open(series_path, 'wb')
+        f.write(codecs.BOM_UTF8 + _csv_bytes(df_result.iloc[:0], header=True))
+    else:
+        f = open(previous_state['series_path'], 'r+b')
+        f.truncate(previous_state['series_bytes'])
+        f.seek(0, os.SEEK_END)
+    with f:
+        # 마지막 유효일 이후의 행(공휴일·데이터 미수집일)은 다음 증분 실행에서 다시 계산하므로 그 앞에서 크기를 기록합니다.
+        f.write(_csv_bytes(df_result[valid]))
+        series_bytes = f.tell()
+        f.write(_csv_bytes(df_result[~valid]))
+    if previous_state is not None:
+        os.replace(previous_state['series_path'], series_path)
+    return series_bytes
+
+def compute_index_increment(new_stock_data, state, end_date):
+    """
+    저장된 상태 이후의 날짜만 계산해 새 행만 반환합니다. (기존 시계열에 이어 쓰는 것은 save_series)
+    - 마지막 유효일 다음 날부터 end_date까지만 계산하고 이전 결과 파일은 읽지 않으므로, 실행 시간은 새 날짜 수에 비례합니다.
+    - 마지막 유효일 이후에 기록된 행(공휴일, 데이터 미수집일)은 다시 계산합니다.
+    """
+    start_date = pd.Timestamp(state['last_valid_date']) + pd.Timedelta(days=1)
+    if start_date > pd.Timestamp(end_date):
+        return pd.DataFrame({'날짜': pd.DatetimeIndex([]), 'deajeon_index': [], '시가총액': [], '특이사항': []})
+
+    new_stock_data = new_stock_data[new_stock_data['날짜'] >= start_date]
+    df_new = compute_index_vectorized(
+        new_stock_data, start_date, end_date, state['base_index'], state['base_market_cap'],
+        first_appearance={ticker: pd.Timestamp(day) for ticker, day in state['first_appearance'].items()},
+        last_index=state['last_index'], last_market_cap=state['last_market_cap'],
+    )
+    return df_new
@@ -0,0 +1,245 @@
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+import trading_calendar
+from analytics import latest_index_csv
+
+# --- 설정 변수 ---
+DEAJEON_INDEX_DIR = './data/deajeon_index'
+HOST = '127.0.0.1'
+PORT = 8000
+RELOAD_INTERVAL = 5.0          # 새 일별 파일을 확인하는 간격 (초)
+RANGE_CACHE_SIZE = 1024        # 응답 본문을 보관할 (해상도, 기간) 조합 수
+RESOLUTIONS = {'weekly': 'W-FRI', 'monthly': 'M'}   # 미리 집계할 해상도 (pandas 기간 단위)
+
+
+def _rows(df):
+    """DataFrame의 각 행을 JSON 문자열로 미리 만들어 둡니다. (요청마다 직렬화하지 않도록)"""
+    records = df.assign(날짜=df['날짜'].dt.strftime('%Y-%m-%d')).to_dict('records')
+    return [json.dumps(record, ensure_ascii=False) for record in records]
+
+def _ohlc(daily, freq):
+    """일별 시계열을 기간별 OHLC(시가·고가·저가·종가)와 기간 말 시가총액으로 집계합니다. (날짜: 기간 첫 거래일)"""
+    periods = daily['날짜'].dt.to_period(freq)
+    grouped = daily.groupby(periods, sort=True)
+    return pd.DataFrame({
+        '날짜': grouped['날짜'].first().to_numpy(),
+        '시가': grouped['deajeon_index'].first().to_numpy(),
+        '고가': grouped['deajeon_index'].max().to_numpy(),
+        '저가': grouped['deajeon_index'].min().to_numpy(),
+        '종가': grouped['deajeon_index'].last().to_numpy(),
+        '시가총액': grouped['시가총액'].last().to_numpy(),
+    })
+
+
+class SeriesSnapshot:
+    """
+    한 번 읽은 인덱스 CSV와 미리 계산한 해상도별 시계열입니다. (읽기 전용, 교체는 통째로)
+    - 해상도마다 날짜 배열(이진 탐색용)과 행별 JSON 문자열을 들고 있습니다.
+    - version: 파일 이름·크기·수정 시각으로 만든 값으로, ETag에 들어갑니다.
+    """
+
+    def __init__(self, path):
+        stat = os.stat(path)
+        self.path = path
+        self.signature = (os.path.basename(path), stat.st_size, stat.st_mtime_ns)
+        self.version = f'{os.path.basename(path)[-12:-4]}.{stat.st_size:x}.{stat.st_mtime_ns:x}'
+
+        df = pd.read_csv(path, encoding='utf-8-sig', usecols=['날짜', 'deajeon_index', '시가총액'], parse_dates=['날짜'])
+        # 주말·휴장일에 직전 값으로 채워진 행은 빼고 거래일만 제공합니다.
+        daily = df[trading_calendar.is_trading_day(df['날짜'])].dropna().sort_values('날짜').reset_index(drop=True)
+        frames = {'daily': daily, **{name: _ohlc(daily, freq) for name, freq in RESOLUTIONS.items()}}
+        self.series = {
+            name: (frame['날짜'].to_numpy(dtype='datetime64[ns]'), _rows(frame)) for name, frame in frames.items()
+        }
+        self.first_date = daily['날짜'].iloc[0] if len(daily) else None
+        self.last_date = daily['날짜'].iloc[-1] if len(daily) else None
+
+
+class IndexService:
+    """
+    최신 deajeon_index CSV를 메모리에 올려 두고 기간 조회에 답합니다.
+    - 같은 (버전, 해상도, 행 범위)의 응답 본문은 LRU로 보관하고, ETag는 버전과 행 범위로 만듭니다.
+    - reload()는 새 파일(이름·크기·수정 시각이 다름)이 있을 때만 다시 읽고, 스냅샷을 통째로 바꿔 끼웁니다.
+    """
+
+    def __init__(self, directory=DEAJEON_INDEX_DIR, cache_size=RANGE_CACHE_SIZE):
+        self.directory = directory
+        self.cache_size = cache_size
+        self.snapshot = None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self):
+        """새 일별 파일이 있으면 읽어 교체합니다. 교체했으면 True"""
+        path = latest_index_csv(self.directory)
+        if path is None:
+            return False
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        current = self.snapshot
+        if current is not None and current.signature == (os.path.basename(path), stat.st_size, stat.st_mtime_ns):
+            return False
+        try:
+            snapshot = SeriesSnapshot(path)
+        except (OSError, ValueError, KeyError) as e:
+            # 파일을 쓰는 중이면 다음 확인 때 다시 읽습니다.
+            print(f"경고: '{path}' 읽기 실패, 기존 데이터를 계속 제공합니다. - {e}")
+            return False
+        with self._lock:
+            self.snapshot = snapshot
+            self._cache.clear()
+        print(f"데이터 로드: '{path}' (거래일 {len(snapshot.series['daily'][1])}개)")
+        return True
+
+    def watch(self, interval=RELOAD_INTERVAL):
+        """interval초마다 reload()를 호출하는 데몬 스레드를 시작합니다."""
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.reload()
+        thread = threading.Thread(target=loop, name='index-reload', daemon=True)
+        thread.start()
+        return thread
+
+    def query(self, resolution='daily', start=None, end=None):
+        """
+        기간 조회 결과를 (JSON 본문 bytes, ETag)로 반환합니다.
+        - start, end: 'YYYY-MM-DD' (양 끝 포함, 생략하면 처음/끝)
+        - 잘못된 해상도나 날짜는 ValueError
+        """
+        snapshot = self.snapshot
+        if snapshot is None:
+            raise LookupError("제공할 인덱스 파일이 없습니다.")
+        if resolution not in snapshot.series:
+            raise ValueError(f"지원하지 않는 해상도입니다: {resolution} (daily, {', '.join(RESOLUTIONS)})")
+        dates, rows = snapshot.series[resolution]
+        try:
+            lo = 0 if start is None else int(dates.searchsorted(np.datetime64(pd.Timestamp(start), 'ns'), side='left'))
+            hi = len(dates) if end is None else int(dates.searchsorted(np.datetime64(pd.Timestamp(end), 'ns'), side='right'))
+        except ValueError:
+            raise ValueError(f"날짜 형식이 잘못되었습니다: start={start}, end={end} (YYYY-MM-DD)") from None
+        hi = max(hi, lo)
+
+        key = (snapshot.version, resolution, lo, hi)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+        body = ('{"version":"%s","resolution":"%s","count":%d,"data":[%s]}' % (
+            snapshot.version, resolution, hi - lo, ','.join(rows[lo:hi]))).encode('utf-8')
+        entry = (body, f'"{snapshot.version}-{resolution}-{lo}-{hi}"')
+        with self._lock:
+            if snapshot is self.snapshot:
+                self._cache[key] = entry
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return entry
+
+    def health(self):
+        snapshot = self.snapshot
+        if snapshot is None:
+            return {'status': 'empty'}
+        return {
+            'status': 'ok', 'version': snapshot.version, 'path': snapshot.path,
+            'first_date': f'{snapshot.first_date:%Y-%m-%d}' if snapshot.first_date is not None else None,
+            'last_date': f'{snapshot.last_date:%Y-%m-%d}' if snapshot.last_date is not None else None,
+            'resolutions': list(snapshot.series),
+        }
+
+
+class IndexRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET /series?resolution=daily|weekly|monthly&start=YYYY-MM-DD&end=YYYY-MM-DD
+    GET /health
+    - If-None-Match가 ETag와 같으면 본문 없이 304를 돌려줍니다.
+    - HTTP/1.1 keep-alive로 같은 연결을 재사용합니다.
+    """
+    protocol_version = 'HTTP/1.1'
+    # 헤더와 본문을 따로 쓰므로 Nagle 알고리즘을 끄지 않으면 keep-alive 응답마다 지연 ACK(~40ms)를 기다립니다.
+    disable_nagle_algorithm = True
+    service = None
+
+    def log_message(self, format, *args):
+        # 요청마다 표준 에러에 쓰지 않습니다. (초당 수천 건 처리 시 병목)
+        pass
+
+    def _send(self, status, body=b'', etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        if status != 304:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _error(self, status, message):
+        self._send(status, json.dumps({'error': message}, ensure_ascii=False).encode('utf-8'))
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == '/health':
+            self._send(200, json.dumps(self.service.health(), ensure_ascii=False).encode('utf-8'))
+            return
+        if url.path != '/series':
+            self._error(404, f"없는 경로입니다: {url.path}")
+            return
+        try:
+            body, etag = self.service.query(params.get('resolution', 'daily'), params.get('start'), params.get('end'))
+        except ValueError as e:
+            self._error(400, str(e))
+            return
+        except LookupError as e:
+            self._error(503, str(e))
+            return
+        if etag in (tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')):
+            self._send(304, etag=etag)
+        else:
+            self._send(200, body, etag)
+
+
+def make_server(service, host=HOST, port=PORT):
+    """service를 제공하는 ThreadingHTTPServer를 만듭니다. (요청마다 스레드, 호출자가 serve_forever)"""
+    handler = type('BoundIndexRequestHandler', (IndexRequestHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='deajeon_index 조회 서버 (읽기 전용)')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--dir', default=DEAJEON_INDEX_DIR, help='인덱스 CSV 폴더')
+    parser.add_argument('--reload-interval', type=float, default=RELOAD_INTERVAL, help='새 파일 확인 간격 (초)')
+    args = parser.parse_args()
+
+    service = IndexService(args.dir)
+    if service.snapshot is None:
+        print("경고: 인덱스 파일이 아직 없습니다. 파일이 생기면 자동으로 불러옵니다.")
+    service.watch(args.reload_interval)
+    server = make_server(service, args.host, args.port)
+    print(f"✅ http://{args.host}:{args.port}/series?resolution=daily&start=2025-01-01 에서 제공 중 (종료: Ctrl+C)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
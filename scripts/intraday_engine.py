@@ -0,0 +1,194 @@
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import store
+from index_engine import load_index_state
+
+# --- 설정 변수 ---
+DEAJEON_INDEX_DIR = './data/deajeon_index'
+INDEX_STATE_FILE = 'index_state.json'
+SNAPSHOT_INTERVAL = 1.0     # 스냅샷을 내보내는 간격 (초)
+
+
+class IntradayIndex:
+    """
+    장중 deajeon_index를 틱 단위로 갱신합니다.
+    - 구성 종목의 상장주식수와 종목별 시가총액을 들고, 시가총액 합을 변동분만큼만 고칩니다. (틱당 O(1))
+    - 종목별 시가총액은 정수(주식수 × 가격, 가격이 소수이면 원 단위로 반올림)로 유지하므로 틱이 많이 쌓여도 오차가 누적되지 않습니다.
+      (가격에 시가총액 / 상장주식수를 그대로 넣으면 그 종목의 시가총액이 저장된 값과 정확히 같아집니다.)
+    - 값 = base_index × (현재 시가총액 합 / base_market_cap) — calculate_deajeon_index와 같은 식입니다.
+    """
+
+    def __init__(self, shares, base_market_cap, base_index=100.0, last_prices=None):
+        self.shares = {ticker: int(count) for ticker, count in shares.items()}
+        self.prices = {}
+        self.caps = {}
+        self.base_market_cap = base_market_cap
+        self.base_index = base_index
+        self.market_cap = 0
+        self.ticks = 0
+        for ticker, price in (last_prices or {}).items():
+            self.update(ticker, price)
+        self.ticks = 0
+
+    def update(self, ticker, price):
+        """가격 틱 하나를 반영합니다. 구성 종목이 아니면 무시하고 False를 반환합니다."""
+        shares = self.shares.get(ticker)
+        if shares is None:
+            return False
+        cap = int(round(shares * price))
+        self.market_cap += cap - self.caps.get(ticker, 0)
+        self.caps[ticker] = cap
+        self.prices[ticker] = price
+        self.ticks += 1
+        return True
+
+    @property
+    def value(self):
+        if self.base_market_cap == 0:
+            return self.base_index
+        return self.base_index * (self.market_cap / self.base_market_cap)
+
+    def snapshot(self):
+        """현재 인덱스 값과 시가총액 합, 누적 틱 수를 dict로 반환합니다."""
+        return {
+            '시각': pd.Timestamp.now(),
+            'deajeon_index': self.value,
+            '시가총액': self.market_cap,
+            '틱 수': self.ticks,
+            '가격 있는 종목 수': len(self.prices),
+        }
+
+    @classmethod
+    def from_store(cls, tickers, date, base_market_cap, base_index=100.0, store_dir=store.STORE_DIR):
+        """
+        저장소에서 date 직전 거래일의 가격과 date 기준 상장주식수로 엔진을 만듭니다.
+        - 상장주식수는 date 이전 가장 최근 값을 쓰고, 직전 가격이 없는 종목(신규 상장)은 첫 틱에 더해집니다.
+        - 저장된 OHLCV는 수정주가일 수 있으므로 직전 가격은 시가총액 / 상장주식수로 구합니다. (나머지를 버리지 않음)
+        """
+        date = pd.Timestamp(date).normalize()
+        marcap = store.read('marcap', tickers, date - pd.Timedelta(days=31), date,
+                            columns=['시가총액', '상장주식수'], store_dir=store_dir)
+        marcap = marcap[marcap['상장주식수'] > 0].sort_values('날짜')
+        shares = marcap.groupby('ticker', observed=True)['상장주식수'].last().to_dict()
+        previous = marcap[marcap['날짜'] < date].groupby('ticker', observed=True).last()
+        last_prices = (previous['시가총액'] / previous['상장주식수']).to_dict()
+        return cls(shares, base_market_cap, base_index, last_prices)
+
+def replay_ticks(date, tickers, ticks_per_bar=4, store_dir=store.STORE_DIR):
+    """
+    저장된 일봉(OHLCV)으로 하루치 가짜 틱 목록을 만듭니다. (로컬 재생·검증용)
+    - 종목마다 시가 → 고가/저가 → 저가/고가 → 종가 순의 경로를 ticks_per_bar개로 나누고 종목들을 번갈아 내보냅니다.
+    - 수정주가를 그날 실제 가격(시가총액 / 상장주식수) 기준으로 되돌리고, 중간 틱은 원 단위로 반올림합니다.
+    - 마지막 틱은 시가총액 / 상장주식수(소수)이므로 엔진의 종목별 시가총액이 저장된 시가총액과 정확히 같아져,
+      그날 데이터가 있는 종목만으로 엔진을 만들었다면 재생이 끝난 값이 calculate_deajeon_index(그날 시가총액 합)와 같습니다.
+      (종목별 시가총액이 2**52원보다 작으면 주식수 × 가격의 반올림이 저장된 시가총액으로 정확히 돌아옵니다.)
+    - 반환값: (티커 배열, 가격 배열 float64)
+    """
+    date = pd.Timestamp(date).normalize()
+    bars = store.read('ohlcv', tickers, date, date, columns=['시가', '고가', '저가', '종가'], store_dir=store_dir)
+    caps = store.read('marcap', tickers, date, date, columns=['시가총액', '상장주식수'], store_dir=store_dir)
+    bars = pd.merge(bars, caps, on=['날짜', 'ticker'])
+    bars = bars[(bars['종가'] > 0) & (bars['상장주식수'] > 0)]
+    close = (bars['시가총액'] / bars['상장주식수']).to_numpy()
+    factor = close / bars['종가'].to_numpy()
+    up = (bars['종가'] >= bars['시가']).to_numpy()
+    path = np.column_stack([
+        bars['시가'], np.where(up, bars['저가'], bars['고가']), np.where(up, bars['고가'], bars['저가']), bars['종가'],
+    ]) * factor[:, None]
+    # 꼭짓점 사이를 선형 보간해 ticks_per_bar개의 가격을 만들고, 마지막 틱은 정확히 종가(시가총액 / 상장주식수)로 맞춥니다.
+    positions = np.linspace(0, 3, max(ticks_per_bar, 2))
+    prices = np.stack([np.interp(positions, np.arange(4), row) for row in path]) if len(path) else np.empty((0, 0))
+    prices = np.rint(prices)
+    if len(path):
+        prices[:, -1] = close
+    ticker_labels = bars['ticker'].astype(str).to_numpy()
+    # 시간 순서: 같은 위치의 틱을 종목별로 번갈아 (열 우선)
+    return np.tile(ticker_labels, prices.shape[1]), prices.T.reshape(-1)
+
+async def replay_feed(tick_tickers, tick_prices, ticks_per_second=None, batch=1000):
+    """
+    틱 배열을 비동기로 하나씩 내보냅니다.
+    - ticks_per_second가 주어지면 그 속도에 맞춰 기다리고, 없으면 batch개마다 이벤트 루프에 양보만 합니다.
+    """
+    started = time.monotonic()
+    for i, (ticker, price) in enumerate(zip(tick_tickers, tick_prices)):
+        if ticks_per_second:
+            delay = started + i / ticks_per_second - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        elif i % batch == 0:
+            await asyncio.sleep(0)
+        yield ticker, price
+
+async def stream_snapshots(engine, feed, interval=SNAPSHOT_INTERVAL):
+    """
+    feed(비동기 틱 반복자)를 엔진에 반영하면서 interval초마다 스냅샷을 내보냅니다.
+    - 피드가 끝나면 마지막 스냅샷을 한 번 더 내보내고 종료합니다.
+    """
+    async def consume():
+        async for ticker, price in feed:
+            engine.update(ticker, price)
+
+    task = asyncio.create_task(consume())
+    try:
+        while not task.done():
+            await asyncio.wait({task}, timeout=interval)
+            yield engine.snapshot()
+        task.result()
+    finally:
+        task.cancel()
+
+def benchmark(n_ticks=1_000_000, n_tickers=2_000, seed=0):
+    """
+    무작위 틱으로 update() 처리 속도(틱/초)를 잽니다.
+    - 반환값: {'ticks', 'seconds', 'ticks_per_second'}
+    """
+    rng = np.random.default_rng(seed)
+    tickers = [f'{i:06d}' for i in range(n_tickers)]
+    engine = IntradayIndex({ticker: 1_000_000 for ticker in tickers}, base_market_cap=10 ** 12)
+    tick_tickers = [tickers[i] for i in rng.integers(0, n_tickers, n_ticks)]
+    tick_prices = rng.integers(1_000, 100_000, n_ticks).tolist()
+    started = time.perf_counter()
+    for ticker, price in zip(tick_tickers, tick_prices):
+        engine.update(ticker, price)
+    seconds = time.perf_counter() - started
+    return {'ticks': n_ticks, 'seconds': seconds, 'ticks_per_second': n_ticks / seconds}
+
+async def replay(date, tickers, state, interval=SNAPSHOT_INTERVAL, ticks_per_second=None, ticks_per_bar=4):
+    """저장된 일봉으로 하루를 재생하며 스냅샷을 출력하고, 마지막 스냅샷을 반환합니다."""
+    engine = IntradayIndex.from_store(tickers, date, state['base_market_cap'], state['base_index'])
+    tick_tickers, tick_prices = replay_ticks(date, tickers, ticks_per_bar)
+    last = None
+    started = time.perf_counter()
+    async for last in stream_snapshots(engine, replay_feed(tick_tickers, tick_prices, ticks_per_second), interval):
+        print(f"{last['시각']:%H:%M:%S} deajeon_index {last['deajeon_index']:.4f} (틱 {last['틱 수']:,})")
+    elapsed = time.perf_counter() - started
+    print(f"재생 완료: 틱 {engine.ticks:,}개, {elapsed:.2f}초 ({engine.ticks / elapsed:,.0f} 틱/초, 스냅샷 포함)")
+    return last
+
+
+if __name__ == '__main__':
+    from ticker import tickers
+
+    parser = argparse.ArgumentParser(description='장중 deajeon_index 스트리밍 엔진')
+    parser.add_argument('--replay', metavar='YYYY-MM-DD', help='저장된 일봉으로 해당 날짜를 재생합니다.')
+    parser.add_argument('--interval', type=float, default=SNAPSHOT_INTERVAL, help='스냅샷 간격 (초)')
+    parser.add_argument('--speed', type=float, default=None, help='재생 속도 (틱/초, 생략하면 최대 속도)')
+    parser.add_argument('--bench', action='store_true', help='틱 처리 속도를 측정합니다.')
+    args = parser.parse_args()
+
+    if args.bench:
+        result = benchmark()
+        print(f"update(): {result['ticks']:,}틱 {result['seconds']:.2f}초 → {result['ticks_per_second']:,.0f} 틱/초")
+    if args.replay:
+        state = load_index_state(os.path.join(DEAJEON_INDEX_DIR, INDEX_STATE_FILE), tickers)
+        if state is None:
+            print("에러: 기준 시가총액이 든 상태 파일이 없습니다. 먼저 02_calculate_index.py를 실행하세요.")
+        else:
+            asyncio.run(replay(args.replay, tickers, state, args.interval, args.speed))
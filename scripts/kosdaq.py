@@ -1,50 +1,61 @@
 import os
-import time
-from datetime import datetime, timedelta
-from tqdm import tqdm
-from pykrx import stock
-from pykrx import bond
+from datetime import datetime
 
+import pandas as pd
+
+from fetch_scheduler import RateLimitedSource, TokenBucket
+from krx_cache import CachedSource
+
+# --- 설정 변수 ---
 OHLCV_DIR = './data/kosdaq'
 MARCAP_DIR = './data/kosdaq'
-os.makedirs(OHLCV_DIR, exist_ok=True)
-os.makedirs(MARCAP_DIR, exist_ok=True)
-
-today = datetime.now()
-today_yyyymmdd = today.strftime("%Y%m%d")
-two_years_ago = today.replace(year=today.year - 50)
-two_years_later_yyyymmdd = two_years_ago.strftime("%Y%m%d")
-
-print(f"오늘 날짜 (yyyymmdd): {today_yyyymmdd}")
-print(f"2년전 날짜 (yyyymmdd): {two_years_later_yyyymmdd}")
-
-
-# for ticker in tqdm(tickers):
-tickers = stock.get_index_ticker_list(market='KOSDAQ')
-ticker = tickers[0]
-# get ticker name
-company_name = stock.get_index_ticker_name(ticker)
-
-# get OHLCV
-ohlcv_filename = f"ohlcv_{ticker}_{company_name}_{today_yyyymmdd}.csv"
-ohlcv_filepath = os.path.join(OHLCV_DIR, ohlcv_filename)
-df_ohlcv = stock.get_index_ohlcv(two_years_later_yyyymmdd, today_yyyymmdd, ticker)
-# save OHLCV
-if not os.path.exists(ohlcv_filepath):
+KOSDAQ_START = '19960701'   # 조회 시작일 (코스닥 지수 기준일, 고정해야 캐시 키가 매일 바뀌지 않습니다)
+REQUESTS_PER_SECOND = 2.0   # pykrx 호출 속도 제한 (초당, 01_save_data.py와 같음)
+
+
+def yearly_ranges(start_yyyymmdd, end_date):
+    """
+    조회 기간을 연도별 (시작, 끝) YYYYMMDD 구간으로 나눕니다.
+    - 지난 연도 구간은 매일 같은 인자로 호출되므로 캐시(만료 없음)에서 바로 읽고, 올해 구간만 실제로 조회합니다.
+    """
+    start, end = pd.Timestamp(start_yyyymmdd), pd.Timestamp(end_date).normalize()
+    ranges = []
+    for year in range(start.year, end.year + 1):
+        lo = max(start, pd.Timestamp(year, 1, 1))
+        hi = min(end, pd.Timestamp(year, 12, 31))
+        ranges.append((lo.strftime('%Y%m%d'), hi.strftime('%Y%m%d')))
+    return ranges
+
+def fetch_index_ohlcv(source, ticker, start_yyyymmdd, end_date):
+    """연도별로 나눠 받은 지수 OHLCV를 하나로 합칩니다. (날짜 중복 없음)"""
+    frames = [source.get_index_ohlcv(lo, hi, ticker) for lo, hi in yearly_ranges(start_yyyymmdd, end_date)]
+    frames = [frame for frame in frames if frame is not None and not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames)
+    return df[~df.index.duplicated(keep='last')].sort_index()
+
+
+if __name__ == '__main__':
+    from pykrx import stock as krx_stock
+
+    # 지수 목록·과거 시세는 디스크 캐시에서 먼저 찾고, 캐시에 없는 호출만 토큰 버킷을 거쳐 pykrx를 부릅니다. (오늘 데이터는 짧은 TTL)
+    stock = CachedSource(RateLimitedSource(krx_stock, TokenBucket(rate=REQUESTS_PER_SECOND)))
+    os.makedirs(OHLCV_DIR, exist_ok=True)
+    os.makedirs(MARCAP_DIR, exist_ok=True)
+
+    today = datetime.now()
+    today_yyyymmdd = today.strftime("%Y%m%d")
+    print(f"조회 기간: {KOSDAQ_START} ~ {today_yyyymmdd}")
+
+    tickers = stock.get_index_ticker_list(market='KOSDAQ')
+    ticker = tickers[0]
+    company_name = stock.get_index_ticker_name(ticker)
+
+    # 같은 날 다시 실행하면 파일을 덮어씁니다. (이어 쓰면 행이 중복됨)
+    ohlcv_filepath = os.path.join(OHLCV_DIR, f"ohlcv_{ticker}_{company_name}_{today_yyyymmdd}.csv")
+    df_ohlcv = fetch_index_ohlcv(stock, ticker, KOSDAQ_START, today)
     df_ohlcv.to_csv(ohlcv_filepath, mode='w')
-else:
-    df_ohlcv.to_csv(ohlcv_filepath, mode='a', header=False)
-
-time.sleep(1)
-
-# # get MARCAP
-# marcap_filename = f'marcap_{ticker}_{company_name}_{today_yyyymmdd}.csv'
-# marcap_filepath = os.path.join(MARCAP_DIR, marcap_filename)
-# df_marcap = stock.get_market_cap(two_years_later_yyyymmdd, today_yyyymmdd, ticker)
-# # save MARCAP
-# if not os.path.exists(marcap_filepath):
-#     df_marcap.to_csv(marcap_filepath, mode='w')
-# else:
-#     df_marcap.to_csv(marcap_filepath, mode='a', header=False)
-
-# time.sleep(1)
\ No newline at end of file
+    print(f"코스닥 지수 {len(df_ohlcv)}일치가 '{ohlcv_filepath}'에 저장되었습니다.")
+
+    print(stock.summary())
@@ -0,0 +1,147 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from fetcher import closed_until
+
+# --- 설정 변수 ---
+CACHE_DIR = './data/cache/krx'
+MAX_CACHE_BYTES = 512 * 1024 * 1024   # 캐시 전체 크기 상한 (넘으면 가장 오래 쓰지 않은 항목부터 삭제)
+TODAY_TTL_SECONDS = 10 * 60           # 확정되지 않은 날짜(오늘 장중 등)가 포함된 응답의 유효 시간
+UNDATED_TTL_SECONDS = 24 * 60 * 60    # 날짜 인자가 없는 호출(종목명, 지수 목록 등)의 유효 시간
+# 캐시할 pykrx 함수 (나머지 함수는 그대로 호출)
+CACHED_FUNCTIONS = {
+    'get_market_ticker_name', 'get_market_ticker_list', 'get_market_ohlcv', 'get_market_cap',
+    'get_market_ohlcv_by_ticker', 'get_market_cap_by_ticker',
+    'get_index_ticker_list', 'get_index_ticker_name', 'get_index_ohlcv',
+}
+
+
+def _call_dates(args, kwargs):
+    """호출 인자 중 날짜(YYYYMMDD 문자열 또는 datetime)를 Timestamp 목록으로 반환합니다."""
+    dates = []
+    for value in list(args) + list(kwargs.values()):
+        if isinstance(value, datetime):
+            dates.append(pd.Timestamp(value).normalize())
+        elif isinstance(value, str) and len(value) == 8 and value.isdigit():
+            try:
+                dates.append(pd.Timestamp(value))
+            except ValueError:
+                pass
+    return dates
+
+
+class CachedSource:
+    """
+    pykrx.stock(또는 같은 함수를 가진 객체)의 응답을 디스크에 캐시합니다.
+    - 키: 함수 이름 + 인자 (티커, 조회 기간 등)
+    - 조회 기간이 모두 확정된 날짜(fetcher.closed_until 이전)이면 만료 없이 보관합니다.
+    - 확정되지 않은 날짜가 포함되면 TODAY_TTL_SECONDS, 날짜 인자가 없으면 UNDATED_TTL_SECONDS 동안만 씁니다.
+    - 전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 파일(수정 시각 기준)부터 지웁니다.
+    - 예외가 난 호출은 캐시하지 않습니다.
+    """
+
+    def __init__(self, source, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, now=None):
+        self._source = source
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.now = now
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._total_bytes = sum(size for _, size, _ in self._entries())
+
+    def _entries(self):
+        """캐시 파일 목록을 [(경로, 크기, 마지막 사용 시각), ...]로 반환합니다."""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.pkl'):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _path(self, name, args, kwargs):
+        key = repr((args, sorted(kwargs.items())))
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, name, f'{digest}.pkl')
+
+    def _expires_at(self, args, kwargs):
+        dates = _call_dates(args, kwargs)
+        if not dates:
+            return time.time() + UNDATED_TTL_SECONDS
+        if max(dates) > closed_until(self.now):
+            return time.time() + TODAY_TTL_SECONDS
+        return None
+
+    def _load(self, path):
+        try:
+            with open(path, 'rb') as f:
+                expires_at, value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return False, None
+        if expires_at is not None and time.time() > expires_at:
+            return False, None
+        # 사용 시각을 갱신해 LRU 순서를 유지합니다.
+        os.utime(path)
+        return True, value
+
+    def _store(self, path, value, expires_at):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((expires_at, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        old_size = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._total_bytes += os.path.getsize(path) - old_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """크기 상한의 90%가 될 때까지 오래 사용하지 않은 항목부터 지웁니다. (잠금 안에서 호출)"""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+        self._total_bytes = total
+
+    def __getattr__(self, name):
+        attr = getattr(self._source, name)
+        if name not in CACHED_FUNCTIONS or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            path = self._path(name, args, kwargs)
+            found, value = self._load(path)
+            if found:
+                with self._lock:
+                    self.hits += 1
+                return value
+            value = attr(*args, **kwargs)
+            with self._lock:
+                self.misses += 1
+            self._store(path, value, self._expires_at(args, kwargs))
+            return value
+        return call
+
+    def summary(self):
+        """적중·호출 횟수와 캐시 크기를 한 줄로 반환합니다."""
+        return f"캐시 적중 {self.hits}건, 실제 호출 {self.misses}건, 캐시 크기 {self._total_bytes / 1024 / 1024:.1f}MB"
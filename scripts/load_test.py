@@ -0,0 +1,109 @@
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+
+import numpy as np
+
+# --- 설정 변수 ---
+HOST = '127.0.0.1'
+PORT = 8000
+CONNECTIONS = 16           # 동시에 요청을 보내는 연결(스레드) 수
+REQUESTS = 20000           # 전체 요청 수
+REVALIDATE_RATIO = 0.5     # 이전 응답의 ETag로 If-None-Match를 보내는 비율 (대시보드 새로고침)
+
+
+def _worker(host, port, paths, n_requests, seed, latencies, counts, lock):
+    """keep-alive 연결 하나로 n_requests개를 보내고 지연 시간과 상태 코드 수를 기록합니다."""
+    rng = random.Random(seed)
+    etags = {}
+    local_latencies, local_counts = [], {}
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    for _ in range(n_requests):
+        path = rng.choice(paths)
+        headers = {}
+        if path in etags and rng.random() < REVALIDATE_RATIO:
+            headers['If-None-Match'] = etags[path]
+        started = time.perf_counter()
+        try:
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=10)
+            local_counts['error'] = local_counts.get('error', 0) + 1
+            continue
+        local_latencies.append(time.perf_counter() - started)
+        local_counts[response.status] = local_counts.get(response.status, 0) + 1
+        if response.getheader('ETag'):
+            etags[path] = response.getheader('ETag')
+    conn.close()
+    with lock:
+        latencies.extend(local_latencies)
+        for status, count in local_counts.items():
+            counts[status] = counts.get(status, 0) + count
+
+def query_paths(host, port, n_paths=200, seed=0):
+    """/health의 날짜 범위 안에서 무작위 기간 조회 경로를 만듭니다. (해상도 섞음)"""
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    conn.request('GET', '/health')
+    health = json.loads(conn.getresponse().read())
+    conn.close()
+    if health.get('status') != 'ok':
+        raise RuntimeError("서버에 제공할 인덱스 데이터가 없습니다.")
+    days = np.arange(np.datetime64(health['first_date']), np.datetime64(health['last_date']) + 1)
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(n_paths):
+        resolution = rng.choice(['daily', 'daily', 'weekly', 'monthly'])
+        lo, hi = sorted(rng.sample(range(len(days)), 2)) if len(days) > 1 else (0, 0)
+        paths.append(f'/series?resolution={resolution}&start={days[lo]}&end={days[hi]}')
+    return paths
+
+def run(host=HOST, port=PORT, connections=CONNECTIONS, requests=REQUESTS):
+    """
+    localhost 서버에 부하를 주고 처리량과 지연 시간 분포를 출력합니다.
+    - 반환값: {'requests', 'seconds', 'rps', 'p50_ms', 'p99_ms', 'status'}
+    """
+    paths = query_paths(host, port)
+    latencies, counts, lock = [], {}, threading.Lock()
+    per_connection = [requests // connections + (i < requests % connections) for i in range(connections)]
+    threads = [
+        threading.Thread(target=_worker, args=(host, port, paths, n, i, latencies, counts, lock))
+        for i, n in enumerate(per_connection)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - started
+
+    done = len(latencies)
+    result = {
+        'requests': done, 'seconds': seconds, 'rps': done / seconds if seconds else 0.0,
+        'p50_ms': float(np.percentile(latencies, 50) * 1000) if done else None,
+        'p99_ms': float(np.percentile(latencies, 99) * 1000) if done else None,
+        'status': counts,
+    }
+    print(f"요청 {done:,}건 / {seconds:.2f}초 → {result['rps']:,.0f} 요청/초 (연결 {connections}개)")
+    if done:
+        print(f"지연 시간: p50 {result['p50_ms']:.2f}ms, p99 {result['p99_ms']:.2f}ms")
+    print(f"상태 코드: {dict(sorted(counts.items(), key=str))}")
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='index_server.py 부하 테스트 (localhost)')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--connections', type=int, default=CONNECTIONS)
+    parser.add_argument('--requests', type=int, default=REQUESTS)
+    args = parser.parse_args()
+    try:
+        run(args.host, args.port, args.connections, args.requests)
+    except (ConnectionRefusedError, RuntimeError) as e:
+        print(f"에러: 서버에 연결할 수 없습니다. 먼저 'python scripts/index_server.py'를 실행하세요. - {e}")
@@ -0,0 +1,260 @@
+import os
+import tracemalloc
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+import metrics
+import store
+
+# --- 설정 변수 ---
+OHLCV_DIR = './data/ohlcv'
+MARCAP_DIR = './data/marcap'
+LOAD_WORKERS = min(8, os.cpu_count() or 1)  # 기존 CSV를 동시에 읽을 작업자 수
+CSV_CHUNK_ROWS = 250                        # CSV를 한 번에 파싱할 행 수 (기간 밖 행은 청크마다 버림)
+
+
+def _dataset_columns(columns):
+    """
+    요청한 컬럼을 데이터셋별로 나눕니다. (None이면 데이터셋마다 전체 컬럼)
+    - 두 데이터셋에 모두 있는 컬럼(거래량)은 앞의 데이터셋(ohlcv)에서 읽습니다.
+    - 요청한 컬럼이 없는 데이터셋도 두 데이터셋에 모두 있는 날짜만 남기도록 '날짜'는 읽습니다.
+    """
+    if columns is None:
+        return {dataset: None for dataset in store.DATASET_SCHEMAS}
+    split = {dataset: [] for dataset in store.DATASET_SCHEMAS}
+    for column in columns:
+        for dataset, schema in store.DATASET_SCHEMAS.items():
+            if column in schema:
+                split[dataset].append(column)
+                break
+        else:
+            raise ValueError(f"저장소에 없는 컬럼입니다: {column}")
+    return split
+
+def load_all_data(start_date, end_date, tickers, columns=None, store_dir=store.STORE_DIR):
+    """
+    지정된 기간 동안 모든 티커의 ohlcv 및 시가총액 데이터를 저장소에서 불러와 병합합니다.
+    - columns: 계산에 필요한 컬럼 (예: index_engine.REQUIRED_COLUMNS). None이면 전체 컬럼을 읽습니다.
+    - 기간 밖 연도 파티션은 읽지 않고, 저장소에는 날짜 중복이 없습니다.
+    - 'ticker'는 category, 날짜는 datetime64, 시가총액 등 정수 컬럼은 int64로 만듭니다.
+    - 저장소가 비어 있으면 기존 CSV 파일에서 불러옵니다. (이전: python scripts/store.py)
+    """
+    stored = set(store.list_tickers('ohlcv', store_dir)) & set(store.list_tickers('marcap', store_dir))
+    if not stored:
+        print("경고: 저장소가 비어 있어 기존 CSV 파일에서 불러옵니다. (이전: python scripts/store.py)")
+        return load_all_data_csv(start_date, end_date, tickers, columns)
+
+    print("데이터 로딩 중...")
+    available = []
+    for ticker in tickers:
+        if ticker in stored:
+            available.append(ticker)
+        else:
+            print(f"경고: {ticker}에 대한 데이터를 저장소에서 찾을 수 없습니다.")
+    if not available:
+        print("에러: 처리할 데이터가 없습니다. 스크립트를 종료합니다.")
+        return pd.DataFrame()
+
+    split = _dataset_columns(columns)
+    df_ohlcv = store.read('ohlcv', available, start_date, end_date, columns=split['ohlcv'], store_dir=store_dir)
+    df_marcap = store.read('marcap', available, start_date, end_date, columns=split['marcap'], store_dir=store_dir)
+
+    # 두 데이터셋을 (날짜, ticker) 기준으로 병합
+    full_df = pd.merge(df_ohlcv, df_marcap, on=['날짜', 'ticker'], how='inner')
+    full_df.sort_values(by=['날짜', 'ticker'], inplace=True)
+    full_df.reset_index(drop=True, inplace=True)
+    return full_df
+
+def _read_csv_range(path, columns, start_date, end_date):
+    """
+    CSV 파일에서 '날짜'와 지정한 컬럼만 CSV_CHUNK_ROWS행씩 읽으며 기간 안 행만 남깁니다.
+    - 파일 전체를 한 번에 파싱해 두지 않으므로, 메모리에는 청크 하나와 기간 안 행만 올라옵니다.
+    """
+    usecols = None if columns is None else ['날짜'] + columns
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    parts = []
+    with pd.read_csv(path, usecols=usecols, parse_dates=['날짜'], chunksize=CSV_CHUNK_ROWS) as reader:
+        for chunk in reader:
+            metrics.count('rows_read', len(chunk))
+            parts.append(chunk[(chunk['날짜'] >= start) & (chunk['날짜'] <= end)])
+    metrics.count('files_read')
+    if not parts:
+        return pd.read_csv(path, usecols=usecols, parse_dates=['날짜'], nrows=0)
+    return pd.concat(parts, ignore_index=True)
+
+def _load_ticker_csv(ohlcv_path, marcap_path, split, start_date, end_date):
+    """한 티커의 ohlcv·marcap 파일을 읽어 '날짜' 기준으로 병합합니다. (작업자 스레드에서 실행)"""
+    df_ohlcv = _read_csv_range(ohlcv_path, split['ohlcv'], start_date, end_date)
+    df_marcap = _read_csv_range(marcap_path, split['marcap'], start_date, end_date)
+    return pd.merge(df_ohlcv, df_marcap, on='날짜', how='inner')
+
+
+class _ColumnBuffer:
+    """
+    티커별 결과를 미리 할당한 컬럼 배열에 이어 씁니다. (프레임 목록을 모아 두었다가 concat하지 않음)
+    - 컬럼 구성과 dtype은 첫 결과에서 정하고, 용량이 모자라면 두 배로 늘립니다.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = max(capacity, 1)
+        self.size = 0
+        self.arrays = None
+        self.codes = np.empty(self.capacity, dtype=np.int32)
+
+    def _grow(self, needed):
+        while self.capacity < needed:
+            self.capacity *= 2
+        self.codes = np.resize(self.codes, self.capacity)
+        self.arrays = {column: np.resize(values, self.capacity) for column, values in self.arrays.items()}
+
+    def write(self, code, df):
+        if self.arrays is None:
+            self.arrays = {column: np.empty(self.capacity, dtype=df[column].dtype) for column in df.columns}
+        n = len(df)
+        if self.size + n > self.capacity:
+            self._grow(self.size + n)
+        end = self.size + n
+        for column, values in self.arrays.items():
+            incoming = df[column].to_numpy() if column in df.columns else np.full(n, np.nan)
+            if not np.can_cast(incoming.dtype, values.dtype, casting='same_kind'):
+                # 결측치 등으로 정수 컬럼에 실수가 들어오면 float64로 넓힙니다.
+                values = self.arrays[column] = values.astype(np.result_type(values.dtype, incoming.dtype))
+            values[self.size:end] = incoming
+        self.codes[self.size:end] = code
+        self.size = end
+
+    def to_frame(self, ticker_labels):
+        """(날짜, 티커) 순으로 정렬한 DataFrame을 만듭니다. ('ticker'는 category)"""
+        if self.arrays is None:
+            return pd.DataFrame()
+        codes = self.codes[:self.size]
+        order = np.lexsort((codes, self.arrays['날짜'][:self.size]))
+        data = {column: values[:self.size][order] for column, values in self.arrays.items()}
+        data['ticker'] = pd.Categorical.from_codes(codes[order], categories=pd.Index(ticker_labels, dtype=object))
+        return pd.DataFrame(data)
+
+
+def load_all_data_csv(start_date, end_date, tickers, columns=None, workers=LOAD_WORKERS):
+    """
+    기존 per-ticker CSV 파일에서 지정된 기간 동안 모든 티커의 ohlcv 및 시가총액 데이터를 불러와 병합합니다.
+    - 각 디렉토리를 한 번만 훑어 티커별 최신 파일(파일명의 날짜 기준)을 찾습니다.
+    - 로드하는 파일의 날짜가 오늘 날짜와 다를 경우 경고 메시지를 출력합니다.
+    - columns가 주어지면 해당 컬럼만 읽고, 기간 필터는 파일마다 병합 전에 적용합니다.
+    - 티커별 읽기·병합은 작업자 풀에서 동시에 실행하고, 결과는 끝나는 대로 미리 할당한 배열에 기록합니다.
+      (동시에 메모리에 올라와 있는 티커별 프레임은 작업자 수의 두 배 이하)
+    """
+    split = _dataset_columns(columns)
+    print("데이터 로딩 중...")
+
+    today_yyyymmdd = datetime.now().strftime("%Y%m%d")
+    ohlcv_files = store.latest_csv_files(OHLCV_DIR, 'ohlcv')
+    marcap_files = store.latest_csv_files(MARCAP_DIR, 'marcap')
+
+    jobs = []
+    for ticker in dict.fromkeys(tickers):
+        if ticker not in ohlcv_files or ticker not in marcap_files:
+            print(f"경고: {ticker}에 대한 데이터 파일을 찾을 수 없습니다.")
+            continue
+        for label, (file_date, path, _) in (('OHLCV', ohlcv_files[ticker]), ('Marcap', marcap_files[ticker])):
+            if file_date != today_yyyymmdd:
+                print(f"경고 ({label}): {ticker}의 로드된 파일 날짜({file_date})가 오늘({today_yyyymmdd})과 다릅니다. 파일: {os.path.basename(path)}")
+        jobs.append((ticker, ohlcv_files[ticker][1], marcap_files[ticker][1]))
+
+    # 티커 코드는 정렬된 티커 순서로 매겨 결과의 (날짜, 티커) 정렬이 문자열 정렬과 같도록 합니다.
+    ticker_labels = sorted(ticker for ticker, _, _ in jobs)
+    codes = {ticker: code for code, ticker in enumerate(ticker_labels)}
+    buffer = _ColumnBuffer(len(pd.bdate_range(start_date, end_date)) * len(jobs))
+
+    def collect(done):
+        for future in done:
+            ticker = pending.pop(future)
+            try:
+                buffer.write(codes[ticker], future.result())
+            except Exception as e:
+                print(f"에러: {ticker} 파일 처리 중 오류 발생 - {e}")
+            progress.update(1)
+
+    pending = {}
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor, tqdm(total=len(jobs)) as progress:
+        for ticker, ohlcv_path, marcap_path in jobs:
+            future = executor.submit(_load_ticker_csv, ohlcv_path, marcap_path, split, start_date, end_date)
+            pending[future] = ticker
+            if len(pending) >= 2 * max(workers, 1):
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        collect(list(pending))
+
+    if buffer.size == 0:
+        print("에러: 처리할 데이터가 없습니다. 스크립트를 종료합니다.")
+        return pd.DataFrame()
+    return buffer.to_frame(ticker_labels)
+
+def load_all_data_baseline(start_date, end_date, tickers, csv=False, store_dir=store.STORE_DIR):
+    """
+    메모리 비교 기준: 컬럼·기간을 줄이기 전 방식으로 불러옵니다. (report_memory_savings 전용)
+    - 저장소: 전체 컬럼을 읽고 티커를 행마다 문자열로 둡니다.
+    - CSV: 티커마다 파일 전체·전체 컬럼을 읽어 병합·연결한 뒤 기간으로 거릅니다.
+    """
+    if not csv:
+        df = load_all_data(start_date, end_date, tickers, columns=None, store_dir=store_dir)
+        if not df.empty:
+            df['ticker'] = df['ticker'].astype(object)
+        return df
+
+    ohlcv_files = store.latest_csv_files(OHLCV_DIR, 'ohlcv')
+    marcap_files = store.latest_csv_files(MARCAP_DIR, 'marcap')
+    frames = []
+    for ticker in dict.fromkeys(tickers):
+        if ticker not in ohlcv_files or ticker not in marcap_files:
+            continue
+        df = pd.merge(pd.read_csv(ohlcv_files[ticker][1]), pd.read_csv(marcap_files[ticker][1]), on='날짜', how='inner')
+        df['ticker'] = ticker
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame()
+    full_df = pd.concat(frames, ignore_index=True)
+    full_df['날짜'] = pd.to_datetime(full_df['날짜'])
+    full_df = full_df[(full_df['날짜'] >= start_date) & (full_df['날짜'] <= end_date)].copy()
+    full_df.sort_values(by=['날짜', 'ticker'], inplace=True)
+    return full_df
+
+def measure_peak_memory(load, *args, **kwargs):
+    """load(*args, **kwargs)를 실행하고 (결과, 실행 중 최대 메모리 바이트)를 반환합니다. (tracemalloc 기준)"""
+    tracemalloc.start()
+    try:
+        result = load(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+def report_memory_savings(start_date, end_date, tickers, columns, csv=False):
+    """
+    가지치기 전 방식(load_all_data_baseline)과 지금 방식(columns만, 기간 안 행만)의 최대 메모리·결과 크기를 비교해 출력합니다.
+    - csv=True이면 기존 CSV 경로끼리, 아니면 저장소 경로끼리 비교합니다.
+    """
+    load = load_all_data_csv if csv else load_all_data
+    full_df, full_peak = measure_peak_memory(load_all_data_baseline, start_date, end_date, tickers, csv=csv)
+    pruned_df, pruned_peak = measure_peak_memory(load, start_date, end_date, tickers, columns)
+    mb = 1024 * 1024
+    print(f"최대 메모리 ({'CSV' if csv else '저장소'}): 이전 방식 {full_peak / mb:.1f}MB → 필요한 컬럼·기간만 {pruned_peak / mb:.1f}MB "
+          f"({(full_peak - pruned_peak) / mb:.1f}MB 절감)")
+    print(f"결과 크기: {full_df.memory_usage(deep=True).sum() / mb:.1f}MB → {pruned_df.memory_usage(deep=True).sum() / mb:.1f}MB")
+    return {'full_peak': full_peak, 'pruned_peak': pruned_peak, 'saved': full_peak - pruned_peak}
+
+
+if __name__ == '__main__':
+    # 인덱스 계산에 필요한 컬럼·기간만 읽을 때 줄어드는 메모리를 이전 방식과 비교합니다.
+    import argparse
+
+    import index_engine
+    from ticker import tickers
+
+    parser = argparse.ArgumentParser(description='불러오기 최대 메모리 비교 (이전 방식 vs 필요한 컬럼·기간만)')
+    parser.add_argument('--csv', action='store_true', help='저장소 대신 기존 CSV 경로를 비교합니다.')
+    args = parser.parse_args()
+    report_memory_savings(datetime(2025, 1, 1), datetime.now(), tickers, index_engine.REQUIRED_COLUMNS, csv=args.csv)
@@ -0,0 +1,318 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+# --- 설정 변수 ---
+METRICS_DIR = './data/deajeon_index'    # deajeon_index_YYYYMMDD.csv와 같은 폴더에 metrics_YYYYMMDD.json을 씁니다.
+PROFILE_ENV = 'DEAJEON_PROFILE'         # 샘플링 프로파일러를 켤 단계 (예: DEAJEON_PROFILE=load,compute 또는 all)
+PROFILE_INTERVAL = 0.005                # 샘플링 간격 (초)
+PROFILE_TOP = 25                        # 단계별로 남길 상위 함수 수
+LOCK_TIMEOUT = 10.0                     # 지표 파일 잠금을 기다릴 최대 시간 (초, 이보다 오래된 잠금은 버림)
+
+_current = None
+_current_lock = threading.Lock()
+
+
+def peak_rss_bytes(children=False):
+    """
+    프로세스의 최대 상주 메모리(RSS, 바이트)를 반환합니다. (측정할 수 없으면 None)
+    - children=True: 끝난 하위 프로세스 중 가장 큰 값 (Unix만, 예: 03_viz.py의 렌더링 프로세스)
+    """
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024   # Linux는 KB 단위
+    if children:
+        return None
+    try:
+        import psutil   # Windows: 설치되어 있을 때만 사용
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return getattr(info, 'peak_wset', info.rss)
+
+def _children_cpu():
+    times = os.times()
+    return times.children_user + times.children_system
+
+def _profile_stages():
+    value = os.environ.get(PROFILE_ENV, '').strip()
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SamplingProfiler:
+    """
+    대상 스레드의 호출 스택을 interval초마다 샘플링해 함수별 빈도를 셉니다. (cProfile보다 부담이 훨씬 적음)
+    - self: 함수가 스택 맨 위에 있던 샘플 수, total: 스택 어딘가에 있던 샘플 수 (재귀는 한 번만)
+    - 작업자 스레드의 시간은 포함하지 않습니다. (대상 스레드가 기다리는 위치로 보임)
+    """
+
+    def __init__(self, thread_id=None, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.samples = 0
+        self.self_counts = Counter()
+        self.total_counts = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name='metrics-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            seen = set()
+            leaf = True
+            while frame is not None:
+                code = frame.f_code
+                key = f'{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}'
+                if leaf:
+                    self.self_counts[key] += 1
+                    leaf = False
+                if key not in seen:
+                    seen.add(key)
+                    self.total_counts[key] += 1
+                frame = frame.f_back
+
+    def top(self, n=PROFILE_TOP):
+        """total 샘플 수가 큰 순서로 [{'function', 'self', 'total', 'total_pct'}, ...]를 반환합니다."""
+        samples = max(self.samples, 1)
+        return [{'function': key, 'self': self.self_counts[key], 'total': total,
+                 'total_pct': round(total / samples * 100, 1)}
+                for key, total in self.total_counts.most_common(n)]
+
+
+class RunMetrics:
+    """
+    스크립트 한 번 실행의 지표를 모읍니다.
+    - 단계별: 실행 시간(wall), CPU 시간(프로세스 전체, 끝난 하위 프로세스는 따로), 처리한 행·파일 등 카운터,
+      단계가 최대 RSS를 늘린 양 (ru_maxrss는 프로세스 전체의 최댓값이므로 최대 RSS 자체는 실행 단위로만 기록)
+    - 외부 호출별(pykrx): 횟수, 실패 횟수, 누적·최대 지연 시간
+    - values: 속도 제한 대기 시간처럼 실행 단위로 기록할 값
+    - 카운터는 가장 안쪽에서 실행 중인 단계에 더해집니다. (작업자 스레드에서 호출해도 같음)
+    """
+
+    def __init__(self, run, profile=None):
+        self.run = run
+        self.profile = _profile_stages() if profile is None else set(profile)
+        self.started_at = datetime.now()
+        self.stages = {}
+        self.calls = {}
+        self.values = {}
+        self.status = 'running'
+        self._active = []
+        self._lock = threading.Lock()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._children_cpu = _children_cpu()
+
+    @contextmanager
+    def stage(self, name):
+        """with 블록을 한 단계로 측정합니다. 블록 안에서 돌려받은 dict에 값을 직접 넣어도 됩니다."""
+        info = {'counts': Counter()}
+        profiler = SamplingProfiler().start() if name in self.profile or 'all' in self.profile else None
+        with self._lock:
+            self._active.append(info)
+        wall, cpu, children_cpu = time.perf_counter(), time.process_time(), _children_cpu()
+        peak_before = peak_rss_bytes()
+        info['status'] = 'error'
+        try:
+            yield info
+            info['status'] = 'ok'
+        finally:
+            info['wall_seconds'] = round(time.perf_counter() - wall, 4)
+            info['cpu_seconds'] = round(time.process_time() - cpu, 4)
+            info['children_cpu_seconds'] = round(_children_cpu() - children_cpu, 4)
+            peak_after = peak_rss_bytes()
+            info['peak_rss_growth_bytes'] = None if peak_before is None or peak_after is None else peak_after - peak_before
+            if profiler is not None:
+                profiler.stop()
+                info['profile'] = {'interval': profiler.interval, 'samples': profiler.samples, 'top': profiler.top()}
+            with self._lock:
+                self._active.remove(info)
+                info['counts'] = dict(info['counts'])
+                self.stages[name] = info
+
+    def count(self, key, n=1):
+        with self._lock:
+            if self._active:
+                self._active[-1]['counts'][key] += n
+
+    def record_call(self, name, seconds, error=False):
+        with self._lock:
+            stats = self.calls.setdefault(name, {'count': 0, 'errors': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+            stats['count'] += 1
+            stats['errors'] += int(error)
+            stats['seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+            if self._active:
+                self._active[-1]['counts']['external_calls'] += 1
+
+    def to_dict(self):
+        calls = {name: {**stats, 'seconds': round(stats['seconds'], 4), 'max_seconds': round(stats['max_seconds'], 4),
+                        'mean_seconds': round(stats['seconds'] / stats['count'], 4)}
+                 for name, stats in sorted(self.calls.items())}
+        return {
+            'status': self.status,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'wall_seconds': round(time.perf_counter() - self._wall, 4),
+            'cpu_seconds': round(time.process_time() - self._cpu, 4),
+            'children_cpu_seconds': round(_children_cpu() - self._children_cpu, 4),
+            'peak_rss_bytes': peak_rss_bytes(),
+            'peak_rss_children_bytes': peak_rss_bytes(children=True),
+            'pid': os.getpid(),
+            'python': sys.version.split()[0],
+            'argv': sys.argv[1:],
+            'stages': self.stages,
+            'calls': calls,
+            'values': self.values,
+        }
+
+    def write(self, directory=METRICS_DIR, date_str=None):
+        """
+        directory/metrics_YYYYMMDD.json의 runs[실행 이름]에 지표를 기록하고 경로를 반환합니다.
+        - 같은 날 다른 스크립트의 지표는 유지하고, 같은 스크립트를 다시 실행하면 덮어씁니다.
+        - 동시에 실행되는 스크립트끼리는 잠금 파일로 순서를 맞춥니다.
+        """
+        date_str = date_str or self.started_at.strftime('%Y%m%d')
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'metrics_{date_str}.json')
+        with _file_lock(f'{path}.lock'):
+            document = {'date': date_str, 'runs': {}}
+            if os.path.exists(path):
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        document = json.load(f)
+                except (OSError, ValueError):
+                    print(f"경고: 지표 파일 '{path}'을 읽을 수 없어 새로 씁니다.")
+            document.setdefault('runs', {})[self.run] = self.to_dict()
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(document, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+        return path
+
+
+class InstrumentedSource:
+    """
+    데이터 소스(pykrx.stock 또는 같은 함수를 가진 객체)의 함수 호출마다 지연 시간과 실패 여부를 현재 실행 지표에 기록합니다.
+    - 속도 제한기 안쪽에 두면 대기 시간을 뺀 실제 호출 시간만 잽니다.
+    """
+
+    def __init__(self, source):
+        self._source = source
+
+    def __getattr__(self, name):
+        attr = getattr(self._source, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = attr(*args, **kwargs)
+            except Exception:
+                record_call(name, time.perf_counter() - started, error=True)
+                raise
+            record_call(name, time.perf_counter() - started)
+            return result
+        return call
+
+
+@contextmanager
+def _file_lock(path, timeout=LOCK_TIMEOUT):
+    """잠금 파일을 만들어(O_EXCL) 다른 프로세스와 순서를 맞춥니다. timeout보다 오래된 잠금은 남은 것으로 보고 지웁니다."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > timeout:
+                    os.remove(path)
+                    continue
+            except OSError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"지표 파일 잠금을 얻지 못했습니다: {path}")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(path)
+
+
+# --- 현재 실행 (라이브러리 코드는 아래 함수만 호출하고, 실행 중인 지표가 없으면 아무것도 기록하지 않습니다) ---
+
+def start_run(run, profile=None):
+    """현재 프로세스의 실행 지표를 시작하고 반환합니다. (스크립트의 __main__에서 한 번)"""
+    global _current
+    with _current_lock:
+        _current = RunMetrics(run, profile)
+    return _current
+
+def finish_run(status='ok', directory=METRICS_DIR):
+    """현재 실행 지표를 파일에 기록하고 경로를 반환합니다. (실행 중인 지표가 없으면 None)"""
+    global _current
+    with _current_lock:
+        run, _current = _current, None
+    if run is None:
+        return None
+    run.status = status
+    try:
+        path = run.write(directory)
+    except (OSError, TimeoutError) as e:
+        # 지표를 못 써도 본 작업의 결과에는 영향을 주지 않습니다.
+        print(f"경고: 실행 지표를 저장하지 못했습니다 - {e}")
+        return None
+    print(f"실행 지표가 '{path}'에 저장되었습니다. ({run.run})")
+    return path
+
+def current():
+    return _current
+
+@contextmanager
+def stage(name):
+    """현재 실행의 단계를 측정합니다. 실행 중인 지표가 없으면 빈 dict만 돌려줍니다."""
+    run = _current
+    if run is None:
+        yield {}
+        return
+    with run.stage(name) as info:
+        yield info
+
+def count(key, n=1):
+    run = _current
+    if run is not None:
+        run.count(key, n)
+
+def record_call(name, seconds, error=False):
+    run = _current
+    if run is not None:
+        run.record_call(name, seconds, error)
+
+def set_value(key, value):
+    run = _current
+    if run is not None:
+        run.values[key] = value
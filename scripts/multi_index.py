@@ -0,0 +1,224 @@
+import itertools
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import divisor
+import store
+import trading_calendar
+from divisor import EVENT_ADD, EVENT_REMOVE
+from loader import load_all_data
+
+# --- 설정 변수 ---
+DEAJEON_INDEX_DIR = './data/deajeon_index'
+BASE_INDEX = 100.0
+WEIGHTINGS = ('cap', 'equal', 'capped')
+# 계산에 필요한 컬럼 ('날짜', 'ticker' 외) - loader는 이 컬럼만 읽습니다. (시가총액 바스켓은 divisor.py와 같은 컬럼, 수익률 연결은 종가)
+REQUIRED_COLUMNS = divisor.REQUIRED_COLUMNS + ['종가']
+
+# 바스켓 정의 형식 (dict)
+# - name: 결과 컬럼 이름
+# - tickers: 구성 종목 목록 (None이면 불러온 전체 종목)
+# - changes: 구성 변경 기록 [{'날짜': 'YYYY-MM-DD', 'ticker': 티커, '구분': '편입' 또는 '제외'}, ...]
+#            (변경일부터 적용, 변경일에는 전일 종가 기준으로 연결해 인덱스가 끊기지 않음)
+# - market: 'KOSPI' 또는 'KOSDAQ'이면 해당 시장 종목만 사용 (store의 시장 구분 필요)
+# - weighting: 'cap' (제수 방식 시가총액 가중, divisor.py와 같은 규칙),
+#              'equal' (동일가중 일간 수익률 연결), 'capped' (종목당 비중 상한이 있는 시가총액 가중)
+# - cap: weighting='capped'일 때 종목당 최대 비중 (예: 0.1)
+
+
+def default_baskets(tickers, markets=None):
+    """ticker.py 유니버스로 만드는 기본 변형 바스켓 목록입니다."""
+    baskets = [
+        {'name': 'deajeon_index', 'tickers': tickers, 'weighting': 'cap'},
+        {'name': 'deajeon_equal', 'tickers': tickers, 'weighting': 'equal'},
+        {'name': 'deajeon_capped10', 'tickers': tickers, 'weighting': 'capped', 'cap': 0.10},
+    ]
+    if markets:
+        for market in ('KOSPI', 'KOSDAQ'):
+            if any(markets.get(ticker) == market for ticker in tickers):
+                baskets.append({'name': f'deajeon_{market.lower()}', 'tickers': tickers, 'market': market, 'weighting': 'cap'})
+    return baskets
+
+def _matrix(all_stock_data, column, dates, ticker_labels):
+    """(날짜, ticker) 행 데이터를 날짜 × 티커 float 행렬로 바꿉니다. (없는 칸은 NaN)"""
+    date_pos = dates.get_indexer(all_stock_data['날짜'])
+    ticker_pos = ticker_labels.get_indexer(all_stock_data['ticker'])
+    valid = (date_pos >= 0) & (ticker_pos >= 0)
+    matrix = np.full((len(dates), len(ticker_labels)), np.nan)
+    matrix[date_pos[valid], ticker_pos[valid]] = all_stock_data[column].to_numpy(dtype=float)[valid]
+    return matrix
+
+def membership_matrix(baskets, ticker_labels, markets=None):
+    """바스켓 정의(변경 기록 제외)를 티커 × 바스켓 0/1 행렬로 바꿉니다."""
+    markets = markets or {}
+    membership = np.zeros((len(ticker_labels), len(baskets)))
+    for col, basket in enumerate(baskets):
+        if basket.get('weighting', 'cap') not in WEIGHTINGS:
+            raise ValueError(f"알 수 없는 가중 방식입니다: {basket['name']} - {basket.get('weighting')}")
+        members = ticker_labels if basket.get('tickers') is None else pd.Index(basket['tickers'])
+        if basket.get('market'):
+            members = [ticker for ticker in members if markets.get(ticker) == basket['market']]
+        membership[ticker_labels.isin(members), col] = 1.0
+    return membership
+
+def membership_segments(baskets, ticker_labels, dates, markets=None):
+    """
+    구성 변경 기록을 반영한 날짜별 구성을 (구간 행렬, 날짜 × 바스켓 구간 번호)로 만듭니다.
+    - 구간 행렬: 티커 × 구간 0/1 행렬. 앞의 바스켓 수만큼은 각 바스켓의 첫 구성이고, 변경일마다 한 열씩 늘어납니다.
+    - 구성이 같은 날은 같은 열을 쓰므로, 값 행렬 @ 구간 행렬 한 번으로 모든 바스켓·구간의 합을 구합니다.
+    - 변경일이 거래일이 아니면 그 뒤 첫 날짜부터 적용합니다.
+    """
+    markets = markets or {}
+    initial = membership_matrix(baskets, ticker_labels, markets)
+    columns = [initial[:, col] for col in range(len(baskets))]
+    segments = np.tile(np.arange(len(baskets)), (len(dates), 1))
+    for col, basket in enumerate(baskets):
+        changes = sorted(basket.get('changes') or [], key=lambda change: pd.Timestamp(change['날짜']))
+        current = initial[:, col].copy()
+        for position, group in itertools.groupby(changes, key=lambda change: dates.searchsorted(pd.Timestamp(change['날짜']))):
+            for change in group:
+                if change['구분'] not in (EVENT_ADD, EVENT_REMOVE):
+                    raise ValueError(f"알 수 없는 변경 구분입니다: {basket['name']} - {change['구분']}")
+                if change['ticker'] not in ticker_labels:
+                    continue   # 불러온 데이터가 없는 종목은 합에 영향이 없습니다.
+                if basket.get('market') and markets.get(change['ticker']) != basket['market']:
+                    continue
+                current[ticker_labels.get_loc(change['ticker'])] = 1.0 if change['구분'] == EVENT_ADD else 0.0
+            if position >= len(dates):
+                break
+            if position == 0:
+                columns[col] = current.copy()
+            else:
+                columns.append(current.copy())
+                segments[position:, col] = len(columns) - 1
+    return np.column_stack(columns) if columns else np.zeros((len(ticker_labels), 0)), segments
+
+def _capped_weights(weights, cap, iterations=50):
+    """
+    행(날짜)별 비중 합이 1인 가중치(마지막 축이 티커)에 종목당 상한(cap)을 적용하고, 초과분을 상한 미만 종목에 비례 배분합니다.
+    - 모든 날짜(와 바스켓 × 날짜 × 티커이면 모든 바스켓, cap은 (바스켓, 1, 1))를 한 번에 처리하며,
+      배분 후 다시 상한을 넘는 종목이 없어질 때까지 반복합니다.
+    - 그날 데이터가 있는 종목 수 × 상한이 1보다 작으면 모두 상한이 되어 합이 1보다 작아지므로, 마지막에 행 합을 1로 맞춥니다.
+    """
+    weights = weights.copy()
+    for _ in range(iterations):
+        over = weights > cap + 1e-12
+        if not over.any():
+            break
+        excess = np.where(over, weights - cap, 0.0).sum(axis=-1, keepdims=True)
+        weights = np.where(over, cap, weights)
+        free = (weights > 0) & (weights < cap - 1e-12)
+        free_total = np.where(free, weights, 0.0).sum(axis=-1, keepdims=True)
+        share = np.divide(excess, free_total, out=np.zeros_like(excess), where=free_total > 0)
+        weights = weights + np.where(free, weights * share, 0.0)
+    totals = weights.sum(axis=-1, keepdims=True)
+    return np.divide(weights, totals, out=np.zeros_like(weights), where=totals > 0)
+
+def _check_caps(baskets, cols, membership, segments):
+    """상한 가중 바스켓의 모든 구간에서 구성 종목 수 × 상한이 1 이상인지 확인합니다. (모자라면 상한을 지킬 수 없음)"""
+    counts = membership.sum(axis=0)
+    for col in cols:
+        cap = baskets[col].get('cap', 0.1)
+        used = np.unique(segments[:, col])
+        if (counts[used] * cap < 1 - 1e-12).any():
+            raise ValueError(f"상한 가중 바스켓의 구성 종목 수가 부족합니다: {baskets[col]['name']} - "
+                             f"종목 수 {int(counts[used].min())} × 상한 {cap} < 1")
+
+def compute_indices(all_stock_data, baskets, markets=None):
+    """
+    여러 바스켓의 인덱스를 한 번 만든 날짜 × 티커 행렬에서 행렬 연산으로 함께 계산합니다.
+    - 날짜: 데이터가 있는 날 중 거래일 (주말·공휴일·KRX 휴장일 제외)
+    - 'cap': divisor.py의 제수 방식 (시가총액 합 / 제수). 신규 상장 종목은 둘째 거래일부터 제수를 고쳐 편입하고,
+      거래정지로 빈 날은 직전 시가총액으로 채우며, 구성 변경·분할·주식수 변경일에도 전일 기준으로 이어집니다.
+      (시가총액 패널은 한 번만 만들고, 모든 시가총액 바스켓의 바스켓 × 날짜 × 티커 구성 여부로 합을 함께 구합니다.)
+    - 'equal'/'capped': 전일 대비 종가 수익률 행렬에 바스켓별 가중치를 곱해 일간 수익률을 만들고 누적곱으로 연결
+      (상한 가중 바스켓도 바스켓 × 날짜 × 티커 가중치로 한 번에 계산, 구성 종목 수 × 상한 < 1이면 ValueError)
+    - 반환값: '날짜' + 바스켓 이름 컬럼의 wide DataFrame
+    """
+    dates = pd.DatetimeIndex(sorted(all_stock_data['날짜'].unique()))
+    dates = dates[trading_calendar.is_trading_day(dates)]
+    ticker_labels = pd.Index(sorted(all_stock_data['ticker'].unique()))
+    membership, segments = membership_segments(baskets, ticker_labels, dates, markets)
+
+    def per_basket(values, rows=slice(None)):
+        """날짜 × 구간 값을 날짜 × 바스켓 값(그날 바스켓의 구간)으로 고릅니다."""
+        return np.take_along_axis(values, segments[rows], axis=1)
+
+    results = pd.DataFrame({'날짜': dates})
+    weighting = np.array([basket.get('weighting', 'cap') for basket in baskets])
+
+    # 1. 제수 방식 시가총액 가중 (divisor.py와 같은 구현)
+    cap_cols = np.flatnonzero(weighting == 'cap')
+    if len(cap_cols):
+        terms = divisor.index_terms(all_stock_data, dates, ticker_labels)
+        members = membership.T[segments[:, cap_cols].T] > 0
+        caps_sum, divisors, _, _ = divisor.divisor_indices(terms, members, BASE_INDEX)
+        levels = np.where(caps_sum > 0, caps_sum / divisors, np.nan)
+        for i, col in enumerate(cap_cols):
+            results[baskets[col]['name']] = levels[i]
+
+    # 2. 수익률 연결 방식 (동일가중·상한가중)
+    chain_cols = np.flatnonzero(weighting != 'cap')
+    if len(chain_cols):
+        caps = _matrix(all_stock_data, '시가총액', dates, ticker_labels)
+        caps_filled = np.nan_to_num(caps)
+        basket_present = per_basket((~np.isnan(caps)).astype(float) @ membership) > 0
+        closes = _matrix(all_stock_data, '종가', dates, ticker_labels)
+        prev_closes = np.vstack([np.full((1, len(ticker_labels)), np.nan), closes[:-1]])
+        prev_caps = np.vstack([np.zeros((1, len(ticker_labels))), caps_filled[:-1]])
+        valid = ~np.isnan(closes) & ~np.isnan(prev_closes) & (prev_closes > 0)
+        returns = np.where(valid, closes / np.where(valid, prev_closes, 1.0) - 1.0, 0.0)
+
+        equal_cols = [col for col in chain_cols if weighting[col] == 'equal']
+        daily = {}
+        if equal_cols:
+            counts = per_basket(valid.astype(float) @ membership)[:, equal_cols]
+            sums = per_basket(returns @ membership)[:, equal_cols]
+            eq_daily = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+            for i, col in enumerate(equal_cols):
+                daily[col] = eq_daily[:, i]
+        capped_cols = [col for col in chain_cols if weighting[col] == 'capped']
+        if capped_cols:
+            _check_caps(baskets, capped_cols, membership, segments)
+            raw = np.where(valid, prev_caps, 0.0) * membership.T[segments[:, capped_cols].T]
+            totals = raw.sum(axis=-1, keepdims=True)
+            weights = np.divide(raw, totals, out=np.zeros_like(raw), where=totals > 0)
+            cap = np.array([baskets[col].get('cap', 0.1) for col in capped_cols])[:, None, None]
+            capped_daily = (_capped_weights(weights, cap) * returns).sum(axis=-1)
+            for i, col in enumerate(capped_cols):
+                daily[col] = capped_daily[i]
+
+        for col in chain_cols:
+            has_data = basket_present[:, col]
+            levels = BASE_INDEX * np.cumprod(1.0 + np.where(has_data, daily[col], 0.0))
+            results[baskets[col]['name']] = np.where(np.maximum.accumulate(has_data), levels, np.nan)
+
+    return results[['날짜'] + [basket['name'] for basket in baskets]]
+
+def basket_universe(baskets):
+    """바스켓들이 한 번이라도 포함하는 종목의 합집합 (중복 없이 정렬)"""
+    return sorted({ticker for basket in baskets for ticker in (basket.get('tickers') or [])}
+                  | {change['ticker'] for basket in baskets for change in (basket.get('changes') or [])})
+
+def run(baskets, start_date, end_date, markets=None, output_dir=DEAJEON_INDEX_DIR, output_name='multi_index'):
+    """필요한 종목 전체를 한 번만 불러와 모든 바스켓 인덱스를 계산하고 wide CSV로 저장합니다."""
+    universe = basket_universe(baskets)
+    all_stock_data = load_all_data(start_date, end_date, universe, columns=REQUIRED_COLUMNS)
+    if all_stock_data.empty:
+        return None
+    df_result = compute_indices(all_stock_data, baskets, markets)
+    os.makedirs(output_dir, exist_ok=True)
+    csv_path = os.path.join(output_dir, f"{output_name}_{pd.Timestamp(end_date).strftime('%Y%m%d')}.csv")
+    df_result.to_csv(csv_path, index=False, encoding='utf-8-sig')
+    print(f"{len(baskets)}개 인덱스 계산 완료! 결과가 '{csv_path}'에 저장되었습니다.")
+    return df_result
+
+
+if __name__ == '__main__':
+    from ticker import tickers
+
+    today = datetime.now()
+    run(default_baskets(tickers, store.load_markets()), datetime(2025, 1, 1), today)
@@ -0,0 +1,248 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+# --- 설정 변수 ---
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PIPELINE_STATE_FILE = './data/pipeline_state.json'
+PIPELINE_LOG_DIR = './data/logs/pipeline'   # 단계별 전체 출력 ({단계 이름}.log, 실행마다 새로 씀)
+MAX_PARALLEL_STAGES = 2     # 서로 의존하지 않는 단계를 동시에 실행할 개수
+
+
+def _today():
+    return datetime.now().strftime('%Y%m%d')
+
+def _closed_until():
+    """마지막으로 확정된 거래일 (수집 단계는 이 값이 바뀔 때만 다시 실행)"""
+    import fetcher
+    return fetcher.closed_until(datetime.now()).strftime('%Y%m%d')
+
+# 동시에 실행 중인 단계의 출력 줄이 서로 섞이지 않도록 한 줄씩 씁니다.
+_print_lock = threading.Lock()
+
+def _say(message):
+    with _print_lock:
+        print(message, flush=True)
+
+def _latest_inputs():
+    """시각화·분석 단계 입력: 가장 최근 deajeon_index CSV와 코스닥 지수 CSV"""
+    from analytics import latest_index_csv, latest_kosdaq_csv
+    return [path for path in (latest_index_csv(), latest_kosdaq_csv()) if path]
+
+
+# 단계 정의 (DAG)
+# - script/args: 실행할 스크립트 (현재 폴더에서 실행, ./data 기준)
+# - deps: 먼저 끝나야 하는 단계
+# - code: 결과에 영향을 주는 스크립트 (scripts 폴더 기준)
+# - inputs: 입력 파일·폴더·glob 패턴 또는 경로 목록을 돌려주는 함수 (내용 해시로 비교)
+# - params: 입력 지문에 더할 값을 돌려주는 함수 (예: 마지막 확정 거래일)
+# - outputs: 실행 후 있어야 하는 파일 glob 패턴 ({today}는 오늘 날짜)
+STAGES = {
+    'fetch_constituents': {
+        'script': '01_save_data.py', 'args': [], 'deps': [],
+        'code': ['01_save_data.py', 'fetcher.py', 'fetch_scheduler.py', 'store.py', 'krx_cache.py', 'ticker.py', 'universe.py'],
+        'inputs': ['./data/universe.json'], 'params': lambda: {'closed_until': _closed_until()},
+        'outputs': ['./data/store/ohlcv', './data/store/marcap'],
+    },
+    'fetch_kosdaq': {
+        'script': 'kosdaq.py', 'args': [], 'deps': [],
+        'code': ['kosdaq.py', 'krx_cache.py'],
+        'inputs': [], 'params': lambda: {'closed_until': _closed_until()},
+        'outputs': ['./data/kosdaq/ohlcv_*_{today}.csv'],
+    },
+    'calculate_index': {
+        'script': '02_calculate_index.py', 'args': ['--incremental'], 'deps': ['fetch_constituents'],
+        'code': ['02_calculate_index.py', 'index_engine.py', 'data_quality.py', 'loader.py', 'store.py', 'ticker.py'],
+        'inputs': ['./data/store/ohlcv', './data/store/marcap'], 'params': lambda: {'today': _today()},
+        'outputs': ['./data/deajeon_index/deajeon_index_{today}.csv'],
+    },
+    'regional_indices': {
+        'script': 'universe.py', 'args': ['run'], 'deps': ['fetch_constituents'],
+        'code': ['universe.py', 'multi_index.py', 'divisor.py', 'loader.py', 'store.py', 'ticker.py', 'trading_calendar.py'],
+        'inputs': ['./data/store/ohlcv', './data/store/marcap', './data/universe.json'], 'params': lambda: {'today': _today()},
+        'outputs': ['./data/deajeon_index/regional_index_{today}.csv'],
+    },
+    'analytics': {
+        'script': 'analytics.py', 'args': [], 'deps': ['calculate_index', 'fetch_kosdaq'],
+        'code': ['analytics.py', 'trading_calendar.py'],
+        'inputs': [_latest_inputs], 'params': lambda: {},
+        'outputs': ['./data/deajeon_index/analytics_*.csv'],
+    },
+    'visualize': {
+        'script': '03_viz.py', 'args': [], 'deps': ['calculate_index', 'fetch_kosdaq'],
+        'code': ['03_viz.py', 'analytics.py', 'trading_calendar.py'],
+        'inputs': [_latest_inputs], 'params': lambda: {'today': _today()},
+        'outputs': ['./comparison_*_{today}.png'],
+    },
+}
+
+
+def _expand(entry):
+    """입력 항목(경로, 폴더, glob, 함수)을 정렬된 파일 경로 목록으로 펼칩니다."""
+    paths = entry() if callable(entry) else glob.glob(entry)
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in names)
+        elif os.path.isfile(path):
+            files.append(path)
+    return sorted(files)
+
+
+class FileHasher:
+    """
+    파일 내용 해시(sha1)를 (크기, 수정 시각)이 같으면 다시 읽지 않고 재사용합니다.
+    - 캐시는 상태 파일에 함께 저장해 실행 간에도 유지합니다.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache or {}
+
+    def hash(self, path):
+        stat = os.stat(path)
+        key = os.path.normpath(path)
+        cached = self.cache.get(key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        self.cache[key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return self.cache[key][2]
+
+def fingerprint(stage, hasher):
+    """단계의 코드·입력 파일 내용과 params를 하나의 해시로 만듭니다."""
+    digest = hashlib.sha1()
+    files = [os.path.join(SCRIPTS_DIR, name) for name in stage['code']]
+    for entry in stage['inputs']:
+        files.extend(_expand(entry))
+    for path in files:
+        if os.path.isfile(path):
+            digest.update(f'{os.path.normpath(path)}\0{hasher.hash(path)}\n'.encode('utf-8'))
+        else:
+            digest.update(f'{os.path.normpath(path)}\0(없음)\n'.encode('utf-8'))
+    digest.update(json.dumps(stage['params'](), sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+def outputs_exist(stage):
+    today = _today()
+    return all(glob.glob(pattern.format(today=today)) for pattern in stage['outputs'])
+
+def load_state(path=PIPELINE_STATE_FILE):
+    if not os.path.exists(path):
+        return {'stages': {}, 'hashes': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_state(state, path=PIPELINE_STATE_FILE):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+def run_stage(name, stage, log_dir=PIPELINE_LOG_DIR):
+    """
+    단계 스크립트를 하위 프로세스로 실행하고 (성공 여부, 로그 파일 경로, 걸린 시간)을 반환합니다.
+    - 출력(stdout·stderr)은 줄마다 [단계 이름]을 붙여 바로 보여 주고, 전체를 log_dir/{단계 이름}.log에도 씁니다.
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    log_path = os.path.join(log_dir, f'{name}.log')
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(SCRIPTS_DIR, stage['script']), *stage['args']],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, encoding='utf-8', errors='replace',
+        # 줄 단위로 바로 받도록 버퍼링을 끄고, 파이프에서는 줄마다 찍히는 tqdm 진행 표시를 드물게 갱신합니다.
+        env={**os.environ, 'PYTHONIOENCODING': 'utf-8', 'PYTHONUNBUFFERED': '1', 'TQDM_MININTERVAL': '10'},
+    )
+    with open(log_path, 'w', encoding='utf-8') as log:
+        for line in process.stdout:
+            log.write(line)
+            _say(f"[{name}] {line.rstrip()}")
+    return process.wait() == 0, log_path, time.perf_counter() - started
+
+def run(stages=STAGES, only=None, force=False, dry_run=False, workers=MAX_PARALLEL_STAGES, state_path=PIPELINE_STATE_FILE):
+    """
+    선행 단계가 끝난 단계부터 실행합니다. (의존 관계가 없는 단계는 동시에)
+    - 입력 지문이 지난 성공 때와 같고 출력이 남아 있으면 건너뜁니다. (force=True면 모두 실행)
+    - 실패한 단계에 의존하는 단계는 실행하지 않습니다.
+    - only: 실행할 단계 이름 목록 (나머지 단계는 이미 끝난 것으로 봅니다)
+    - 반환값: {단계 이름: '실행'|'건너뜀'|'실패'|'중단'}
+    """
+    selected = [name for name in stages if only is None or name in only]
+    state = load_state(state_path)
+    hasher = FileHasher(state.get('hashes'))
+    status = {name: '건너뜀' for name in stages if name not in selected}
+    pending, running = list(selected), {}
+
+    def ready(name):
+        return all(status.get(dep) in ('실행', '건너뜀') for dep in stages[name]['deps'])
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        while pending or running:
+            for name in list(pending):
+                stage = stages[name]
+                if any(status.get(dep) in ('실패', '중단') for dep in stage['deps']):
+                    pending.remove(name)
+                    status[name] = '중단'
+                    _say(f"[{name}] 선행 단계 실패로 실행하지 않습니다.")
+                    continue
+                if not ready(name):
+                    continue
+                pending.remove(name)
+                current = fingerprint(stage, hasher)
+                previous = state['stages'].get(name, {}).get('fingerprint')
+                if not force and current == previous and outputs_exist(stage):
+                    status[name] = '건너뜀'
+                    _say(f"[{name}] 입력 변경 없음 - 건너뜀")
+                elif dry_run:
+                    status[name] = '건너뜀'
+                    _say(f"[{name}] 실행 예정 ({'강제' if force else '입력 변경' if previous else '첫 실행'})")
+                else:
+                    _say(f"[{name}] 실행 시작: {stage['script']} {' '.join(stage['args'])}".rstrip())
+                    running[executor.submit(run_stage, name, stage)] = (name, current)
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, current = running.pop(future)
+                ok, log_path, seconds = future.result()
+                if ok:
+                    status[name] = '실행'
+                    # 실행 중 바뀌지 않는 입력(코드·이전 단계 결과)의 지문을 기록합니다.
+                    state['stages'][name] = {'fingerprint': current, 'finished_at': datetime.now().isoformat(timespec='seconds'),
+                                             'seconds': round(seconds, 2)}
+                    _say(f"[{name}] ✅ 완료 ({seconds:.1f}초)")
+                else:
+                    status[name] = '실패'
+                    state['stages'].pop(name, None)
+                    _say(f"[{name}] 에러: 실행 실패 ({seconds:.1f}초, 전체 출력: {log_path})")
+            state['hashes'] = hasher.cache
+            if not dry_run:
+                save_state(state, state_path)
+    return status
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='01 → 02 → 03 파이프라인 실행 (입력이 바뀐 단계만)')
+    parser.add_argument('--only', nargs='+', choices=list(STAGES), help='실행할 단계만 지정합니다.')
+    parser.add_argument('--force', action='store_true', help='입력 변경 여부와 관계없이 모두 실행합니다.')
+    parser.add_argument('--dry-run', action='store_true', help='실행하지 않고 실행할 단계만 보여줍니다.')
+    parser.add_argument('--workers', type=int, default=MAX_PARALLEL_STAGES, help='동시에 실행할 단계 수')
+    args = parser.parse_args(argv)
+    status = run(only=args.only, force=args.force, dry_run=args.dry_run, workers=args.workers)
+    print("파이프라인 결과: " + ', '.join(f"{name} {result}" for name, result in status.items()))
+    return 1 if any(result in ('실패', '중단') for result in status.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,294 @@
+# 티커·연도 단위로 파티션된 컬럼형 로컬 저장소입니다.
+#
+# 저장 구조: {STORE_DIR}/{dataset}/{ticker}/{year}.npz
+# - 각 파티션은 '날짜'(datetime64[D]) 배열과 스키마의 컬럼별 배열을 담은 비압축 npz 파일입니다.
+# - npz는 배열 단위로 지연 로드되므로 필요한 컬럼만 읽고, 기간 밖 연도 파티션은 열지 않습니다.
+# - 같은 날짜는 한 행만 유지되며 (새 값이 덮어씀), 파일은 임시 파일에 쓴 뒤 교체합니다.
+# - 기존 CSV 트리 이전: python scripts/store.py
+
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import metrics
+
+# --- 설정 변수 ---
+# 데이터셋별 컬럼과 dtype (pykrx 티커별 조회 결과 기준)
+STORE_DIR = './data/store'
+DATASET_SCHEMAS = {
+    'ohlcv': {'시가': 'int64', '고가': 'int64', '저가': 'int64', '종가': 'int64', '거래량': 'int64', '등락률': 'float64'},
+    'marcap': {'시가총액': 'int64', '거래량': 'int64', '거래대금': 'int64', '상장주식수': 'int64'},
+}
+DATE_COLUMN = '날짜'
+NAMES_FILE = 'tickers.json'
+COVERAGE_FILE = 'coverage.json'
+MARKETS_FILE = 'markets.json'
+
+# 메타데이터(json) 파일 갱신 시 동시 쓰기를 막기 위한 잠금
+_meta_lock = threading.Lock()
+
+
+def _partition_dir(dataset, ticker, store_dir=STORE_DIR):
+    if dataset not in DATASET_SCHEMAS:
+        raise ValueError(f"알 수 없는 데이터셋입니다: {dataset}")
+    return os.path.join(store_dir, dataset, ticker)
+
+def _partition_years(dataset, ticker, store_dir=STORE_DIR):
+    """티커의 저장된 연도 파티션 목록을 (연도, 경로) 오름차순으로 반환합니다."""
+    partition_dir = _partition_dir(dataset, ticker, store_dir)
+    if not os.path.isdir(partition_dir):
+        return []
+    years = []
+    for name in os.listdir(partition_dir):
+        if name.endswith('.npz') and name[:-4].isdigit():
+            years.append((int(name[:-4]), os.path.join(partition_dir, name)))
+    return sorted(years)
+
+def _read_partition(path, columns):
+    """파티션 파일에서 지정한 컬럼만 읽어 dict로 반환합니다."""
+    with np.load(path) as npz:
+        return {column: npz[column] for column in [DATE_COLUMN] + columns}
+
+def _write_partition(path, arrays):
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+def _to_frame(df, dataset):
+    """
+    pykrx 결과(날짜 인덱스) 또는 '날짜' 컬럼이 있는 DataFrame을 저장 스키마에 맞게 정리합니다.
+    - 스키마에 없는 컬럼은 버리고, 없는 정수 컬럼은 0으로 채웁니다.
+    - 같은 날짜가 여러 번 있으면 마지막 행을 사용합니다.
+    """
+    schema = DATASET_SCHEMAS[dataset]
+    if DATE_COLUMN not in df.columns:
+        df = df.rename_axis(DATE_COLUMN).reset_index()
+    frame = df.reindex(columns=[DATE_COLUMN] + list(schema))
+    frame[DATE_COLUMN] = pd.to_datetime(frame[DATE_COLUMN]).dt.normalize()
+    for column, dtype in schema.items():
+        if dtype == 'int64':
+            frame[column] = frame[column].fillna(0)
+        frame[column] = frame[column].astype(dtype)
+    return frame.drop_duplicates(subset=DATE_COLUMN, keep='last').sort_values(DATE_COLUMN)
+
+def append(dataset, ticker, df, store_dir=STORE_DIR):
+    """
+    티커의 데이터를 저장소에 추가합니다. (수집기용 쓰기 API)
+    - 이미 있는 날짜는 새 값으로 교체하므로 같은 데이터를 여러 번 넣어도 결과가 같습니다.
+    - 바뀌는 연도 파티션만 다시 씁니다.
+    - 새로 추가된 날짜 수를 반환합니다.
+    """
+    if df is None or df.empty:
+        return 0
+    schema = DATASET_SCHEMAS[dataset]
+    frame = _to_frame(df, dataset)
+    partition_dir = _partition_dir(dataset, ticker, store_dir)
+    os.makedirs(partition_dir, exist_ok=True)
+
+    added = 0
+    for year, new_rows in frame.groupby(frame[DATE_COLUMN].dt.year):
+        path = os.path.join(partition_dir, f'{year}.npz')
+        if os.path.exists(path):
+            old = pd.DataFrame(_read_partition(path, list(schema)))
+            old[DATE_COLUMN] = pd.to_datetime(old[DATE_COLUMN])
+            added += (~new_rows[DATE_COLUMN].isin(old[DATE_COLUMN])).sum()
+            new_rows = pd.concat([old, new_rows], ignore_index=True)
+            new_rows = new_rows.drop_duplicates(subset=DATE_COLUMN, keep='last').sort_values(DATE_COLUMN)
+        else:
+            added += len(new_rows)
+
+        arrays = {DATE_COLUMN: new_rows[DATE_COLUMN].to_numpy().astype('datetime64[D]')}
+        for column, dtype in schema.items():
+            arrays[column] = new_rows[column].to_numpy(dtype=dtype)
+        _write_partition(path, arrays)
+        metrics.count('files_written')
+    metrics.count('rows_written', int(added))
+    return int(added)
+
+def stored_dates(dataset, ticker, store_dir=STORE_DIR):
+    """티커에 저장된 날짜 목록을 DatetimeIndex로 반환합니다. ('날짜' 컬럼만 읽습니다)"""
+    parts = [_read_partition(path, [])[DATE_COLUMN] for _, path in _partition_years(dataset, ticker, store_dir)]
+    if not parts:
+        return pd.DatetimeIndex([], name=DATE_COLUMN)
+    return pd.DatetimeIndex(np.concatenate(parts), name=DATE_COLUMN)
+
+def list_tickers(dataset, store_dir=STORE_DIR):
+    """저장소에 데이터가 있는 티커 목록을 반환합니다."""
+    dataset_dir = os.path.join(store_dir, dataset)
+    if not os.path.isdir(dataset_dir):
+        return []
+    return sorted(name for name in os.listdir(dataset_dir) if _partition_years(dataset, name, store_dir))
+
+def read(dataset, tickers=None, start_date=None, end_date=None, columns=None, store_dir=STORE_DIR):
+    """
+    저장소에서 데이터를 읽습니다. (인덱스 엔진용 읽기 API)
+    - columns: 읽을 컬럼 (None이면 스키마 전체). '날짜'와 'ticker'는 항상 포함됩니다.
+    - start_date/end_date 밖의 연도 파티션은 열지 않고, 나머지는 날짜 마스크로 거릅니다.
+    - 'ticker'는 category 타입으로 만듭니다. (티커 문자열을 행마다 만들지 않음)
+    """
+    schema = DATASET_SCHEMAS[dataset]
+    columns = [column for column in (list(schema) if columns is None else columns) if column in schema]
+    start = pd.Timestamp(start_date).normalize() if start_date is not None else None
+    end = pd.Timestamp(end_date).normalize() if end_date is not None else None
+    tickers = list_tickers(dataset, store_dir) if tickers is None else sorted(set(tickers))
+
+    parts = {column: [] for column in [DATE_COLUMN] + columns}
+    code_parts = []
+    for code, ticker in enumerate(tickers):
+        for year, path in _partition_years(dataset, ticker, store_dir):
+            if (start is not None and year < start.year) or (end is not None and year > end.year):
+                continue
+            arrays = _read_partition(path, columns)
+            metrics.count('files_read')
+            mask = np.ones(len(arrays[DATE_COLUMN]), dtype=bool)
+            if start is not None:
+                mask &= arrays[DATE_COLUMN] >= start.to_datetime64()
+            if end is not None:
+                mask &= arrays[DATE_COLUMN] <= end.to_datetime64()
+            for column, values in arrays.items():
+                parts[column].append(values[mask])
+            code_parts.append(np.full(mask.sum(), code, dtype=np.int32))
+
+    data = {}
+    for column, values in parts.items():
+        dtype = 'datetime64[ns]' if column == DATE_COLUMN else schema[column]
+        data[column] = np.concatenate(values).astype(dtype) if values else np.array([], dtype=dtype)
+    df = pd.DataFrame(data)
+    metrics.count('rows_read', len(df))
+    codes = np.concatenate(code_parts) if code_parts else np.array([], dtype=np.int32)
+    df.insert(1, 'ticker', pd.Categorical.from_codes(codes, categories=pd.Index(tickers, dtype=object)))
+    return df
+
+def _load_meta(filename, store_dir):
+    path = os.path.join(store_dir, filename)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def _save_meta(meta, filename, store_dir):
+    os.makedirs(store_dir, exist_ok=True)
+    path = os.path.join(store_dir, filename)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+def load_names(store_dir=STORE_DIR):
+    """티커 → 종목명 매핑을 불러옵니다."""
+    return _load_meta(NAMES_FILE, store_dir)
+
+def save_names(names, store_dir=STORE_DIR):
+    """티커 → 종목명 매핑을 기존 매핑에 합쳐 저장합니다."""
+    with _meta_lock:
+        merged = _load_meta(NAMES_FILE, store_dir)
+        merged.update(names)
+        _save_meta(merged, NAMES_FILE, store_dir)
+
+def load_markets(store_dir=STORE_DIR):
+    """티커 → 시장 구분('KOSPI', 'KOSDAQ') 매핑을 불러옵니다."""
+    return _load_meta(MARKETS_FILE, store_dir)
+
+def save_markets(markets, store_dir=STORE_DIR):
+    """티커 → 시장 구분 매핑을 기존 매핑에 합쳐 저장합니다."""
+    with _meta_lock:
+        merged = _load_meta(MARKETS_FILE, store_dir)
+        merged.update(markets)
+        _save_meta(merged, MARKETS_FILE, store_dir)
+
+def load_coverage(dataset, ticker, store_dir=STORE_DIR):
+    """
+    티커에 대해 이미 조회를 마친 기간 목록을 [(시작일, 종료일), ...]로 반환합니다.
+    - 조회했지만 데이터가 없던 날(상장 전, 거래정지)도 포함되므로 다시 요청하지 않아도 됩니다.
+    """
+    return load_all_coverage(dataset, store_dir).get(ticker, [])
+
+def load_all_coverage(dataset, store_dir=STORE_DIR):
+    """데이터셋의 모든 티커에 대한 조회 완료 기간을 {티커: [(시작일, 종료일), ...]}로 반환합니다."""
+    meta = _load_meta(COVERAGE_FILE, store_dir).get(dataset, {})
+    return {ticker: [(pd.Timestamp(start), pd.Timestamp(end)) for start, end in intervals]
+            for ticker, intervals in meta.items()}
+
+def _merge_intervals(intervals):
+    merged = []
+    for s, e in sorted(intervals):
+        if merged and s <= merged[-1][1] + pd.Timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], e))
+        else:
+            merged.append((s, e))
+    return merged
+
+def mark_covered_many(dataset, tickers, ranges, store_dir=STORE_DIR):
+    """
+    여러 티커에 대해 조회를 마친 기간들을 한 번에 기록합니다.
+    - ranges: [(시작일, 종료일), ...] — 겹치거나 맞닿은 기간은 하나로 합칩니다.
+    """
+    ranges = [(pd.Timestamp(s).normalize(), pd.Timestamp(e).normalize()) for s, e in ranges]
+    ranges = [(s, e) for s, e in ranges if s <= e]
+    if not ranges:
+        return
+    with _meta_lock:
+        meta = _load_meta(COVERAGE_FILE, store_dir)
+        dataset_meta = meta.setdefault(dataset, {})
+        for ticker in tickers:
+            intervals = [(pd.Timestamp(s), pd.Timestamp(e)) for s, e in dataset_meta.get(ticker, [])]
+            merged = _merge_intervals(intervals + ranges)
+            dataset_meta[ticker] = [[s.strftime('%Y-%m-%d'), e.strftime('%Y-%m-%d')] for s, e in merged]
+        _save_meta(meta, COVERAGE_FILE, store_dir)
+
+def mark_covered(dataset, ticker, start_date, end_date, store_dir=STORE_DIR):
+    """조회를 마친 기간을 기록합니다. 겹치거나 맞닿은 기간은 하나로 합칩니다."""
+    mark_covered_many(dataset, [ticker], [(start_date, end_date)], store_dir)
+
+def latest_csv_files(directory, dataset):
+    """
+    기존 CSV 디렉토리를 한 번만 훑어 티커별 최신 파일 목록을 만듭니다.
+    - 파일명: {dataset}_{ticker}_{name}_{YYYYMMDD}.csv (종목명에 '_'가 들어갈 수 있어 양 끝에서 분리)
+    - 반환값: {티커: (파일 날짜, 경로, 종목명)}
+    """
+    latest = {}
+    if not os.path.isdir(directory):
+        return latest
+    prefix = f'{dataset}_'
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not (entry.name.startswith(prefix) and entry.name.endswith('.csv')):
+                continue
+            stem = entry.name[len(prefix):-len('.csv')]
+            if stem.count('_') < 2:
+                continue
+            ticker, rest = stem.split('_', 1)
+            name, file_date = rest.rsplit('_', 1)
+            if ticker not in latest or file_date > latest[ticker][0]:
+                latest[ticker] = (file_date, entry.path, name)
+    return latest
+
+def migrate_csv_tree(ohlcv_dir='./data/ohlcv', marcap_dir='./data/marcap', store_dir=STORE_DIR):
+    """
+    기존 per-ticker 날짜별 CSV 파일(ohlcv_{ticker}_{name}_{YYYYMMDD}.csv 등)을 저장소로 옮깁니다.
+    - 티커마다 파일명의 날짜가 가장 최신인 파일을 사용합니다.
+    - mode='a'로 쌓인 중복 날짜는 마지막 행만 남깁니다.
+    - 원본 CSV 파일은 삭제하지 않습니다.
+    """
+    names = {}
+    for dataset, directory in (('ohlcv', ohlcv_dir), ('marcap', marcap_dir)):
+        latest = latest_csv_files(directory, dataset)
+        names.update({ticker: name for ticker, (_, _, name) in latest.items()})
+
+        for ticker, (_, path, _) in sorted(latest.items()):
+            df = pd.read_csv(path)
+            # 헤더가 중간에 다시 쓰인 파일을 대비해 날짜가 아닌 행은 제외
+            df = df[pd.to_datetime(df[DATE_COLUMN], errors='coerce').notna()]
+            added = append(dataset, ticker, df, store_dir)
+            print(f"{dataset} {ticker}: {added}개 날짜 이전 완료 ({os.path.basename(path)})")
+
+    save_names(names, store_dir)
+    return names
+
+
+if __name__ == '__main__':
+    # 기존 CSV 트리를 저장소로 한 번에 이전합니다.
+    migrated = migrate_csv_tree()
+    print(f"\n이전 완료: {len(migrated)}개 티커 → '{STORE_DIR}'")
@@ -0,0 +1,140 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# --- 설정 변수 ---
+CALENDAR_DIR = './data/calendar'
+CALENDAR_FILE = 'krx_calendar.npz'
+# 올해 이후 연도는 (대체공휴일·선거일 등이 뒤늦게 확정되므로) 이 일수가 지나면 다시 만듭니다.
+REFRESH_DAYS = 30
+# 휴장일 규칙이 바뀌면 올려서 저장된 달력을 다시 만듭니다.
+CALENDAR_VERSION = 2
+
+# 날짜별 플래그 비트
+WEEKEND = 1
+HOLIDAY = 2        # 공휴일 (holidayskr 기준)
+KRX_CLOSED = 4     # 공휴일은 아니지만 거래소가 쉬는 날 (연말 휴장일, 근로자의 날)
+
+_cache = {}
+
+
+def _krx_closures(year, holidays=()):
+    """
+    공휴일 목록에는 없지만 KRX가 휴장하는 날을 반환합니다.
+    - 근로자의 날(5월 1일)
+    - 연말 휴장일: 그해 마지막 평일 중 공휴일이 아닌 날 (예: 2022-12-30, 2023-12-29)
+    """
+    holidays = set(pd.DatetimeIndex(holidays))
+    year_end = pd.Timestamp(year, 12, 31)
+    while year_end.dayofweek >= 5 or year_end in holidays:
+        year_end -= pd.Timedelta(days=1)
+    return [pd.Timestamp(year, 5, 1), year_end]
+
+def _build_flags(first_year, last_year):
+    """first_year ~ last_year의 날짜별 플래그 배열을 만듭니다. (연도별로 holidayskr를 한 번씩만 조회)"""
+    # holidayskr는 import 시 공휴일 데이터를 내려받으므로 달력을 새로 만들 때만 불러옵니다.
+    from holidayskr import year_holidays
+
+    days = pd.date_range(f'{first_year}-01-01', f'{last_year}-12-31')
+    flags = np.where(days.dayofweek >= 5, WEEKEND, 0).astype(np.uint8)
+    for year in range(first_year, last_year + 1):
+        holidays = pd.DatetimeIndex([pd.Timestamp(day) for day, _ in year_holidays(str(year))])
+        flags[days.isin(holidays)] |= HOLIDAY
+        flags[days.isin(pd.DatetimeIndex(_krx_closures(year, holidays)))] |= KRX_CLOSED
+    return flags
+
+
+class TradingCalendar:
+    """
+    KRX 거래일 달력입니다.
+    - origin(첫 해 1월 1일)부터 하루 1바이트의 플래그 배열을 가지고, 날짜 배열을 위치로 바꿔 한 번에 조회합니다.
+    """
+
+    def __init__(self, first_year, last_year, flags):
+        self.first_year = first_year
+        self.last_year = last_year
+        self.origin = np.datetime64(f'{first_year}-01-01', 'D')
+        self.flags = flags
+
+    def covers(self, first_year, last_year):
+        return self.first_year <= first_year and last_year <= self.last_year
+
+    def _flags_for(self, dates):
+        positions = (pd.DatetimeIndex(dates).values.astype('datetime64[D]') - self.origin).astype(np.int64)
+        if len(positions) and (positions.min() < 0 or positions.max() >= len(self.flags)):
+            raise ValueError(f"달력 범위({self.first_year}~{self.last_year}) 밖의 날짜입니다.")
+        return self.flags[positions]
+
+    def is_holiday(self, dates):
+        """공휴일 여부 (주말은 포함하지 않음, holidayskr.is_holiday와 동일)"""
+        return (self._flags_for(dates) & HOLIDAY) != 0
+
+    def is_trading_day(self, dates):
+        """거래일 여부 (주말·공휴일·KRX 휴장일 제외)"""
+        return self._flags_for(dates) == 0
+
+    def trading_days(self, start_date, end_date):
+        """start_date ~ end_date (양 끝 포함) 사이의 거래일 목록"""
+        days = pd.date_range(pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize())
+        return days[self.is_trading_day(days)]
+
+
+def get_calendar(first_year, last_year, calendar_dir=CALENDAR_DIR):
+    """
+    first_year ~ last_year를 포함하는 달력을 반환합니다.
+    - 프로세스 안에서는 메모리에, 프로세스 간에는 calendar_dir의 npz 파일에 저장해 다시 쓰기 때문에
+      holidayskr 조회는 달력 범위가 넓어지거나 갱신 주기가 지났을 때만 일어납니다.
+    """
+    cached = _cache.get(calendar_dir)
+    if cached is not None and cached.covers(first_year, last_year):
+        return cached
+
+    path = os.path.join(calendar_dir, CALENDAR_FILE)
+    current_year = pd.Timestamp.now().year
+    if os.path.exists(path):
+        with np.load(path) as npz:
+            stored_first, stored_last = int(npz['first_year']), int(npz['last_year'])
+            stored_flags, built_at = npz['flags'], float(npz['built_at'])
+            version = int(npz['version']) if 'version' in npz.files else 1
+        stale = (stored_last >= current_year and time.time() - built_at > REFRESH_DAYS * 86400) \
+            or version != CALENDAR_VERSION
+        calendar = TradingCalendar(stored_first, stored_last, stored_flags)
+        if calendar.covers(first_year, last_year) and not stale:
+            _cache[calendar_dir] = calendar
+            return calendar
+        if version != CALENDAR_VERSION:
+            print("달력 규칙이 바뀌어 KRX 거래일 달력을 다시 만듭니다.")
+        first_year, last_year = min(first_year, stored_first), max(last_year, stored_last)
+
+    calendar = TradingCalendar(first_year, last_year, _build_flags(first_year, last_year))
+    os.makedirs(calendar_dir, exist_ok=True)
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, first_year=first_year, last_year=last_year, flags=calendar.flags, built_at=time.time(),
+             version=CALENDAR_VERSION)
+    os.replace(tmp_path, path)
+    _cache[calendar_dir] = calendar
+    return calendar
+
+def _calendar_for(dates):
+    dates = pd.DatetimeIndex(dates)
+    if dates.empty:
+        year = pd.Timestamp.now().year
+        return get_calendar(year, year)
+    return get_calendar(dates.min().year, dates.max().year)
+
+def holiday_mask(dates):
+    """날짜 배열의 공휴일 여부를 boolean 배열로 반환합니다."""
+    return _calendar_for(dates).is_holiday(dates)
+
+def is_trading_day(dates):
+    """날짜 배열의 거래일 여부를 boolean 배열로 반환합니다."""
+    return _calendar_for(dates).is_trading_day(dates)
+
+def trading_days(start_date, end_date):
+    """start_date ~ end_date 사이의 거래일 목록을 DatetimeIndex로 반환합니다."""
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    if end < start:
+        return pd.DatetimeIndex([])
+    return get_calendar(start.year, end.year).trading_days(start, end)
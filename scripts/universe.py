@@ -0,0 +1,118 @@
+import argparse
+import json
+import os
+import re
+from datetime import datetime
+
+import pandas as pd
+
+import multi_index
+import store
+from divisor import EVENT_ADD, EVENT_REMOVE
+from multi_index import basket_universe
+from ticker import tickers
+
+# --- 설정 변수 ---
+REGISTRY_FILE = './data/universe.json'  # 코드 밖에서 추가·수정하는 지역 정의 (없으면 아래 기본 지역만)
+INDEX_START = '2025-01-01'              # 지역 인덱스 계산 시작일
+OUTPUT_NAME = 'regional_index'          # 결과: DEAJEON_INDEX_DIR/regional_index_YYYYMMDD.csv (지역별 '{키}_index' 컬럼)
+
+# 지역 정의 형식 (키: 영문 소문자·숫자·_)
+# - label: 표시 이름
+# - tickers: 처음 구성 종목
+# - changes: 구성 변경 기록 [{'날짜': 'YYYY-MM-DD', 'ticker': 티커, '구분': '편입' 또는 '제외'}, ...] (변경일부터 적용)
+# - weighting, cap, market: multi_index 바스켓 옵션 (생략하면 divisor.py와 같은 제수 방식 시가총액 가중)
+#   편입일에 아직 데이터가 없는 종목은 데이터가 생긴 다음 거래일부터, 상장폐지 종목은 마지막 데이터일 다음 거래일에 빠지며
+#   그때마다 제수를 고치므로 인덱스가 끊기지 않습니다.
+# REGISTRY_FILE에 같은 형식의 JSON({키: 정의, ...})을 두면 지역을 더하거나 같은 키의 정의를 바꿉니다.
+# 예: {"sejong": {"label": "세종", "tickers": ["000000", ...], "changes": []}}
+REGIONS = {
+    'deajeon': {'label': '대전', 'tickers': tickers, 'changes': []},
+}
+BASKET_OPTIONS = ('weighting', 'cap', 'market')
+
+
+def validate_region(key, region):
+    """지역 정의를 검사하고 정리한 사본을 반환합니다. 잘못된 정의는 ValueError"""
+    if not re.fullmatch(r'[a-z][a-z0-9_]*', key):
+        raise ValueError(f"지역 키는 영문 소문자·숫자·_만 쓸 수 있습니다: {key}")
+    region_tickers = [str(ticker) for ticker in region.get('tickers') or []]
+    changes = []
+    for change in region.get('changes') or []:
+        if change.get('구분') not in (EVENT_ADD, EVENT_REMOVE):
+            raise ValueError(f"{key}: 알 수 없는 변경 구분입니다 - {change.get('구분')} ({EVENT_ADD} 또는 {EVENT_REMOVE})")
+        try:
+            date = pd.Timestamp(change['날짜']).strftime('%Y-%m-%d')
+        except (KeyError, ValueError):
+            raise ValueError(f"{key}: 변경 날짜가 잘못되었습니다 - {change}") from None
+        changes.append({'날짜': date, 'ticker': str(change.get('ticker')), '구분': change['구분']})
+    for ticker in region_tickers + [change['ticker'] for change in changes]:
+        if not re.fullmatch(r'\d{6}', ticker):
+            raise ValueError(f"{key}: 티커는 6자리 숫자여야 합니다 - {ticker}")
+    if len(set(region_tickers)) != len(region_tickers):
+        print(f"경고: {key} 지역에 중복 티커가 있어 한 번만 사용합니다.")
+        region_tickers = list(dict.fromkeys(region_tickers))
+    return {'label': region.get('label', key), 'tickers': region_tickers,
+            'changes': sorted(changes, key=lambda change: change['날짜']),
+            **{option: region[option] for option in BASKET_OPTIONS if option in region}}
+
+def load_registry(path=REGISTRY_FILE):
+    """기본 지역(REGIONS)에 REGISTRY_FILE의 지역을 더한 {키: 지역 정의}를 반환합니다."""
+    regions = dict(REGIONS)
+    if path and os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            regions.update(json.load(f))
+    return {key: validate_region(key, region) for key, region in regions.items()}
+
+def members_on(region, date):
+    """지정한 날짜의 구성 종목 (변경 기록 반영, 정렬)"""
+    date = pd.Timestamp(date)
+    members = set(region['tickers'])
+    for change in region['changes']:
+        if pd.Timestamp(change['날짜']) > date:
+            break
+        if change['구분'] == EVENT_ADD:
+            members.add(change['ticker'])
+        else:
+            members.discard(change['ticker'])
+    return sorted(members)
+
+def to_baskets(registry):
+    """지역 정의를 multi_index 바스켓 목록으로 바꿉니다. (결과 컬럼: '{키}_index')"""
+    return [{'name': f'{key}_index', 'tickers': region['tickers'], 'changes': region['changes'],
+             **{option: region[option] for option in BASKET_OPTIONS if option in region}}
+            for key, region in registry.items()]
+
+def union_tickers(registry):
+    """모든 지역이 한 번이라도 포함하는 종목의 합집합 (수집·로드는 이 목록으로 한 번만)"""
+    return basket_universe(to_baskets(registry))
+
+def run(registry, start_date=INDEX_START, end_date=None):
+    """합집합 종목을 한 번만 불러와 모든 지역 인덱스를 한 번에 계산하고 wide CSV로 저장합니다."""
+    end_date = end_date or datetime.now()
+    return multi_index.run(to_baskets(registry), start_date, end_date, markets=store.load_markets(),
+                           output_name=OUTPUT_NAME)
+
+def summary(registry, date=None):
+    """지역별 구성 종목 수와 합집합 크기를 출력합니다."""
+    date = date or datetime.now()
+    total = 0
+    for key, region in registry.items():
+        members = members_on(region, date)
+        total += len(members)
+        print(f" - {key} ({region['label']}): 현재 {len(members)}종목, 변경 기록 {len(region['changes'])}건")
+    print(f"지역 {len(registry)}개, 구성 종목 합 {total}개 → 수집·로드할 종목 {len(union_tickers(registry))}개 (중복 제외)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='지역 유니버스 레지스트리와 지역 인덱스 계산')
+    parser.add_argument('command', nargs='?', choices=['list', 'run'], default='run',
+                        help='list: 지역·종목 수 확인, run: 모든 지역 인덱스 계산 (기본)')
+    parser.add_argument('--registry', default=REGISTRY_FILE, help='추가 지역 정의 JSON 파일')
+    parser.add_argument('--start', default=INDEX_START, help='계산 시작일 (YYYY-MM-DD)')
+    args = parser.parse_args()
+
+    registry = load_registry(args.registry)
+    summary(registry)
+    if args.command == 'run':
+        run(registry, args.start)
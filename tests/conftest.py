@@ -0,0 +1,52 @@
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import trading_calendar
+
+# holidayskr는 import할 때 공휴일 데이터를 내려받으므로, 테스트에서는 고정된 공휴일 목록으로 바꿔 네트워크 없이 실행합니다.
+HOLIDAYS = {
+    '2022-01-01': '신정', '2022-09-12': '대체공휴일', '2022-12-25': '성탄절',
+    '2023-01-23': '설날', '2023-05-05': '어린이날', '2023-12-25': '성탄절',
+    '2024-01-01': '신정', '2024-02-12': '대체공휴일', '2024-12-25': '성탄절',
+    '2025-01-01': '신정', '2025-03-03': '대체공휴일', '2025-05-05': '어린이날', '2025-05-06': '대체공휴일',
+    '2025-06-03': '대통령선거일', '2025-06-06': '현충일', '2025-12-25': '성탄절',
+}
+
+
+def _holidayskr_stub():
+    module = types.ModuleType('holidayskr')
+    module.year_holidays = lambda year: [(pd.Timestamp(day).date(), name) for day, name in HOLIDAYS.items()
+                                         if day.startswith(str(year))]
+    module.is_holiday = lambda date: pd.Timestamp(date).strftime('%Y-%m-%d') in HOLIDAYS
+    return module
+
+@pytest.fixture(autouse=True)
+def offline_holidays(tmp_path, monkeypatch):
+    """모든 테스트에서 holidayskr 대신 HOLIDAYS를 쓰고, 기본 경로(./data/...)에 쓰는 파일은 tmp_path에 만듭니다."""
+    monkeypatch.setitem(sys.modules, 'holidayskr', _holidayskr_stub())
+    monkeypatch.setattr(trading_calendar, '_cache', {})
+    monkeypatch.chdir(tmp_path)
+
+@pytest.fixture
+def weekdays_calendar(monkeypatch):
+    """거래일을 평일로 봅니다. (공휴일 없이 계산하는 테스트용, pytestmark로 켬)"""
+    monkeypatch.setattr(trading_calendar, 'trading_days', lambda start, end: pd.bdate_range(start, end))
+    monkeypatch.setattr(trading_calendar, 'holiday_mask', lambda dates: pd.DatetimeIndex(dates).dayofweek >= 5)
+    monkeypatch.setattr(trading_calendar, 'is_trading_day', lambda dates: pd.DatetimeIndex(dates).dayofweek < 5)
+
+def _stock_frame(ticker, prices, days, shares=1_000):
+    """실제 가격·주식수로 저장소와 같은 모양의 행을 만듭니다. (등락률은 전일 가격 대비, days는 앞에서부터 가격 수만큼 사용)"""
+    prices = np.asarray(prices, dtype=np.int64)
+    shares = np.broadcast_to(np.asarray(shares, dtype=np.int64), prices.shape)
+    change_pct = np.concatenate([[0.0], np.round((prices[1:] / prices[:-1] - 1) * 100, 2)])
+    return pd.DataFrame({'날짜': days[:len(prices)], 'ticker': ticker, '시가총액': prices * shares,
+                         '상장주식수': shares, '등락률': change_pct, '종가': prices})
+
+@pytest.fixture
+def stock_frame():
+    """_stock_frame(ticker, prices, days, shares=1_000) 팩토리"""
+    return _stock_frame
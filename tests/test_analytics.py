@@ -0,0 +1,29 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics
+
+
+def _aligned(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        '날짜': pd.bdate_range('2024-01-01', periods=n),
+        'deajeon_index': 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n))),
+        'kosdaq': 800 * np.exp(np.cumsum(rng.normal(0, 0.01, n))),
+    })
+
+def test_rolling_matches_pandas():
+    aligned = _aligned()
+    result = analytics.compute_analytics(aligned, windows=(20,))
+    returns = np.log(aligned['deajeon_index']).diff()
+    expected = returns.rolling(20).std() * np.sqrt(analytics.TRADING_DAYS_PER_YEAR)
+    assert np.allclose(result['deajeon_변동성_20'], expected, equal_nan=True, atol=1e-12)
+
+def test_window_below_two_is_rejected():
+    with pytest.raises(ValueError):
+        analytics.compute_analytics(_aligned(), windows=(1,))
+    with pytest.raises(argparse.ArgumentTypeError):
+        analytics._window('1')
@@ -0,0 +1,19 @@
+import pytest
+
+import benchmark
+import trading_calendar
+
+
+@pytest.mark.filterwarnings('ignore:Glyph')   # 테스트 환경에 한글 폰트가 없어도 렌더링 단계는 실행합니다.
+def test_run_scenario_smoke(tmp_path, monkeypatch):
+    # 합성 시장 달력만 쓰므로 실제 공휴일 달력(holidayskr)을 만들지 않습니다.
+    monkeypatch.setattr(trading_calendar, '_build_flags', lambda *args: pytest.fail('실제 공휴일 달력을 만들었습니다.'))
+    market = benchmark.SyntheticMarket(n_tickers=5, years=1, seed=1)
+    result = benchmark.run_scenario(market, memory=False, work_dir=str(tmp_path))
+
+    stages = result['stages']
+    assert set(stages) == set(benchmark.STAGES)
+    assert stages['load_store']['rows'] == stages['load_csv']['rows'] > 0
+    assert stages['compute_vectorized']['rows'] == stages['compute_loop']['rows']
+    assert result['params']['trading_days'] == len(market.days)
+    assert trading_calendar._cache == {}   # 실행이 끝나면 원래 달력 캐시로 돌아갑니다.
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import divisor
+
+DAYS = pd.bdate_range('2025-03-03', periods=10)
+
+pytestmark = pytest.mark.usefixtures('weekdays_calendar')
+
+
+def _rebuild(data, tickers, changes=()):
+    return divisor.rebuild(data, tickers, list(changes), DAYS[0], DAYS[-1])
+
+def _state(tickers, nums, starts, changes=()):
+    return {'base_index': divisor.BASE_INDEX, 'tickers': list(tickers), 'changes': list(changes), 'nums': nums,
+            'starts': starts}
+
+def _assert_same_series(updated, rebuilt):
+    for column in ['deajeon_index', '시가총액', '제수']:
+        assert np.array_equal(updated[column].to_numpy(), rebuilt[column].to_numpy()), column
+
+def test_split_does_not_move_index(stock_frame):
+    # 5일째 2:1 액면분할 (기준가 5,000원 대비 +1%). 같은 수익률로 분할이 없었던 경우와 인덱스가 같아야 합니다.
+    prices = [10_000, 10_100, 10_200, 10_000, 5_050, 5_100, 5_000, 5_200, 5_150, 5_100]
+    shares = [1_000] * 4 + [2_000] * 6
+    split = stock_frame('000001', prices, DAYS, shares)
+    split.loc[4, '등락률'] = 1.0   # 분할일 등락률은 기준가 대비
+    unsplit = stock_frame('000001', [p * 2 if i >= 4 else p for i, p in enumerate(prices)], DAYS)
+    other = stock_frame('000002', [3_000 + 10 * i for i in range(10)], DAYS, 5_000)
+
+    split_series, _, events, _ = _rebuild(pd.concat([split, other]), ['000001', '000002'])
+    unsplit_series = _rebuild(pd.concat([unsplit, other]), ['000001', '000002'])[0]
+    np.testing.assert_allclose(split_series['deajeon_index'], unsplit_series['deajeon_index'], rtol=1e-12)
+    assert list(events['구분']) == [divisor.EVENT_SHARES]
+
+def test_issuance_adjusts_divisor(stock_frame):
+    # 주식수만 늘고(유상증자) 가격은 그대로면 인덱스는 움직이지 않고 제수만 커집니다.
+    issued = stock_frame('000001', [10_000] * 10, DAYS, [1_000] * 4 + [1_500] * 6)
+    series = _rebuild(issued, ['000001'])[0]
+    assert (series['deajeon_index'] == divisor.BASE_INDEX).all()
+    assert series['제수'].iloc[4] == pytest.approx(series['제수'].iloc[3] * 1.5)
+
+def test_incremental_change_matches_rebuild(stock_frame):
+    first = stock_frame('000001', [10_000 + 50 * i for i in range(10)], DAYS)
+    # 3일째 상장, 6일째 거래정지(빈 날)인 종목을 7일째 편입
+    listed = stock_frame('000002', [4_000, 4_100, 3_900, 4_200, 4_300, 4_250, 4_400, 4_500], DAYS[2:], 2_000)
+    listed = listed.drop(index=3)
+    change = {'날짜': str(DAYS[6].date()), 'ticker': '000002', '구분': divisor.EVENT_ADD}
+
+    series, nums, _, starts = _rebuild(first, ['000001'])
+    updated, updated_nums, updated_starts = divisor.apply_change(_state(['000001'], nums, starts), series, listed, change)
+    rebuilt, rebuilt_nums, _, rebuilt_starts = _rebuild(pd.concat([first, listed]), ['000001'], [change])
+    _assert_same_series(updated, rebuilt)
+    assert (updated_nums, updated_starts) == (rebuilt_nums, rebuilt_starts)
+
+def test_change_moving_start_date_matches_rebuild(stock_frame):
+    # 기존 구성 종목(000001)은 4일째 상장. 그보다 먼저 데이터가 있는 000002를 2일째 편입하면 시작일이 2일째로 당겨지고,
+    # 000001은 신규 상장 규칙대로 5일째부터 들어갑니다. 다시 제외하면 시작일이 4일째로 돌아갑니다.
+    late = stock_frame('000001', [10_000, 10_100, 10_300, 10_200, 10_400, 10_500, 10_450], DAYS[3:])
+    early = stock_frame('000002', [4_000 + 30 * i for i in range(10)], DAYS, 2_000)
+    add = {'날짜': str(DAYS[1].date()), 'ticker': '000002', '구분': divisor.EVENT_ADD}
+    remove = {'날짜': str(DAYS[1].date()), 'ticker': '000002', '구분': divisor.EVENT_REMOVE}
+    data = pd.concat([late, early])
+
+    series, nums, _, starts = _rebuild(data, ['000001'])
+    added, added_nums, added_starts = divisor.apply_change(_state(['000001'], nums, starts), series, early, add)
+    rebuilt, rebuilt_nums, _, rebuilt_starts = _rebuild(data, ['000001'], [add])
+    assert rebuilt['시가총액'].iloc[3] == early['시가총액'].iloc[3]   # 4일째에는 000002만 들어감
+    _assert_same_series(added, rebuilt)
+    assert (added_nums, added_starts) == (rebuilt_nums, rebuilt_starts)
+
+    removed, removed_nums, removed_starts = divisor.apply_change(
+        _state(['000001'], added_nums, added_starts, [add]), added, early, remove)
+    _assert_same_series(removed, series)
+    assert (removed_nums, removed_starts) == (nums, starts)
+
+def test_change_without_stored_data_leaves_index_unchanged(stock_frame):
+    first = stock_frame('000001', [10_000 + 50 * i for i in range(10)], DAYS)
+    series, nums, _, starts = _rebuild(first, ['000001'])
+    change = {'날짜': str(DAYS[3].date()), 'ticker': '000009', '구분': divisor.EVENT_ADD}
+    updated, updated_nums, _ = divisor.apply_change(_state(['000001'], nums, starts), series, pd.DataFrame(), change)
+    assert np.array_equal(updated['deajeon_index'].to_numpy(), series['deajeon_index'].to_numpy())
+    assert updated_nums == nums
@@ -0,0 +1,26 @@
+from fetch_scheduler import FetchScheduler, TokenBucket
+
+
+def _fail():
+    raise RuntimeError('fail')
+
+def test_failed_task_does_not_drop_rest_of_group():
+    ran = []
+    groups = {
+        'a': [lambda: ran.append('a1') or 1, _fail, lambda: ran.append('a3') or 3],
+        'b': [lambda: ran.append('b1') or 10],
+        'c': [_fail],
+    }
+    results, errors = FetchScheduler(max_workers=2, max_retries=1, backoff_base=0.0, show_progress=False).run(groups)
+    assert sorted(ran) == ['a1', 'a3', 'b1']
+    assert results == {'a': [1, 3], 'b': [10]}
+    assert {key: [position for position, _ in failures] for key, failures in errors.items()} == {'a': [1], 'c': [0]}
+
+def test_token_bucket_counts_waits(monkeypatch):
+    # 시계를 멈추고 sleep을 막아, 호출 사이에 토큰이 보충되지 않도록 합니다. (실행 속도와 무관)
+    monkeypatch.setattr('fetch_scheduler.time.monotonic', lambda: 100.0)
+    monkeypatch.setattr('fetch_scheduler.time.sleep', lambda seconds: None)
+    bucket = TokenBucket(rate=2, capacity=1)
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.5, 1.0]
+    assert bucket.waits == 2
+    assert bucket.total_wait == 1.5
@@ -0,0 +1,47 @@
+import pandas as pd
+
+import fetcher
+import store
+from fake_krx import FakeStock
+from fetch_scheduler import FetchScheduler
+
+TICKERS = ['000001', '000002']
+START, END = pd.Timestamp('2025-06-02'), pd.Timestamp('2025-06-27')
+# 장 마감 집계 이후라 END까지 확정된 날짜입니다.
+NOW = pd.Timestamp('2025-06-27 20:00').to_pydatetime()
+
+
+def test_covered_range_plans_no_requests(tmp_path):
+    store_dir = str(tmp_path)
+    for dataset in fetcher.DATASET_FETCHERS:
+        for ticker in TICKERS:
+            store.mark_covered(dataset, ticker, START, END, store_dir)
+    plan = fetcher.plan_requests(TICKERS, START, END, now=NOW, store_dir=store_dir)
+    assert plan['requests'] == []
+    assert (plan['ticker_cost'], plan['date_cost']) == (0, 0)
+
+    # 조회 완료 기간이 끝난 뒤의 날짜만 다시 요청합니다.
+    later = pd.Timestamp('2025-07-04 20:00').to_pydatetime()
+    plan = fetcher.plan_requests(TICKERS, START, later, now=later, strategy='ticker', store_dir=store_dir)
+    assert {(start, end) for _, _, start, end in plan['requests']} == {(pd.Timestamp('2025-06-30'), pd.Timestamp('2025-07-04'))}
+
+def test_ticker_groups_write_coverage_once_per_dataset(tmp_path, monkeypatch):
+    store_dir = str(tmp_path)
+    # 티커·데이터셋마다 두 구간씩 요청해도 coverage.json은 티커·데이터셋마다 한 번만 씁니다.
+    halves = [(START, pd.Timestamp('2025-06-13')), (pd.Timestamp('2025-06-16'), END)]
+    requests = [(dataset, ticker, start, end)
+                for ticker in TICKERS for dataset in fetcher.DATASET_FETCHERS for start, end in halves]
+    writes = []
+    save_meta = store._save_meta
+
+    def counting_save_meta(meta, filename, directory):
+        writes.append(filename)
+        save_meta(meta, filename, directory)
+
+    monkeypatch.setattr(store, '_save_meta', counting_save_meta)
+
+    results, errors = FetchScheduler(show_progress=False).run(fetcher.ticker_groups(FakeStock(), requests, NOW, store_dir))
+    assert errors == {}
+    assert writes.count(store.COVERAGE_FILE) == len(TICKERS) * len(fetcher.DATASET_FETCHERS)
+    assert sum(sum(counts) for counts in results.values()) > 0
+    assert fetcher.plan_requests(TICKERS, START, END, now=NOW, store_dir=store_dir)['requests'] == []
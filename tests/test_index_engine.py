@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import index_engine
+
+START, END = pd.Timestamp('2025-04-01'), pd.Timestamp('2025-06-30')
+
+
+def _stock_data(seed=0):
+    """평일마다 행을 만들고(평일 공휴일 행 포함), 늦게 상장한 종목과 하루 빠진 종목을 섞습니다."""
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range(START, END)
+    frames = []
+    for i, ticker in enumerate(['000001', '000002', '000003']):
+        ticker_days = days[days >= days[10]] if i == 2 else days
+        frames.append(pd.DataFrame({'날짜': ticker_days, 'ticker': ticker,
+                                    '시가총액': rng.integers(10**9, 10**10, len(ticker_days))}))
+    data = pd.concat(frames, ignore_index=True)
+    data = data.drop(index=data.index[(data['ticker'] == '000002') & (data['날짜'] == days[20])])
+    return data.sort_values(['날짜', 'ticker']).reset_index(drop=True)
+
+def _initial(data):
+    first_data_date = data['날짜'].min()
+    return (first_data_date, *index_engine.calculate_initial_index(data[data['날짜'] == first_data_date]))
+
+def test_vectorized_engine_matches_loop():
+    data = _stock_data()
+    first_data_date, base_index, base_market_cap = _initial(data)
+    loop = index_engine.compute_index(data, first_data_date, END, base_index, base_market_cap, engine='loop')
+    vectorized = index_engine.compute_index(data, first_data_date, END, base_index, base_market_cap)
+    pd.testing.assert_frame_equal(vectorized, loop, check_dtype=False)
+
+def test_ticker_without_rows_in_range_is_not_missing():
+    # 000009는 계산 기간이 끝난 뒤에 상장합니다. 기간 안에서는 누락으로 표시하지 않아야 합니다.
+    data = _stock_data()
+    later = pd.DataFrame({'날짜': pd.bdate_range('2025-07-01', periods=3), 'ticker': '000009', '시가총액': 10**9})
+    data = pd.concat([data, later], ignore_index=True)
+    first_data_date, base_index, base_market_cap = _initial(data)
+    result = index_engine.compute_index(data, first_data_date, END, base_index, base_market_cap)
+    loop = index_engine.compute_index(data, first_data_date, END, base_index, base_market_cap, engine='loop')
+    assert not result['특이사항'].str.contains('000009').any()
+    assert result['특이사항'].tolist() == loop['특이사항'].tolist()
+
+def _save(df_result, data, first_data_date, base_index, base_market_cap, path, previous_state=None):
+    """02_calculate_index.main과 같은 순서로 상태를 만들고 시계열을 저장합니다."""
+    state = index_engine.build_index_state(df_result, data, base_index, base_market_cap, first_data_date,
+                                           ['000001', '000002', '000003'], str(path), previous_state)
+    state['series_bytes'] = index_engine.save_series(df_result, str(path), state['last_valid_date'], previous_state)
+    return state
+
+def test_incremental_appends_same_series_as_full_computation(tmp_path, monkeypatch):
+    data = _stock_data(1)
+    first_data_date, base_index, base_market_cap = _initial(data)
+    # 금요일(5/16)까지 데이터가 있고 일요일(5/18)까지 계산한 결과에서 이어 갑니다. (주말 행은 다음 실행에서 다시 계산)
+    checkpoint = pd.Timestamp('2025-05-18')
+    before, after = data[data['날짜'] <= checkpoint], data[data['날짜'] > checkpoint]
+    df_before = index_engine.compute_index(before, first_data_date, checkpoint, base_index, base_market_cap)
+    state = _save(df_before, before, first_data_date, base_index, base_market_cap, tmp_path / 'deajeon_index_20250518.csv')
+
+    # 증분 실행은 이전 결과 파일을 읽지 않습니다.
+    new_path = tmp_path / 'deajeon_index_20250630.csv'
+    with monkeypatch.context() as patch:
+        patch.setattr(pd, 'read_csv', lambda *args, **kwargs: pytest.fail('이전 시계열을 읽었습니다.'))
+        df_new = index_engine.compute_index_increment(after, state, END)
+        new_state = _save(df_new, after, first_data_date, base_index, base_market_cap, new_path, state)
+
+    full = index_engine.compute_index(data, first_data_date, END, base_index, base_market_cap)
+    full_state = _save(full, data, first_data_date, base_index, base_market_cap, tmp_path / 'full.csv')
+    assert not (tmp_path / 'deajeon_index_20250518.csv').exists()
+    assert new_path.read_bytes() == (tmp_path / 'full.csv').read_bytes()
+    assert {key: value for key, value in new_state.items() if key != 'series_path'} == \
+        {key: value for key, value in full_state.items() if key != 'series_path'}
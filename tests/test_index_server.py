@@ -0,0 +1,104 @@
+import http.client
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import index_server
+
+START = pd.Timestamp('2025-06-02')
+
+
+def _write_index(directory, end):
+    """02_calculate_index.py처럼 달력 날짜마다 행이 있는 deajeon_index_YYYYMMDD.csv를 씁니다. (값은 날마다 1씩 증가)"""
+    days = pd.date_range(START, end)
+    steps = np.arange(len(days))
+    df = pd.DataFrame({'날짜': days, 'deajeon_index': 100.0 + steps, '시가총액': 10**12 + steps})
+    path = directory / f'deajeon_index_{pd.Timestamp(end):%Y%m%d}.csv'
+    df.to_csv(path, index=False, encoding='utf-8-sig')
+    return path
+
+def _query(service, *args):
+    body, etag = service.query(*args)
+    return json.loads(body), etag
+
+def test_query_range_edges(tmp_path):
+    # 6/3, 6/6은 공휴일(conftest HOLIDAYS)이므로 6/2~7/4의 거래일은 23일입니다.
+    _write_index(tmp_path, '2025-07-04')
+    service = index_server.IndexService(str(tmp_path))
+    assert _query(service)[0]['count'] == 23
+
+    # 양 끝 포함, 주말에서 시작하면 다음 거래일부터
+    result, _ = _query(service, 'daily', '2025-06-07', '2025-06-10')
+    assert [row['날짜'] for row in result['data']] == ['2025-06-09', '2025-06-10']
+    assert _query(service, 'daily', '2025-06-04', '2025-06-04')[0]['count'] == 1
+    # 휴장일 하루, 데이터 밖, 시작일이 종료일보다 늦은 경우는 빈 결과
+    assert _query(service, 'daily', '2025-06-06', '2025-06-06')[0]['count'] == 0
+    assert _query(service, 'daily', '2025-07-05', None)[0]['count'] == 0
+    assert _query(service, 'daily', '2025-06-20', '2025-06-10')[0]['count'] == 0
+
+    # 주별 행의 날짜는 그 주의 첫 거래일입니다.
+    weekly, _ = _query(service, 'weekly')
+    assert [row['날짜'] for row in weekly['data']] == ['2025-06-02', '2025-06-09', '2025-06-16', '2025-06-23', '2025-06-30']
+    assert weekly['data'][0]['종가'] == 103.0   # 6/5 (6/6 공휴일 행 제외)
+
+def test_query_rejects_invalid_arguments(tmp_path):
+    _write_index(tmp_path, '2025-07-04')
+    service = index_server.IndexService(str(tmp_path))
+    with pytest.raises(ValueError):
+        service.query('daily', '2025-13-01')
+    with pytest.raises(ValueError):
+        service.query('daily', None, 'yesterday')
+    with pytest.raises(ValueError):
+        service.query('hourly')
+    with pytest.raises(LookupError):
+        index_server.IndexService(str(tmp_path / 'empty')).query()
+
+def test_reload_swaps_snapshot_only_for_new_file(tmp_path):
+    _write_index(tmp_path, '2025-07-04')
+    service = index_server.IndexService(str(tmp_path))
+    old_snapshot = service.snapshot
+    _, old_etag = service.query()
+    assert service.reload() is False
+    assert service.snapshot is old_snapshot
+
+    # 새 일별 파일이 생기면 통째로 바꾸고, 같은 기간이라도 ETag가 달라집니다.
+    _write_index(tmp_path, '2025-07-11')
+    assert service.reload() is True
+    result, new_etag = _query(service)
+    assert result['count'] == 28
+    assert new_etag != old_etag
+
+    # 읽을 수 없는 새 파일이면 기존 데이터를 계속 제공합니다.
+    current = service.snapshot
+    (tmp_path / 'deajeon_index_20250718.csv').write_text('날짜,다른컬럼\n', encoding='utf-8-sig')
+    assert service.reload() is False
+    assert service.snapshot is current
+
+def test_server_returns_304_for_matching_etag(tmp_path):
+    _write_index(tmp_path, '2025-07-04')
+    server = index_server.make_server(index_server.IndexService(str(tmp_path)), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        connection = http.client.HTTPConnection(*server.server_address, timeout=5)
+        path = '/series?start=2025-06-09&end=2025-06-13'
+        connection.request('GET', path)
+        response = connection.getresponse()
+        body, etag = response.read(), response.getheader('ETag')
+        assert response.status == 200 and json.loads(body)['count'] == 5
+
+        # 같은 연결(keep-alive)로 If-None-Match를 보내면 본문 없이 304
+        connection.request('GET', path, headers={'If-None-Match': etag})
+        response = connection.getresponse()
+        assert (response.status, response.read(), response.getheader('ETag')) == (304, b'', etag)
+
+        connection.request('GET', '/series?start=2025-06-31')
+        response = connection.getresponse()
+        assert response.status == 400 and 'error' in json.loads(response.read())
+        connection.close()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+import store
+from index_engine import calculate_deajeon_index
+from intraday_engine import IntradayIndex, replay_ticks
+
+DAYS = pd.DatetimeIndex(['2025-06-19', '2025-06-20'])
+
+
+def _store_day(store_dir, ticker, closes, caps, shares):
+    """수정주가(종가)와 나누어떨어지지 않는 시가총액으로 이틀치 일봉을 저장합니다."""
+    closes = np.asarray(closes)
+    store.append('ohlcv', ticker, pd.DataFrame({'날짜': DAYS, '시가': closes - 50, '고가': closes + 100,
+                                                '저가': closes - 120, '종가': closes}), store_dir)
+    store.append('marcap', ticker, pd.DataFrame({'날짜': DAYS, '시가총액': caps, '상장주식수': shares}), store_dir)
+
+def test_replay_ends_at_daily_index(tmp_path):
+    store_dir = str(tmp_path)
+    # 종가는 수정주가(실제 가격의 절반 등)이고, 시가총액은 상장주식수로 나누어떨어지지 않습니다.
+    _store_day(store_dir, '000001', [5_000, 5_100], [10_000_123_457, 10_250_987_654], 1_000_003)
+    _store_day(store_dir, '000002', [40_000, 39_500], [80_000_001_111, 79_100_000_777], [2_000_000, 2_000_001])
+    _store_day(store_dir, '000003', [1_234, 1_250], [61_700_009_999, 62_600_000_001], 50_000_007)
+    tickers = ['000001', '000002', '000003']
+    base_market_cap = 150_000_000_000
+
+    engine = IntradayIndex.from_store(tickers, DAYS[1], base_market_cap, store_dir=store_dir)
+    for ticker, price in zip(*replay_ticks(DAYS[1], tickers, ticks_per_bar=6, store_dir=store_dir)):
+        engine.update(ticker, price)
+
+    caps = store.read('marcap', tickers, DAYS[1], DAYS[1], columns=['시가총액'], store_dir=store_dir)['시가총액']
+    # 종목별 시가총액을 정확히 되돌리므로 시가총액 합은 같고, 인덱스 값은 같은 식이라 부동소수점 오차 안(1e-12)에서 같습니다.
+    assert engine.market_cap == int(caps.sum())
+    np.testing.assert_allclose(engine.value, calculate_deajeon_index(int(caps.sum()), base_market_cap), rtol=1e-12)
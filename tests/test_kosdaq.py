@@ -0,0 +1,29 @@
+from datetime import datetime
+
+import pandas as pd
+
+import kosdaq
+from krx_cache import CachedSource
+
+
+class IndexSource:
+    def __init__(self):
+        self.calls = []
+
+    def get_index_ohlcv(self, fromdate, todate, ticker):
+        self.calls.append((fromdate, todate))
+        days = pd.bdate_range(fromdate, todate, name='날짜')
+        return pd.DataFrame({'종가': range(len(days))}, index=days)
+
+def test_history_is_served_from_cache_on_the_next_day(tmp_path):
+    source = IndexSource()
+    first = CachedSource(source, cache_dir=str(tmp_path), now=datetime(2025, 6, 19, 20))
+    df1 = kosdaq.fetch_index_ohlcv(first, '2001', '20230101', datetime(2025, 6, 19))
+    assert len(source.calls) == 3
+
+    second = CachedSource(source, cache_dir=str(tmp_path), now=datetime(2025, 6, 20, 20))
+    df2 = kosdaq.fetch_index_ohlcv(second, '2001', '20230101', datetime(2025, 6, 20))
+    # 지난 연도(2023, 2024)는 캐시에서 읽고 올해 구간만 다시 조회합니다.
+    assert source.calls[3:] == [('20250101', '20250620')]
+    assert df2.index.is_unique and df2.index.is_monotonic_increasing
+    assert len(df2) == len(df1) + 1
@@ -0,0 +1,46 @@
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from krx_cache import TODAY_TTL_SECONDS, CachedSource
+
+
+class CountingSource:
+    """pykrx.stock 대신 쓰는 가짜 소스 (함수별 실제 호출 횟수를 셈)"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_market_ohlcv(self, start, end, ticker):
+        self.calls += 1
+        return pd.DataFrame({'종가': [self.calls]}, index=pd.DatetimeIndex([start]))
+
+NOW = datetime(2025, 6, 20, 18, 0)   # 장 마감 집계 이후 → 6월 20일까지 확정
+
+def test_confirmed_range_is_served_from_disk(tmp_path):
+    source = CountingSource()
+    first = CachedSource(source, cache_dir=str(tmp_path), now=NOW)
+    expected = first.get_market_ohlcv('20250101', '20250620', '005930')
+    # 다른 프로세스처럼 새로 만든 캐시도 디스크에서 같은 값을 읽고, 실제 호출은 한 번뿐입니다.
+    second = CachedSource(source, cache_dir=str(tmp_path), now=NOW)
+    pd.testing.assert_frame_equal(second.get_market_ohlcv('20250101', '20250620', '005930'), expected)
+    assert source.calls == 1 and (second.hits, second.misses) == (1, 0)
+
+def test_unconfirmed_range_expires(tmp_path, monkeypatch):
+    source = CountingSource()
+    cache = CachedSource(source, cache_dir=str(tmp_path), now=datetime(2025, 6, 20, 10, 0))
+    cache.get_market_ohlcv('20250101', '20250620', '005930')   # 장중에는 오늘이 확정되지 않음
+    cache.get_market_ohlcv('20250101', '20250620', '005930')
+    assert source.calls == 1
+    later = time.time() + TODAY_TTL_SECONDS + 1
+    monkeypatch.setattr('krx_cache.time.time', lambda: later)
+    cache.get_market_ohlcv('20250101', '20250620', '005930')
+    assert source.calls == 2
+
+def test_eviction_keeps_cache_under_limit(tmp_path):
+    source = CountingSource()
+    cache = CachedSource(source, cache_dir=str(tmp_path), max_bytes=3_000, now=NOW)
+    for ticker in range(20):
+        cache.get_market_ohlcv('20250101', '20250131', f'{ticker:06d}')
+    assert sum(size for _, size, _ in cache._entries()) <= 3_000
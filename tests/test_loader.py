@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+import loader
+
+
+def _write_csv_tree(root, tickers, days):
+    rng = np.random.default_rng(0)
+    for dataset in ('ohlcv', 'marcap'):
+        (root / dataset).mkdir()
+    for ticker in tickers:
+        close = rng.integers(1_000, 50_000, len(days))
+        index = pd.Index(days, name='날짜')
+        pd.DataFrame({'시가': close, '고가': close, '저가': close, '종가': close, '거래량': close, '등락률': 0.0},
+                     index=index).to_csv(root / 'ohlcv' / f'ohlcv_{ticker}_T{ticker}_20250620.csv')
+        pd.DataFrame({'시가총액': close * 1000, '거래량': close, '거래대금': close, '상장주식수': 1000},
+                     index=index).to_csv(root / 'marcap' / f'marcap_{ticker}_T{ticker}_20250620.csv')
+
+def test_csv_range_read_matches_baseline(tmp_path, monkeypatch):
+    tickers = ['000001', '000002', '000003']
+    _write_csv_tree(tmp_path, tickers, pd.bdate_range('2023-01-02', '2025-06-20'))
+    monkeypatch.setattr(loader, 'OHLCV_DIR', str(tmp_path / 'ohlcv'))
+    monkeypatch.setattr(loader, 'MARCAP_DIR', str(tmp_path / 'marcap'))
+    monkeypatch.setattr(loader, 'CSV_CHUNK_ROWS', 37)   # 기간 경계가 청크 중간에 오도록
+
+    start, end = pd.Timestamp('2024-02-07'), pd.Timestamp('2024-11-13')
+    pruned = loader.load_all_data_csv(start, end, tickers, columns=['시가총액', '종가'], workers=2)
+    baseline = loader.load_all_data_baseline(start, end, tickers, csv=True)
+
+    assert pruned['날짜'].min() >= start and pruned['날짜'].max() <= end
+    assert len(pruned) == len(baseline)
+    assert (pruned['시가총액'].to_numpy() == baseline['시가총액'].to_numpy()).all()
+    assert (pruned['ticker'].astype(str).to_numpy() == baseline['ticker'].to_numpy()).all()
+
+def test_csv_range_outside_file_returns_empty_frame(tmp_path):
+    days = pd.bdate_range('2024-01-02', '2024-03-29')
+    _write_csv_tree(tmp_path, ['000001'], days)
+    path = tmp_path / 'marcap' / 'marcap_000001_T000001_20250620.csv'
+    df = loader._read_csv_range(path, ['시가총액'], pd.Timestamp('2025-01-01'), pd.Timestamp('2025-02-01'))
+    assert df.empty and list(df.columns) == ['날짜', '시가총액']
@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+import fonts
+import main
+
+# import 시간(ms)은 기계·부하·디스크 캐시에 따라 달라지므로, 이 환경 변수를 켠 경우에만 예산을 확인합니다.
+BUDGET_ENV = 'DEAJEON_IMPORT_BUDGET'
+
+
+def test_check_does_not_import_heavy_modules():
+    total_ms, top, heavy = main.measure_import_time()
+    assert top, "import 시간을 재지 못했습니다."
+    assert heavy == [], f"시작할 때 무거운 모듈을 불러옵니다: {heavy}"
+
+@pytest.mark.skipif(not os.environ.get(BUDGET_ENV), reason=f'{BUDGET_ENV}=1일 때만 import 시간 예산을 확인합니다.')
+def test_check_imports_within_budget():
+    total_ms, top, _ = main.measure_import_time()
+    assert total_ms <= main.IMPORT_BUDGET_MS, f"import {total_ms:.1f}ms > 예산 {main.IMPORT_BUDGET_MS}ms (상위: {top[:5]})"
+
+@pytest.fixture
+def font_lookups(tmp_path, monkeypatch):
+    """_find_font 호출 횟수를 세는 가짜 폰트 탐색 (폰트 파일은 tmp_path에 만듦)"""
+    font_path = tmp_path / 'NanumGothic.ttf'
+    font_path.write_bytes(b'')
+    lookups = []
+    monkeypatch.setattr(fonts, '_find_font', lambda: lookups.append(1) or {'name': 'NanumGothic', 'path': str(font_path)})
+    monkeypatch.setattr(fonts, '_resolved', {})
+    return lookups, font_path, str(tmp_path / 'font.json')
+
+def test_font_is_looked_up_once_across_processes(font_lookups):
+    lookups, _, cache_file = font_lookups
+    assert fonts.resolve_korean_font(cache_file)['name'] == 'NanumGothic'
+    fonts._resolved.clear()   # 새 프로세스처럼 메모리 캐시를 비워도 파일 캐시를 씁니다.
+    assert fonts.resolve_korean_font(cache_file)['name'] == 'NanumGothic'
+    assert len(lookups) == 1
+
+def test_missing_cached_font_is_looked_up_again(font_lookups):
+    lookups, font_path, cache_file = font_lookups
+    fonts.resolve_korean_font(cache_file)
+    fonts._resolved.clear()
+    font_path.unlink()
+    fonts.resolve_korean_font(cache_file)
+    assert len(lookups) == 2
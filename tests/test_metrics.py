@@ -0,0 +1,42 @@
+import json
+
+import metrics
+
+
+def test_stage_records_peak_growth_not_lifetime_peak(monkeypatch):
+    # ru_maxrss는 프로세스 전체의 최댓값이라 (fork한 하위 프로세스도 물려받음) 앞선 테스트에 따라 달라지므로,
+    # 최대 RSS 값을 정해 두고 단계 전후 차이만 기록하는지 확인합니다.
+    peaks = iter([500, 564, 564, 564])
+    monkeypatch.setattr(metrics, 'peak_rss_bytes', lambda children=False: next(peaks) * 1024 * 1024)
+    run = metrics.RunMetrics('test', profile=())
+    with run.stage('grow'):
+        pass
+    with run.stage('idle'):
+        pass
+    assert run.stages['grow']['peak_rss_growth_bytes'] == 64 * 1024 * 1024
+    assert run.stages['idle']['peak_rss_growth_bytes'] == 0
+    assert 'peak_rss_bytes' not in run.stages['grow']
+
+def test_peak_rss_is_measured_in_bytes():
+    block = bytearray(64 * 1024 * 1024)
+    block[::4096] = b'x' * len(block[::4096])
+    peak = metrics.peak_rss_bytes()
+    del block
+    if peak is not None:   # RSS를 잴 수 없는 환경에서는 None
+        assert peak >= 64 * 1024 * 1024
+
+def test_counters_go_to_active_stage_and_file_merges_runs(tmp_path):
+    metrics.start_run('fetch', profile=())
+    with metrics.stage('load'):
+        metrics.count('files_read', 3)
+        metrics.record_call('get_market_ohlcv', 0.5)
+    metrics.finish_run(directory=str(tmp_path))
+    metrics.start_run('index', profile=())
+    path = metrics.finish_run(directory=str(tmp_path))
+    metrics.count('files_read')   # 실행 중인 지표가 없으면 무시
+
+    document = json.loads(open(path, encoding='utf-8').read())
+    assert set(document['runs']) == {'fetch', 'index'}
+    fetch = document['runs']['fetch']
+    assert fetch['stages']['load']['counts'] == {'files_read': 3, 'external_calls': 1}
+    assert fetch['calls']['get_market_ohlcv']['count'] == 1
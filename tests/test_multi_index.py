@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import divisor
+import index_engine
+import multi_index
+
+DAYS = pd.bdate_range('2025-03-03', periods=8)
+
+pytestmark = pytest.mark.usefixtures('weekdays_calendar')
+
+
+def _cap_basket(tickers, changes=(), name='cap'):
+    return [{'name': name, 'tickers': tickers, 'changes': list(changes), 'weighting': 'cap'}]
+
+def test_listing_and_missing_day_do_not_jump(stock_frame):
+    # 000002는 3일째 상장, 000001은 2일째 행이 없습니다. 가격이 그대로면 인덱스도 100이어야 합니다.
+    listed = stock_frame('000001', [10_000] * 8, DAYS).drop(index=1)
+    new = stock_frame('000002', [10_000] * 6, DAYS[2:])
+    levels = multi_index.compute_indices(pd.concat([listed, new]), _cap_basket(['000001', '000002']))
+    assert (levels['cap'] == multi_index.BASE_INDEX).all()
+
+def test_cap_basket_matches_divisor_rebuild(stock_frame):
+    first = stock_frame('000001', [10_000, 10_200, 10_100, 10_300, 10_250, 10_400, 10_500, 10_450], DAYS).drop(index=4)
+    listed = stock_frame('000002', [3_000, 3_100, 3_050, 3_200, 3_150], DAYS[3:])
+    data = pd.concat([first, listed])
+    change = {'날짜': str(DAYS[5].date()), 'ticker': '000001', '구분': multi_index.EVENT_REMOVE}
+
+    levels = multi_index.compute_indices(data, _cap_basket(['000001', '000002'], [change]))
+    expected = divisor.rebuild(data, ['000001', '000002'], [change], DAYS[0], DAYS[-1])[0]
+    np.testing.assert_allclose(levels['cap'], expected['deajeon_index'], rtol=1e-12)
+
+def test_cap_baskets_computed_together_match_each_rebuild(stock_frame):
+    # 시작일·구성 변경이 서로 다른 시가총액 바스켓 셋을 한 번에 계산해도 바스켓별 rebuild와 같아야 합니다.
+    rng = np.random.default_rng(2)
+    data = pd.concat([stock_frame('000001', rng.integers(9_000, 11_000, 8), DAYS),
+                      stock_frame('000002', rng.integers(4_000, 6_000, 6), DAYS[2:]),
+                      stock_frame('000003', rng.integers(7_000, 9_000, 8), DAYS).drop(index=5)])
+    definitions = {
+        'all': (['000001', '000002', '000003'], []),
+        'late': (['000002'], [{'날짜': str(DAYS[4].date()), 'ticker': '000003', '구분': multi_index.EVENT_ADD}]),
+        'swap': (['000001'], [{'날짜': str(DAYS[3].date()), 'ticker': '000001', '구분': multi_index.EVENT_REMOVE},
+                              {'날짜': str(DAYS[3].date()), 'ticker': '000003', '구분': multi_index.EVENT_ADD}]),
+    }
+    baskets = [basket for name, (tickers, changes) in definitions.items() for basket in _cap_basket(tickers, changes, name)]
+    levels = multi_index.compute_indices(data, baskets)
+    for name, (tickers, changes) in definitions.items():
+        expected = divisor.rebuild(data, tickers, changes, DAYS[0], DAYS[-1])[0]
+        # 구성 종목 데이터가 생기기 전 날짜는 rebuild에서 0, compute_indices에서 NaN입니다.
+        expected = np.where(expected['시가총액'] > 0, expected['deajeon_index'], np.nan)
+        np.testing.assert_allclose(levels[name], expected, rtol=1e-12, err_msg=name)
+
+def test_capped_weights_respect_cap_for_every_basket():
+    rng = np.random.default_rng(3)
+    weights = rng.random((2, 5, 12)) ** 4
+    weights[:, 2, 3:] = 0.0   # 3종목만 데이터가 있는 날: 상한을 지킬 수 없으므로 합만 1로 맞춥니다.
+    weights /= weights.sum(axis=-1, keepdims=True)
+    cap = np.array([0.15, 0.3])[:, None, None]
+    capped = multi_index._capped_weights(weights, cap)
+    np.testing.assert_allclose(capped.sum(axis=-1), 1.0, rtol=1e-12)
+    assert (np.delete(capped, 2, axis=1) <= cap + 1e-9).all()
+    for i in range(2):
+        np.testing.assert_allclose(capped[i], multi_index._capped_weights(weights[i], cap[i, 0, 0]), rtol=1e-12)
+
+def test_capped_basket_with_too_few_members_raises(stock_frame):
+    # 상한 10%는 구성 종목이 10개 이상이어야 지킬 수 있습니다.
+    data = pd.concat([stock_frame(f'00000{i}', [10_000] * 8, DAYS) for i in range(3)])
+    basket = {'name': 'capped', 'tickers': None, 'weighting': 'capped', 'cap': 0.1}
+    with pytest.raises(ValueError):
+        multi_index.compute_indices(data, [basket])
+
+def test_cap_basket_matches_index_engine_without_events(stock_frame):
+    rng = np.random.default_rng(0)
+    data = pd.concat([stock_frame(ticker, rng.integers(5_000, 20_000, len(DAYS)), DAYS)
+                      for ticker in ('000001', '000002', '000003')])
+    levels = multi_index.compute_indices(data, _cap_basket(['000001', '000002', '000003']))
+
+    base_index, base_market_cap = index_engine.calculate_initial_index(data[data['날짜'] == DAYS[0]])
+    engine = index_engine.compute_index(data, DAYS[0], DAYS[-1], base_index, base_market_cap)
+    engine = engine[engine['날짜'].isin(DAYS)]
+    np.testing.assert_allclose(levels['cap'], engine['deajeon_index'], rtol=1e-12)
@@ -0,0 +1,45 @@
+import pipeline
+
+# 실행할 때마다 runs.txt에 한 줄을 더하고, 25줄을 출력한 뒤 결과 파일을 만드는 단계 스크립트
+STAGE_SCRIPT = '''
+import pathlib
+with open('runs.txt', 'a') as f:
+    f.write('run\\n')
+for i in range(25):
+    print(f'줄 {i}')
+pathlib.Path('out.txt').write_text(pathlib.Path('in.txt').read_text())
+'''
+
+
+def _stages():
+    return {'demo': {'script': 'demo.py', 'args': [], 'deps': [], 'code': ['demo.py'],
+                     'inputs': ['in.txt'], 'params': lambda: {}, 'outputs': ['out.txt']}}
+
+def _setup(tmp_path, monkeypatch):
+    (tmp_path / 'scripts').mkdir()
+    (tmp_path / 'scripts' / 'demo.py').write_text(STAGE_SCRIPT, encoding='utf-8')
+    (tmp_path / 'in.txt').write_text('1')
+    monkeypatch.setattr(pipeline, 'SCRIPTS_DIR', str(tmp_path / 'scripts'))
+
+def test_unchanged_fingerprint_skips_stage(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    assert pipeline.run(_stages()) == {'demo': '실행'}
+    # 코드·입력이 그대로이고 출력이 남아 있으면 다시 실행하지 않습니다.
+    assert pipeline.run(_stages()) == {'demo': '건너뜀'}
+    assert (tmp_path / 'runs.txt').read_text().count('run') == 1
+
+    # 입력이 바뀌거나 출력이 지워지면 다시 실행합니다.
+    (tmp_path / 'in.txt').write_text('2')
+    assert pipeline.run(_stages()) == {'demo': '실행'}
+    (tmp_path / 'out.txt').unlink()
+    assert pipeline.run(_stages()) == {'demo': '실행'}
+    assert (tmp_path / 'runs.txt').read_text().count('run') == 3
+
+def test_stage_output_is_streamed_and_logged(tmp_path, monkeypatch, capsys):
+    _setup(tmp_path, monkeypatch)
+    pipeline.run(_stages())
+    # 마지막 몇 줄만이 아니라 모든 줄을 [단계] 접두어로 보여 주고, 로그 파일에도 남깁니다.
+    printed = capsys.readouterr().out.splitlines()
+    assert [line for line in printed if line.startswith('[demo] 줄')] == [f'[demo] 줄 {i}' for i in range(25)]
+    log = (tmp_path / 'data' / 'logs' / 'pipeline' / 'demo.log').read_text(encoding='utf-8')
+    assert log.splitlines() == [f'줄 {i}' for i in range(25)]
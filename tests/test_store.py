@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+import loader
+import store
+
+
+def _marcap(days, seed=0):
+    rng = np.random.default_rng(seed)
+    caps = rng.integers(10**9, 10**11, len(days))
+    return pd.DataFrame({'시가총액': caps, '거래량': caps // 1000, '거래대금': caps // 10, '상장주식수': 1_000_000},
+                        index=pd.Index(days, name='날짜'))
+
+def test_append_is_idempotent(tmp_path):
+    store_dir = str(tmp_path)
+    df = _marcap(pd.bdate_range('2025-06-02', '2025-06-20'))
+    assert store.append('marcap', '000001', df, store_dir) == len(df)
+    first = store.read('marcap', ['000001'], store_dir=store_dir)
+    # 같은 데이터를 다시 넣어도 새 날짜는 없고 내용도 그대로입니다.
+    assert store.append('marcap', '000001', df, store_dir) == 0
+    pd.testing.assert_frame_equal(store.read('marcap', ['000001'], store_dir=store_dir), first)
+
+    # 겹치는 날짜는 새 값으로 바뀌고, 새 날짜만 더해집니다.
+    update = _marcap(pd.bdate_range('2025-06-16', '2025-06-27'), seed=1)
+    assert store.append('marcap', '000001', update, store_dir) == 5
+    stored = store.read('marcap', ['000001'], store_dir=store_dir).set_index('날짜')
+    assert stored.index.is_unique and len(stored) == len(df) + 5
+    assert (stored.loc[update.index, '시가총액'].to_numpy() == update['시가총액'].to_numpy()).all()
+
+def test_year_partitions_round_trip(tmp_path):
+    store_dir = str(tmp_path)
+    df = _marcap(pd.bdate_range('2023-11-01', '2025-02-28'))
+    store.append('marcap', '000001', df, store_dir)
+    assert [year for year, _ in store._partition_years('marcap', '000001', store_dir)] == [2023, 2024, 2025]
+
+    whole = store.read('marcap', ['000001'], store_dir=store_dir)
+    assert (whole['날짜'].to_numpy() == df.index.to_numpy()).all()
+    for column, dtype in store.DATASET_SCHEMAS['marcap'].items():
+        assert whole[column].dtype == dtype and (whole[column].to_numpy() == df[column].to_numpy()).all()
+
+    # 연도 경계를 걸친 기간과 일부 컬럼만 읽어도 같은 행이 나옵니다.
+    start, end = pd.Timestamp('2023-12-20'), pd.Timestamp('2024-01-10')
+    part = store.read('marcap', ['000001'], start, end, columns=['시가총액'], store_dir=store_dir)
+    expected = df.loc[start:end, '시가총액']
+    assert list(part.columns) == ['날짜', 'ticker', '시가총액']
+    assert (part['날짜'].to_numpy() == expected.index.to_numpy()).all()
+    assert (part['시가총액'].to_numpy() == expected.to_numpy()).all()
+
+def _write_csv(root, dataset, ticker, name, file_date, df):
+    (root / dataset).mkdir(exist_ok=True)
+    df.to_csv(root / dataset / f'{dataset}_{ticker}_{name}_{file_date}.csv')
+
+def test_migrate_csv_tree_matches_csv_loader(tmp_path, monkeypatch):
+    root = tmp_path / 'csv'
+    root.mkdir()
+    days = pd.bdate_range('2024-12-02', '2025-01-31')
+    for i, ticker in enumerate(['000001', '000002']):
+        marcap = _marcap(days, seed=i)
+        close = marcap['시가총액'] // marcap['상장주식수']
+        ohlcv = pd.DataFrame({'시가': close, '고가': close, '저가': close, '종가': close, '거래량': marcap['거래량'],
+                              '등락률': 0.5}, index=marcap.index)
+        _write_csv(root, 'ohlcv', ticker, f'T_{ticker}', '20250131', ohlcv)
+        _write_csv(root, 'marcap', ticker, f'T_{ticker}', '20250131', marcap)
+    # 이전 날짜 파일은 무시하고 최신 파일만 옮깁니다.
+    _write_csv(root, 'marcap', '000001', 'T_000001', '20241231', _marcap(days[:5], seed=9))
+
+    names = store.migrate_csv_tree(str(root / 'ohlcv'), str(root / 'marcap'), str(tmp_path / 'store'))
+    assert names == {'000001': 'T_000001', '000002': 'T_000002'}
+
+    monkeypatch.setattr(loader, 'OHLCV_DIR', str(root / 'ohlcv'))
+    monkeypatch.setattr(loader, 'MARCAP_DIR', str(root / 'marcap'))
+    start, end, tickers = pd.Timestamp('2024-12-15'), pd.Timestamp('2025-01-20'), ['000001', '000002']
+    columns = ['시가총액', '상장주식수', '종가', '등락률']
+    migrated = loader.load_all_data(start, end, tickers, columns=columns, store_dir=str(tmp_path / 'store'))
+    from_csv = loader.load_all_data_csv(start, end, tickers, columns=columns, workers=1)
+    pd.testing.assert_frame_equal(migrated[from_csv.columns], from_csv, check_categorical=False)
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+import trading_calendar
+
+
+def test_year_end_closure_is_last_business_day(tmp_path):
+    calendar = trading_calendar.get_calendar(2022, 2024, calendar_dir=str(tmp_path))
+    closed = ['2022-12-30', '2023-12-29', '2024-12-31']   # 금요일, 금요일, 화요일
+    open_ = ['2022-12-29', '2023-12-28', '2024-12-30']
+    assert not calendar.is_trading_day(pd.DatetimeIndex(closed)).any()
+    assert calendar.is_trading_day(pd.DatetimeIndex(open_)).all()
+
+def test_year_end_closure_skips_holidays():
+    # 12월 31일이 공휴일이면 그 전 평일이 휴장일입니다.
+    closures = trading_calendar._krx_closures(2025, [pd.Timestamp('2025-12-31')])
+    assert closures[-1] == pd.Timestamp('2025-12-30')
+
+def test_old_calendar_file_is_rebuilt(tmp_path):
+    # 이전 규칙(12월 31일 고정)으로 만든 버전 없는 달력 파일은 다시 만듭니다.
+    flags = np.zeros(len(pd.date_range('2022-01-01', '2022-12-31')), dtype=np.uint8)
+    np.savez(tmp_path / trading_calendar.CALENDAR_FILE, first_year=2022, last_year=2022, flags=flags, built_at=0.0)
+    calendar = trading_calendar.get_calendar(2022, 2022, calendar_dir=str(tmp_path))
+    assert not calendar.is_trading_day(pd.DatetimeIndex(['2022-12-30']))[0]
+
+def test_calendar_is_built_once_across_processes(tmp_path, monkeypatch):
+    builds = []
+    build_flags = trading_calendar._build_flags
+    monkeypatch.setattr(trading_calendar, '_build_flags', lambda *years: builds.append(years) or build_flags(*years))
+
+    first = trading_calendar.get_calendar(2024, 2025, calendar_dir=str(tmp_path))
+    trading_calendar._cache.clear()   # 새 프로세스처럼 메모리 캐시를 비워도 npz 파일을 씁니다.
+    second = trading_calendar.get_calendar(2025, 2025, calendar_dir=str(tmp_path))
+    assert builds == [(2024, 2025)]
+    assert np.array_equal(first.flags, second.flags)
+
+def test_holiday_mask_matches_holidayskr():
+    from holidayskr import is_holiday   # conftest가 바꿔 넣은 고정 목록 (모듈 맨 위에서 import하면 실제 패키지를 부름)
+
+    days = pd.date_range('2025-01-01', '2025-12-31')
+    expected = [is_holiday(day.strftime('%Y-%m-%d')) for day in days]
+    assert trading_calendar.holiday_mask(days).tolist() == expected
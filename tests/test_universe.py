@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import divisor
+import multi_index
+import universe
+
+DAYS = pd.bdate_range('2025-03-03', periods=10)
+
+pytestmark = pytest.mark.usefixtures('weekdays_calendar')
+
+
+def _region():
+    # 000003은 데이터가 생기기 전(2일째)에 편입, 000002는 6일째 이후 데이터가 없음(상장폐지)
+    return universe.validate_region('test', {
+        'tickers': ['000001', '000002'],
+        'changes': [{'날짜': str(DAYS[1].date()), 'ticker': '000003', '구분': universe.EVENT_ADD}],
+    })
+
+def _regional_levels(data, registry):
+    return multi_index.compute_indices(data, universe.to_baskets(registry))['test_index']
+
+def test_region_added_before_data_and_delisted_stay_flat(stock_frame):
+    data = pd.concat([stock_frame('000001', [10_000] * 10, DAYS), stock_frame('000002', [5_000] * 6, DAYS),
+                      stock_frame('000003', [8_000] * 6, DAYS[4:])])
+    np.testing.assert_allclose(_regional_levels(data, {'test': _region()}), divisor.BASE_INDEX, rtol=1e-12)
+
+def test_region_matches_divisor_rebuild(stock_frame):
+    rng = np.random.default_rng(1)
+    data = pd.concat([stock_frame('000001', rng.integers(9_000, 11_000, 10), DAYS),
+                      stock_frame('000002', rng.integers(4_000, 6_000, 6), DAYS),
+                      stock_frame('000003', rng.integers(7_000, 9_000, 6), DAYS[4:])])
+    region = _region()
+    expected = divisor.rebuild(data, region['tickers'], region['changes'], DAYS[0], DAYS[-1])[0]
+    np.testing.assert_allclose(_regional_levels(data, {'test': region}), expected['deajeon_index'], rtol=1e-12)